@@ -1,3 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# Finanzierungsannahmen für die Annuität
+ZINS = 0.05                     # Kalkulationszins
+LAUFZEIT = 20                   # Nutzungsdauer Windkraftanlage in Jahren
+
+
+def _pruefe_positiv(**werte):
+    # Plausibilitätscheck für ganze Arrays: alle Werte endlich und > 0
+    for name, wert in werte.items():
+        ungueltig = ~(np.isfinite(wert) & (wert > 0))
+        if ungueltig.any():
+            beispiele = np.asarray(wert)[ungueltig][:5]
+            raise ValueError(f"{name} muss > 0 sein ({ungueltig.sum()} ungültige Werte, z.B. {beispiele}).")
+
+
+def hik_matrix(P_MW, SFL_W_per_m2, NH_m) -> np.ndarray:
+    '''
+    Spezifische Hauptinvestitionskosten (HIK) für viele Anlagen in einem Aufruf.
+
+    Alle Parameter dürfen Skalare oder Arrays sein und werden gegeneinander
+    gebroadcastet (z.B. ein Raster über Nennleistung x SFL x Nabenhöhe).
+
+    Parameter
+    ----------
+    P_MW : float oder array
+        Nennleistung in MW
+    SFL_W_per_m2 : float oder array
+        Spezifische Flächenleistung in W/m² (Nennleistung / Rotorkreisfläche)
+    NH_m : float oder array
+        Nabenhöhe in m
+
+    Returns
+    -------
+    np.ndarray
+        HIK in €/kW, Form des gebroadcasteten Parameters
+    '''
+    P_MW, SFL_W_per_m2, NH_m = np.broadcast_arrays(np.asarray(P_MW, dtype=float),
+                                                   np.asarray(SFL_W_per_m2, dtype=float),
+                                                   np.asarray(NH_m, dtype=float))
+    _pruefe_positiv(P_MW=P_MW, SFL_W_per_m2=SFL_W_per_m2, NH_m=NH_m)
+    return 1743.95 - 81.21 * P_MW - 1.66 * SFL_W_per_m2 + 2.91 * NH_m
+
+
 def hik_eur_per_kw(P_MW: float, SFL_W_per_m2: float, NH_m: float) -> float:
     '''
     Berechnet die spezifischen Hauptinvestitionskosten (HIK) in €/kW
@@ -5,11 +50,11 @@ def hik_eur_per_kw(P_MW: float, SFL_W_per_m2: float, NH_m: float) -> float:
 
     Parameter
     ----------
-    P : float
+    P_MW : float
         Nennleistung in MW
-    SFL : float
+    SFL_W_per_m2 : float
         Spezifische Flächenleistung in W/m², also Verhältnis von Nennleistung zu Rotorkreisfläche in Watt pro Quadratmeter (W/m²)
-    NH : float
+    NH_m : float
         Nabenhöhe in m
 
     Returns
@@ -17,24 +62,87 @@ def hik_eur_per_kw(P_MW: float, SFL_W_per_m2: float, NH_m: float) -> float:
     float
         HIK in €/kW
     '''
-    # einfache Plausibilitätschecks
-    if P <= 0:
-        raise ValueError("P_MW muss > 0 sein.")
-    if SFL <= 0:
-        raise ValueError("SFL_W_per_m2 muss > 0 sein.")
-    if NH <= 0:
-        raise ValueError("NH_m muss > 0 sein.")
+    return float(hik_matrix(P_MW, SFL_W_per_m2, NH_m))
+
+
+def kosten_wea(P_MW, SFL_W_per_m2, NH_m) -> np.ndarray:
+    '''Investitionskosten (CAPEX) der Anlage(n) in €: HIK · Nennleistung.'''
+    return hik_matrix(P_MW, SFL_W_per_m2, NH_m) * np.asarray(P_MW, dtype=float) * 1000
+
+
+def spezifische_flaechenleistung(P_kW, rotordurchmesser_m) -> np.ndarray:
+    '''Spezifische Flächenleistung in W/m² aus Nennleistung (kW) und Rotordurchmesser (m).'''
+    return np.asarray(P_kW, dtype=float) * 1000 / (np.pi * np.asarray(rotordurchmesser_m, dtype=float) ** 2 / 4)
+
+
+def annuitaetenfaktor(zins=ZINS, laufzeit=LAUFZEIT) -> np.ndarray:
+    '''Annuitätenfaktor q^n·(q-1)/(q^n-1) mit q = 1 + zins; bei zins = 0 gilt 1/n.'''
+    zins = np.asarray(zins, dtype=float)
+    laufzeit = np.asarray(laufzeit, dtype=float)
+    q_n = (1 + zins) ** laufzeit
+    with np.errstate(divide='ignore', invalid='ignore'):
+        faktor = q_n * zins / (q_n - 1)
+    return np.where(zins == 0, 1 / laufzeit, faktor)
+
+
+def capital_cost(P_MW, SFL_W_per_m2, NH_m, zins=ZINS, laufzeit=LAUFZEIT) -> np.ndarray:
+    '''
+    Annualisierte Investitionskosten in €/kW/a für den PyPSA-Generator (capital_cost).
+
+    Beispiel: Generator 'Windkraftanlage' mit capital_cost=capital_cost(4.2, 283, 120)
+    '''
+    return hik_matrix(P_MW, SFL_W_per_m2, NH_m) * annuitaetenfaktor(zins, laufzeit)
+
+
+def investitionskosten(entwuerfe: pd.DataFrame, zins=ZINS, laufzeit=LAUFZEIT) -> pd.DataFrame:
+    '''
+    HIK, CAPEX und capital_cost für eine Tabelle von Anlagenentwürfen.
+
+    Parameter
+    ----------
+    entwuerfe : pd.DataFrame
+        Spalten P_MW, SFL_W_per_m2 und NH_m (eine Zeile je Entwurf)
+    zins, laufzeit : float oder array
+        Finanzierungsannahmen für die Annuität
+
+    Returns
+    -------
+    pd.DataFrame
+        Eingabe ergänzt um HIK_EUR_per_kW, CAPEX_EUR und capital_cost_EUR_per_kW_a
+    '''
+    hik = hik_matrix(entwuerfe['P_MW'], entwuerfe['SFL_W_per_m2'], entwuerfe['NH_m'])
+    return entwuerfe.assign(
+        HIK_EUR_per_kW=hik,
+        CAPEX_EUR=hik * entwuerfe['P_MW'].to_numpy(dtype=float) * 1000,
+        capital_cost_EUR_per_kW_a=hik * annuitaetenfaktor(zins, laufzeit),
+    )
+
+
+def kostenraster(P_MW, SFL_W_per_m2, NH_m, zins=ZINS, laufzeit=LAUFZEIT) -> pd.DataFrame:
+    '''
+    Alle Kombinationen der angegebenen Werte mit HIK, CAPEX und capital_cost.
+
+    Beispiel: kostenraster(np.arange(2, 7, 0.1), np.arange(200, 400, 5), np.arange(80, 170, 5))
+    '''
+    index = pd.MultiIndex.from_product([np.atleast_1d(P_MW), np.atleast_1d(SFL_W_per_m2), np.atleast_1d(NH_m)],
+                                       names=['P_MW', 'SFL_W_per_m2', 'NH_m'])
+    return investitionskosten(index.to_frame(index=False), zins, laufzeit)
 
-    hik = 1743.95 - 81.21 * P - 1.66 * SFL + 2.91 * NH
-    cost_wea = hik*P_MW*1000
-    return hik, cost_wea
 
+if __name__ == '__main__':
+    P = 4.2
+    SFL = 283
+    NH = 120.0
 
-P = 4.2
-SFL = 283
-NH = 120.0
+    hik = hik_eur_per_kw(P, SFL, NH)
+    cost_wea = float(kosten_wea(P, SFL, NH))
 
-hik, cost_wea = hik_eur_per_kw(P, SFL, NH)
+    print(f"HIK = {hik:.2f} €/kW")
+    print(f"Kosten WEA = {cost_wea:,.0f} €")
+    print(f"capital_cost = {float(capital_cost(P, SFL, NH)):.2f} €/kW/a "
+          f"({ZINS:.0%} Zins, {LAUFZEIT} Jahre)")
 
-print(f"HIK = {hik:.2f} €/kW")
-print(f"Kosten WEA = {cost_wea:,.0f} €")
+    # Raster über viele Anlagenentwürfe
+    raster = kostenraster(np.arange(2.0, 7.0, 0.1), np.arange(200, 400, 5), np.arange(80, 170, 5))
+    guenstigste = raster.loc[raster['capital_cost_EUR_per_kW_a'].idxmin()]
+    print(f"\n{len(raster)} Entwürfe, günstigster: {guenstigste.to_dict()}")
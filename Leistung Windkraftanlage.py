@@ -1,28 +1,21 @@
 import numpy as np
 
-# Definition Kennwerte
-
-luftdruck = 1000                                                          # Luftdruck in Pa hängt auch von Höhe des Windrads und der Höhe gegenüber des Meeresspiegels ab, wie genau soll der Wert sein?
-gaskonstante = 287.05                                                     
-temperatur_celsis = 20  
-temperatur_kelvin = temperatur_celsis + 273.15
-dichte_Luft = luftdruck / (gaskonstante * temperatur_kelvin)              
+from windkraft import TURBINEN, LUFTDRUCK_NORMAL, leistungskurve, luftdichte
 
-Leistungsbeiwert = 0.5                                                    # Realistischer Wert bei guten Anlagen oder cp hänt auch von Windgeschwindkeit ab, aber keine Formel findbar
+# Definition Kennwerte
 
-durchmesser_rotorkreis = 120                                              # Variiert stark nach Modell
-rotorflaeche = (np.pi * durchmesser_rotorkreis ** 2)/4                    # Formel Rotorfläche (Formel Für Flächeninhalt Kreis)
+luftdruck = LUFTDRUCK_NORMAL                                              # Normdruck 101325 Pa auf Meereshöhe (vorher fälschlich 1000 Pa)
+temperatur_celsis = 20
+dichte_Luft = luftdichte(temperatur_celsis, luftdruck)                    # ≈ 1,20 kg/m³
 
-windgeschwindigkeit = 4                                                   # Variiert stark
+anlage = 'Enercon E138 3500'                                              # Anlage aus dem Katalog in windkraft.py (wie renewables.ninja-Daten)
 
-# Entnommene Leistung aus dem Wind
-entnommene_Leistung_Wind = Leistungsbeiwert * 1/2 * dichte_Luft * rotorflaeche * windgeschwindigkeit**3   
+windgeschwindigkeit = np.arange(0, 31)                                    # Windgeschwindigkeiten in m/s (vektorisiert)
 
-# Einschalt- und Abschaltgeschwingkeit
-if windgeschwindigkeit < 3:
-    entnommene_Leistung_Wind = 0
-elif windgeschwindigkeit > 20:
-    entnommene_Leistung_Wind = 0
+# Entnommene Leistung aus dem Wind (Leistungskurve mit Ein-, Nenn- und Abschaltgeschwindigkeit)
+entnommene_Leistung_Wind = leistungskurve(windgeschwindigkeit, anlage, dichte_Luft)[0]
 
-print(entnommene_Leistung_Wind)
- 
+print(f"Luftdichte bei {temperatur_celsis} °C: {dichte_Luft:.3f} kg/m³")
+print(TURBINEN.loc[anlage])
+for v, P in zip(windgeschwindigkeit, entnommene_Leistung_Wind):
+    print(f"{v:>3d} m/s: {P:>8.1f} kW")
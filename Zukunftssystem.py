@@ -1,41 +1,24 @@
 """
 Zukunftssystem Gewächshaus-Modell mit PyPSA
-- Verwendet Gurobi als Optimizer
+- Solver über solver.py (Gurobi, ohne Lizenz HiGHS)
 - Heizlast aus heizlast_2019.csv
 - Strombedarf aus hourly_lamp_energy_2019.csv
 - COP Wärmepumpe aus heatpump_cop_2019.csv
 - Windkraftanlagen-Leistung aus Windanlage Leistungsdaten.csv
 """
 
-import pypsa
-import pandas as pd
-import numpy as np
+from daten_cache import lade_zeitreihen
+from netzwerk import ZukunftParameter, baue_zukunft
+from solver import optimiere
+from windkraft import p_max_pu_aus_leistung
 
 # ============================================================
 # 1. Daten einlesen
 # ============================================================
 
-# Heizlast einlesen
-df_heizlast = pd.read_csv('Abgabeordner Gruppe 9/heizlast_2019.csv', sep=',', encoding='utf-8')
-df_heizlast['datetime'] = pd.to_datetime(df_heizlast['MESS_DATUM'].astype(str), format='%Y%m%d%H')
-df_heizlast.set_index('datetime', inplace=True)
-
-# Strombedarf (Lampen) einlesen
-df_strombedarf = pd.read_csv('Abgabeordner Gruppe 9/hourly_lamp_energy_2019.csv', sep=';', encoding='utf-8')
-df_strombedarf['datetime'] = pd.to_datetime(df_strombedarf['DateTime'].astype(str), format='%Y%m%d%H')
-df_strombedarf.set_index('datetime', inplace=True)
-
-# COP Wärmepumpe einlesen
-df_cop = pd.read_csv('Abgabeordner Gruppe 9/heatpump_cop_2019.csv', sep=',', encoding='utf-8')
-df_cop['datetime'] = pd.to_datetime(df_cop['MESS_DATUM'].astype(str), format='%Y%m%d%H')
-df_cop.set_index('datetime', inplace=True)
-
-# Windkraftanlagen-Leistung einlesen
-df_wind = pd.read_csv('Abgabeordner Gruppe 9/Windanlage Leistungsdaten.csv', sep=';', encoding='utf-8', skiprows=4)
-df_wind = df_wind[['time', 'electricity']].copy()
-df_wind['datetime'] = pd.to_datetime(df_wind['time'])
-df_wind.set_index('datetime', inplace=True)
-df_wind = df_wind.rename(columns={'electricity': 'Wind_kW'})
+# Heizlast, Strombedarf (Lampen), COP Wärmepumpe und Windkraftanlagen-Leistung
+# einlesen (beim ersten Aufruf aus den CSV-Dateien, danach aus dem Cache)
+zeitreihen = lade_zeitreihen()
 
 # ============================================================
 # 2. Parameter definieren
@@ -67,24 +50,21 @@ netz_import_kosten = 0.1361     # €/kWh
 # 3. Daten vorbereiten
 # ============================================================
 
-# Gemeinsamen Zeitindex erstellen
-zeitindex = df_heizlast.index.intersection(df_strombedarf.index)
-zeitindex = zeitindex.intersection(df_cop.index)
-zeitindex = zeitindex.intersection(df_wind.index)
+# Gemeinsamer Zeitindex (bereits beim Laden abgeglichen)
+zeitindex = zeitreihen.index
 
 print(f"\n")
 print(f"Simulationszeitraum: {zeitindex[0]} bis {zeitindex[-1]}")
 print(f"Anzahl Zeitschritte: {len(zeitindex)}")
 
 # Zeitreihen auf Simulationszeitraum einschränken
-waermebedarf = df_heizlast.loc[zeitindex, 'Heizlast_kW']
-strombedarf = df_strombedarf.loc[zeitindex, 'Energy_kW']
-cop_zeitreihe = df_cop.loc[zeitindex, 'COP']
-windleistung = df_wind.loc[zeitindex, 'Wind_kW']
+waermebedarf = zeitreihen['Heizlast_kW']
+strombedarf = zeitreihen['Energy_kW']
+cop_zeitreihe = zeitreihen['COP']
+windleistung = zeitreihen['Wind_kW']
 
 # Zeitliche Verfügbarkeit der Windanlage (p_max_pu)
-wind_p_max_pu = windleistung / wind_nennleistung_vergleichsanlage
-wind_p_max_pu = wind_p_max_pu.clip(lower=0, upper=1)
+wind_p_max_pu = p_max_pu_aus_leistung(windleistung, wind_nennleistung_vergleichsanlage)
 
 # Datenübersicht
 print(f"\nMittlere Heizlast:      {waermebedarf.mean():.2f} kW")
@@ -98,72 +78,28 @@ print(f"\n")
 # 4. PyPSA-Netzwerk erstellen
 # ============================================================
 
-network = pypsa.Network()
-network.set_snapshots(zeitindex)
-
-# Busse
-network.add('Bus', name='Strom', carrier='strom')
-network.add('Bus', name='Waerme', carrier='waerme')
-
-
-# Lasten
-network.add('Load', name='Stromlast', bus='Strom', p_set=strombedarf)
-network.add('Load', name='Waermelast', bus='Waerme', p_set=waermebedarf)
-
-# Windkraftanlage -> Strom-Bus
-network.add('Generator',
-            name='Windkraftanlage',
-            bus='Strom',
-            p_nom_extendable=True,
-            p_max_pu=wind_p_max_pu,
-            capital_cost=capital_cost_wind,
-            lifetime=wind_lifetime,
-            carrier='wind')
-
-# Speichen für Windenergie
-network.add('Store',
-            name = 'Stromspeicher',
-            bus = 'Strom',
-            e_nom_extendable = True,
-            capital_cost = capital_cost_stromspeicher,
-            lifetime= stromspeicher_lifetime,
-            standing_loss = stromspeicher_standing_loss ,
-            e_cyclic = True)
-
-
-# Wärmepumpe (Strom -> Wärme) mit zeitabhängigem COP
-network.add('Link',
-            name='Waermepumpe',
-            bus0='Strom',
-            bus1='Waerme',
-            efficiency=cop_zeitreihe,
-            p_nom_extendable=True,
-            capital_cost=capital_cost_wp,
-            lifetime=wp_lifetime)
-
-# Wärmespeicher
-network.add('Store',
-            name='Waermespeicher',
-            bus='Waerme',
-            e_nom_extendable=True,
-            capital_cost=capital_cost_waermespeicher,
-            standing_loss=waermespeicher_standing_loss,
-            e_cyclic=True,
-            lifetime=waermespeicher_lifetime)
-
-# Netz-Import (Backup)
-network.add('Generator',
-            name='Netz_Import',
-            bus='Strom',
-            p_nom_extendable=True,
-            marginal_cost=netz_import_kosten,
-            carrier='grid')
+parameter = ZukunftParameter(
+    capital_cost_wind=capital_cost_wind,
+    wind_lifetime=wind_lifetime,
+    wind_nennleistung_vergleichsanlage=wind_nennleistung_vergleichsanlage,
+    capital_cost_stromspeicher=capital_cost_stromspeicher,
+    stromspeicher_lifetime=stromspeicher_lifetime,
+    stromspeicher_standing_loss=stromspeicher_standing_loss,
+    capital_cost_wp=capital_cost_wp,
+    wp_lifetime=wp_lifetime,
+    capital_cost_waermespeicher=capital_cost_waermespeicher,
+    waermespeicher_lifetime=waermespeicher_lifetime,
+    waermespeicher_standing_loss=waermespeicher_standing_loss,
+    netz_import_kosten=netz_import_kosten)
+
+# Busse, Lasten, Windkraftanlage, Strom-/Wärmespeicher, Wärmepumpe und Netz-Import (netzwerk.py)
+network = baue_zukunft(zeitreihen, parameter)
 
 # ============================================================
-# 5. Optimierung mit Gurobi
+# 5. Optimierung (solver.py: Gurobi, sonst HiGHS)
 # ============================================================
 
-network.optimize(solver_name='gurobi')
+optimiere(network)
 
 # ============================================================
 # 6. Ergebnisse ausgeben
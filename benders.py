@@ -0,0 +1,229 @@
+"""
+Benders-Zerlegung für die Auslegung des Zukunftssystems über viele Szenarien
+- Masterproblem: Ausbau von Windkraftanlage, Waermepumpe, Stromspeicher und
+  Waermespeicher (p_nom/e_nom) plus je Szenario eine Schätzung der
+  Betriebskosten (Multi-Cut)
+- Teilprobleme: stündlicher Betrieb je Szenario bei festem Ausbau (LP aus
+  zukunft_lp), parallel in Arbeitsprozessen; die Dualwerte der
+  Kapazitätsgrenzen liefern die Optimalitätsschnitte
+- Netzimport ist in den Teilproblemen unbeschränkt (keine Investitionskosten);
+  nicht gedeckte Wärme ist mit einer hohen Strafe zulässig, damit jedes
+  Teilproblem lösbar ist (im Optimum 0)
+- Abbruch, wenn die relative Lücke zwischen oberer und unterer Schranke
+  kleiner als `toleranz` ist
+- Szenariozeitreihen liegen einmal im Shared Memory; Speicherbedarf wächst
+  linear mit der Anzahl Szenarien (Zeitreihen + Schnitte), Teilprobleme
+  werden im Arbeitsprozess aufgebaut und wieder freigegeben
+
+Verwendung:
+    from benders import loese_benders
+    ergebnis = loese_benders({'2019': zeitreihen_2019, '2024': zeitreihen_2024}, toleranz=1e-3)
+    ergebnis.ausbau, ergebnis.verlauf
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from netzwerk import ZukunftParameter
+from zukunft_lp import ausbaukosten, betriebsteil
+
+# Ausbaugrößen des Masterproblems (Positionen in zukunft_lp.AUSBAU bzw. in den Zeilenblöcken von _betrieb)
+AUSBAU = ['p_nom_opt_Windkraftanlage', 'p_nom_opt_Waermepumpe', 'e_nom_opt_Stromspeicher', 'e_nom_opt_Waermespeicher']
+_AUSBAU_POSITION = [0, 2, 3, 4]
+SPALTEN = ['Heizlast_kW', 'Energy_kW', 'COP', 'Wind_kW']
+STRAFE_WAERME = 10.0                # €/kWh nicht gedeckte Wärme
+
+# Zustand je Arbeitsprozess (in _initialisiere gesetzt)
+_speicher = None
+_daten = None
+_grenzen = None
+_parameter = None
+_strafe = None
+
+
+@dataclass
+class BendersErgebnis:
+    '''Ausbau, Schranken und Konvergenzverlauf.'''
+    status: str
+    objective: float                # obere Schranke: Investition + erwarteter Betrieb in €/a
+    untere_schranke: float
+    ausbau: dict                    # inkl. p_nom_opt_Netz_Import = größter Netzbezug über alle Szenarien
+    betriebskosten: pd.Series       # je Szenario beim gewählten Ausbau
+    ungedeckte_waerme_kWh: pd.Series
+    verlauf: pd.DataFrame           # je Iteration: untere/obere Schranke, Lücke, Zeit
+
+
+def _teilproblem(zeitreihen: pd.DataFrame, p: ZukunftParameter, strafe: float) -> tuple:
+    # Betrieb bei festem Ausbau: A_ub·x <= M·ausbau (ohne Netzimport-Grenze), Wärmeschlupf mit Strafe
+    T = len(zeitreihen)
+    A_eq, b_eq, zeitteil, ausbauteil, c, untere = betriebsteil(zeitreihen, p)
+    schlupf = sp.vstack([sp.csr_matrix((T, T)), sp.identity(T), sp.csr_matrix((2 * T, T))])
+    A_eq = sp.hstack([A_eq, schlupf], format='csr')
+    zeilen = np.r_[0:T, 2 * T:5 * T]                 # Grenzen Wind, WP, SS-e, WS-e
+    A_ub = sp.hstack([zeitteil[zeilen], sp.csr_matrix((4 * T, T))], format='csr')
+    M = -ausbauteil[zeilen][:, _AUSBAU_POSITION]
+    c = np.concatenate([c, np.full(T, strafe)])
+    untere = np.concatenate([untere, np.zeros(T)])
+    bounds = np.column_stack([untere, np.full(len(untere), np.inf)])
+    return c, A_eq, b_eq, A_ub, M.tocsr(), bounds
+
+
+def _loese_teilproblem(zeitreihen: pd.DataFrame, ausbau: np.ndarray, p: ZukunftParameter, strafe: float) -> tuple:
+    # -> Betriebskosten, Subgradient nach dem Ausbau, ungedeckte Wärme, größter Netzbezug
+    T = len(zeitreihen)
+    c, A_eq, b_eq, A_ub, M, bounds = _teilproblem(zeitreihen, p, strafe)
+    loesung = linprog(c, A_ub=A_ub, b_ub=M @ ausbau, A_eq=A_eq, b_eq=b_eq, bounds=bounds, method='highs')
+    if not loesung.success:
+        raise RuntimeError(f"Teilproblem nicht lösbar: {loesung.message}")
+    gradient = M.T @ loesung.ineqlin.marginals
+    return float(loesung.fun), gradient, float(loesung.x[7 * T:].sum()), float(loesung.x[T:2 * T].max())
+
+
+def _initialisiere(name, form, grenzen, parameter, strafe):
+    global _speicher, _daten, _grenzen, _parameter, _strafe
+    _speicher = shared_memory.SharedMemory(name=name)
+    _daten = np.ndarray(form, dtype=np.float64, buffer=_speicher.buf)
+    _daten.flags.writeable = False
+    _grenzen, _parameter, _strafe = grenzen, parameter, strafe
+
+
+def _arbeite(aufgabe) -> tuple:
+    nummer, ausbau = aufgabe
+    von, bis = _grenzen[nummer]
+    zeitreihen = pd.DataFrame(_daten[von:bis], columns=SPALTEN)
+    return (nummer, *_loese_teilproblem(zeitreihen, ausbau, _parameter, _strafe))
+
+
+def _loese_master(kosten: np.ndarray, gewichte: np.ndarray, schnitte: list) -> tuple:
+    # min kosten·x + Σ π_s θ_s  mit  g_s·x - θ_s <= g_s·x_k - Q_s,  x, θ >= 0
+    n, S = len(kosten), len(gewichte)
+    zeilen, spalten, werte, rhs = [], [], [], []
+    for zeile, (s, Q, g, x_k) in enumerate(schnitte):
+        zeilen += [zeile] * (n + 1)
+        spalten += list(range(n)) + [n + s]
+        werte += list(g) + [-1.0]
+        rhs.append(float(g @ x_k) - Q)
+    A_ub = sp.csr_matrix((werte, (zeilen, spalten)), shape=(len(schnitte), n + S)) if schnitte else None
+    loesung = linprog(np.concatenate([kosten, gewichte]), A_ub=A_ub, b_ub=np.array(rhs) if schnitte else None,
+                      bounds=(0, None), method='highs')
+    if not loesung.success:
+        raise RuntimeError(f"Masterproblem nicht lösbar: {loesung.message}")
+    return loesung.x[:n], float(loesung.fun)
+
+
+def loese_benders(szenarien: dict, wahrscheinlichkeiten: dict = None, parameter: ZukunftParameter = None,
+                  toleranz: float = 1e-3, max_iterationen: int = 100, prozesse: int = None,
+                  strafe: float = STRAFE_WAERME, start_ausbau: dict = None,
+                  protokoll: bool = True) -> BendersErgebnis:
+    '''
+    Zweistufige Auslegung mit Benders-Zerlegung (Multi-Cut).
+
+    Parameter
+    ----------
+    szenarien : dict
+        Name -> Zeitreihen (Heizlast_kW, Energy_kW, COP, Wind_kW) eines Jahres/Szenarios
+    wahrscheinlichkeiten : dict
+        Name -> Gewicht (auf Summe 1 normiert; Standard: gleich gewichtet)
+    parameter : ZukunftParameter
+        Kosten und Verluste
+    toleranz : float
+        Abbruch bei (obere - untere Schranke) / obere Schranke <= toleranz
+    max_iterationen : int
+        Höchstzahl Iterationen
+    prozesse : int
+        Arbeitsprozesse für die Teilprobleme (Standard: alle Kerne)
+    strafe : float
+        Kosten nicht gedeckter Wärme in €/kWh
+    start_ausbau : dict
+        Startpunkt (Schlüssel wie AUSBAU, z.B. zukunft_lp.loese_zukunft(...).ausbau); Standard: kein Ausbau
+    protokoll : bool
+        Schranken je Iteration ausgeben
+
+    Returns
+    -------
+    BendersErgebnis
+    '''
+    parameter = parameter or ZukunftParameter()
+    namen = list(szenarien)
+    gewichte = pd.Series(wahrscheinlichkeiten if wahrscheinlichkeiten is not None
+                         else {name: 1.0 for name in namen}, dtype=float).reindex(namen)
+    if gewichte.isna().any() or (gewichte < 0).any() or gewichte.sum() <= 0:
+        raise ValueError("Wahrscheinlichkeiten müssen für alle Szenarien angegeben, >= 0 und nicht alle 0 sein.")
+    pi = (gewichte / gewichte.sum()).to_numpy()
+    kosten = ausbaukosten(parameter)[_AUSBAU_POSITION]
+
+    # alle Szenarien hintereinander in einem Shared-Memory-Block
+    laengen = np.array([len(szenarien[name]) for name in namen])
+    grenzen = list(zip(np.r_[0, np.cumsum(laengen)[:-1]], np.cumsum(laengen)))
+    speicher = shared_memory.SharedMemory(create=True, size=int(laengen.sum()) * len(SPALTEN) * 8)
+    daten = np.ndarray((int(laengen.sum()), len(SPALTEN)), dtype=np.float64, buffer=speicher.buf)
+    for name, (von, bis) in zip(namen, grenzen):
+        daten[von:bis] = szenarien[name][SPALTEN].to_numpy(dtype=np.float64)
+
+    ausbau = np.array([start_ausbau[name] for name in AUSBAU], dtype=float) if start_ausbau else np.zeros(len(AUSBAU))
+    schnitte, verlauf = [], []
+    beste = (np.inf, None, None)
+    untere = -np.inf
+    start = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(max_workers=prozesse or os.cpu_count(), initializer=_initialisiere,
+                                 initargs=(speicher.name, daten.shape, grenzen, parameter, strafe)) as pool:
+            for iteration in range(1, max_iterationen + 1):
+                Q, ungedeckt, netz = np.zeros(len(namen)), np.zeros(len(namen)), np.zeros(len(namen))
+                for s, wert, gradient, waerme, netz_max in pool.map(_arbeite, [(s, ausbau) for s in range(len(namen))]):
+                    Q[s], ungedeckt[s], netz[s] = wert, waerme, netz_max
+                    schnitte.append((s, wert, gradient, ausbau.copy()))
+
+                obere = float(kosten @ ausbau + pi @ Q)
+                if obere < beste[0]:
+                    beste = (obere, ausbau.copy(), (Q, ungedeckt, netz))
+                ausbau, untere = _loese_master(kosten, pi, schnitte)
+                luecke = (beste[0] - untere) / max(abs(beste[0]), 1e-9)
+                verlauf.append({'iteration': iteration, 'untere_schranke': untere, 'obere_schranke': beste[0],
+                                'luecke': luecke, 'zeit_s': time.perf_counter() - start})
+                if protokoll:
+                    print(f"Iteration {iteration:>3d}: untere {untere:>14,.0f}  obere {beste[0]:>14,.0f}  "
+                          f"Lücke {luecke:.2e}")
+                if luecke <= toleranz:
+                    break
+    finally:
+        speicher.close()
+        speicher.unlink()
+
+    obere, x, (Q, ungedeckt, netz) = beste
+    return BendersErgebnis(
+        status='ok' if verlauf[-1]['luecke'] <= toleranz else 'max_iterationen',
+        objective=obere,
+        untere_schranke=untere,
+        ausbau={**dict(zip(AUSBAU, x.tolist())), 'p_nom_opt_Netz_Import': float(netz.max())},
+        betriebskosten=pd.Series(Q, index=namen),
+        ungedeckte_waerme_kWh=pd.Series(ungedeckt, index=namen),
+        verlauf=pd.DataFrame(verlauf).set_index('iteration'),
+    )
+
+
+if __name__ == '__main__':
+    from daten_cache import lade_zeitreihen
+
+    zeitreihen = lade_zeitreihen()
+
+    # Beispiel: Wetterjahr 2019 mit skalierten Wind- und Heizlastreihen als Szenarien
+    rng = np.random.default_rng(0)
+    szenarien = {}
+    for k in range(8):
+        szenario = zeitreihen.copy()
+        szenario['Wind_kW'] = (szenario['Wind_kW'] * rng.uniform(0.8, 1.2)).clip(upper=6000)
+        szenario['Heizlast_kW'] *= rng.uniform(0.9, 1.1)
+        szenarien[f'Szenario {k}'] = szenario
+
+    ergebnis = loese_benders(szenarien, toleranz=1e-3)
+    print({k: round(v, 1) for k, v in ergebnis.ausbau.items()})
+    print(f"Gesamtkosten {ergebnis.objective:,.0f} €/a, {len(ergebnis.verlauf)} Iterationen")
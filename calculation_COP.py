@@ -1,54 +1,184 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-
-# Temperaturdaten Köln einlesen (CSV mit allen Jahren) und nur 2019 filtern
-df_data_temp = pd.read_csv('Temperatur Köln.csv', sep=';')
-df_data_temp['MESS_DATUM'] = df_data_temp['MESS_DATUM'].astype(str)
-df_data_temp = df_data_temp[df_data_temp['MESS_DATUM'].str.startswith('2019')]
-df_data_temp = df_data_temp.reset_index(drop=True)
 
 # Parameter
 T_senke = 35 + 273.15          # Vorlauftemperatur Wärmepumpe in Kelvin (z.B. 35°C Fußbodenheizung)
 eta_carnot = 0.5               # Gütegrad / Carnot-Wirkungsgrad (typisch 0.4-0.6)
 
-# Außentemperatur als Quelltemperatur
-T_a_celsius = df_data_temp['TT_TU']    # Werte sind bereits in °C
-T_quelle = T_a_celsius + 273.15         # Umrechnung in Kelvin
-
-# Stündliche COP-Berechnung
-# COP = eta_carnot * T_senke / (T_senke - T_quelle)
-delta_T = T_senke - T_quelle
-delta_T[delta_T <= 0] = np.nan          # Vermeidung Division durch 0 (wenn T_außen >= T_senke)
-
-COP = eta_carnot * T_senke / delta_T
-COP = COP.clip(upper=10)               # COP auf max 10 begrenzen (realistische Obergrenze)
-COP = COP.fillna(10)                   # NaN (T_außen >= T_senke) mit 10 füllen - keine Heizung nötig
-
-# Ergebnisse ausgeben
-print(f"Anzahl Stunden 2019: {len(COP)}")
-print(f"Mittlerer COP: {COP.mean():.2f}")
-print(f"Minimaler COP: {COP.min():.2f}")
-print(f"Maximaler COP: {COP.max():.2f}")
-
-# COP als CSV exportieren
-df_result = pd.DataFrame({
-    'MESS_DATUM': df_data_temp['MESS_DATUM'],
-    'T_aussen_C': T_a_celsius,
-    'COP': COP
-})
-df_result.to_csv('heatpump_cop_2019.csv', index=False)
-print("COP-Daten exportiert nach: heatpump_cop_2019.csv")
-
-# Graph erstellen
-plt.figure(figsize=(12, 5))
-plt.plot(COP.values, linewidth=0.5)
-plt.xlabel("Stunde des Jahres")
-plt.ylabel("COP")
-plt.title("Stündlicher COP der Wärmepumpe – Köln 2019")
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+
+# Wertebereich der COP-Tabelle (Quelltemperatur in °C, Auflösung der DWD-Daten)
+T_QUELLE_MIN = -40.0
+T_QUELLE_MAX = 50.0
+T_QUELLE_SCHRITT = 0.1
+COP_MAX = 10
+
+
+def _cop_formel(T_quelle_celsius, T_senke, eta_carnot):
+    # COP = eta_carnot * T_senke / (T_senke - T_quelle)
+    T_quelle = np.asarray(T_quelle_celsius, dtype=float) + 273.15
+    delta_T = T_senke - T_quelle
+    with np.errstate(divide='ignore', invalid='ignore'):
+        COP = eta_carnot * T_senke / np.where(delta_T > 0, delta_T, np.nan)
+    COP = np.minimum(COP, COP_MAX)             # COP auf max 10 begrenzen (realistische Obergrenze)
+    return np.where(np.isnan(COP), COP_MAX, COP)  # T_außen >= T_senke (und fehlende Werte) -> 10
+
+
+_T_QUELLE_RASTER = np.round(np.arange(T_QUELLE_MIN, T_QUELLE_MAX + T_QUELLE_SCHRITT / 2, T_QUELLE_SCHRITT), 1)
+_tabellen = {}
+
+
+def cop_tabelle(T_senke: float = T_senke, eta_carnot: float = eta_carnot) -> np.ndarray:
+    '''
+    COP-Tabelle über die Quelltemperatur für eine Senkentemperatur und einen Gütegrad.
+
+    Die Tabelle wird beim ersten Aufruf berechnet und danach wiederverwendet.
+
+    Returns
+    -------
+    np.ndarray
+        COP für jede Quelltemperatur von T_QUELLE_MIN bis T_QUELLE_MAX in Schritten von 0,1 K
+    '''
+    schluessel = (float(T_senke), float(eta_carnot))
+    if schluessel not in _tabellen:
+        _tabellen[schluessel] = _cop_formel(_T_QUELLE_RASTER, *schluessel)
+    return _tabellen[schluessel]
+
+
+def cop_flaeche(T_senke_werte, eta_werte) -> np.ndarray:
+    '''
+    2-D-Tabelle COP(Senkentemperatur, Quelltemperatur) je Gütegrad.
+
+    Returns
+    -------
+    np.ndarray
+        Form (Gütegrade x Senkentemperaturen x Quelltemperaturen)
+    '''
+    return np.stack([np.stack([cop_tabelle(T_s, eta) for T_s in np.atleast_1d(T_senke_werte)])
+                     for eta in np.atleast_1d(eta_werte)])
+
+
+def _tabellen_index(T_a_celsius: np.ndarray):
+    # Position in der Tabelle und Maske der Werte, die exakt auf dem Raster liegen
+    position = np.rint((T_a_celsius - T_QUELLE_MIN) / T_QUELLE_SCHRITT)
+    im_bereich = (position >= 0) & (position < len(_T_QUELLE_RASTER))
+    position = np.where(im_bereich, position, 0).astype(np.intp)
+    auf_raster = im_bereich & (np.abs(_T_QUELLE_RASTER[position] - T_a_celsius) < 1e-9)
+    return position, auf_raster
+
+
+def berechne_cop_matrix(T_a_celsius, T_senke_werte=T_senke, eta_werte=eta_carnot) -> np.ndarray:
+    '''
+    COP für viele Senkentemperaturen, Gütegrade und Wetterjahre per Tabellenzugriff.
+
+    Werte außerhalb der Tabelle (oder nicht auf dem 0,1-K-Raster) werden direkt
+    mit der Carnot-Formel berechnet, das Ergebnis ist also identisch zur Formel.
+
+    Parameter
+    ----------
+    T_a_celsius : array
+        Außentemperatur in °C, beliebige Form (z.B. Stunden oder Jahre x Stunden)
+    T_senke_werte : float oder array
+        Vorlauftemperaturen in Kelvin
+    eta_werte : float oder array
+        Gütegrade
+
+    Returns
+    -------
+    np.ndarray
+        COP, Form (Gütegrade x Senkentemperaturen x Form von T_a_celsius)
+    '''
+    T_a_celsius = np.asarray(T_a_celsius, dtype=float)
+    T_senke_werte = np.atleast_1d(T_senke_werte)
+    eta_werte = np.atleast_1d(eta_werte)
+
+    position, auf_raster = _tabellen_index(T_a_celsius)
+    tabelle = cop_flaeche(T_senke_werte, eta_werte)
+    COP = tabelle[:, :, position]
+
+    if not auf_raster.all():
+        T_rest = T_a_celsius[~auf_raster]
+        for i, eta in enumerate(eta_werte):
+            for j, T_s in enumerate(T_senke_werte):
+                COP[i, j][~auf_raster] = _cop_formel(T_rest, T_s, eta)
+    return COP
+
+
+def berechne_cop(T_a_celsius: pd.Series, T_senke: float = T_senke,
+                 eta_carnot: float = eta_carnot) -> pd.Series:
+    '''
+    Stündlicher Carnot-basierter COP der Wärmepumpe.
+
+    Parameter
+    ----------
+    T_a_celsius : pd.Series
+        Außentemperatur (Quelltemperatur) in °C
+    T_senke : float
+        Vorlauftemperatur in Kelvin
+    eta_carnot : float
+        Gütegrad
+
+    Returns
+    -------
+    pd.Series
+        COP, auf 10 begrenzt; T_außen >= T_senke ergibt 10
+    '''
+    COP = berechne_cop_matrix(T_a_celsius.to_numpy(), T_senke, eta_carnot)[0, 0]
+    return pd.Series(COP, index=T_a_celsius.index)
+
+
+def berechne_cop_jahre(wetter, jahre, T_senke_werte=T_senke, eta_werte=eta_carnot) -> dict:
+    '''
+    COP-Matrizen für mehrere Wetterjahre aus einem Wetterspeicher (wetter_speicher.py).
+
+    Returns
+    -------
+    dict
+        Jahr -> COP der Form (Gütegrade x Senkentemperaturen x Stunden des Jahres)
+    '''
+    return {jahr: berechne_cop_matrix(wetter.jahr(jahr, 'TT_TU'),
+                                      T_senke_werte, eta_werte)
+            for jahr in jahre}
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    # Temperaturdaten Köln einlesen (CSV mit allen Jahren) und nur 2019 filtern
+    df_data_temp = pd.read_csv('Temperatur Köln.csv', sep=';')
+    df_data_temp['MESS_DATUM'] = df_data_temp['MESS_DATUM'].astype(str)
+    df_data_temp = df_data_temp[df_data_temp['MESS_DATUM'].str.startswith('2019')]
+    df_data_temp = df_data_temp.reset_index(drop=True)
+
+    # Außentemperatur als Quelltemperatur
+    T_a_celsius = df_data_temp['TT_TU']    # Werte sind bereits in °C
+
+    # Stündliche COP-Berechnung
+    COP = berechne_cop(T_a_celsius)
+
+    # Ergebnisse ausgeben
+    print(f"Anzahl Stunden 2019: {len(COP)}")
+    print(f"Mittlerer COP: {COP.mean():.2f}")
+    print(f"Minimaler COP: {COP.min():.2f}")
+    print(f"Maximaler COP: {COP.max():.2f}")
+
+    # COP als CSV exportieren
+    df_result = pd.DataFrame({
+        'MESS_DATUM': df_data_temp['MESS_DATUM'],
+        'T_aussen_C': T_a_celsius,
+        'COP': COP
+    })
+    df_result.to_csv('heatpump_cop_2019.csv', index=False)
+    print("COP-Daten exportiert nach: heatpump_cop_2019.csv")
+
+    # Graph erstellen
+    plt.figure(figsize=(12, 5))
+    plt.plot(COP.values, linewidth=0.5)
+    plt.xlabel("Stunde des Jahres")
+    plt.ylabel("COP")
+    plt.title("Stündlicher COP der Wärmepumpe – Köln 2019")
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
 
 # Referenzen
 # [4] Destatis, "Erdgas - und Strom - Durchschnittspreise," Destatis.de. [Online]. Verfügbar unter: https://www.destatis.de/DE/Themen/Wirtschaft/Preise/Erdgas-Strom-DurchschnittsPreise/_inhalt.html . [Zugriff am: 16-02-2026]
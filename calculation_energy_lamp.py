@@ -4,8 +4,9 @@
 
 import math
 import csv
-from datetime import datetime, timedelta
-from collections import defaultdict
+
+import numpy as np
+import pandas as pd
 
 # Leistungsaufnahme einer Lampe in Watt für 1,44 m^2 (120cm * 120cm)
 leistungsaufnahme_einzeln = 632  # W
@@ -14,15 +15,6 @@ abdeckungsflaeche_einzeln = 2.5  # m²
 # Größe des Gewächshauses
 flaeche = 10000  # m² (1 Hektar)
 
-# Anzahl der Lampen, aufgerundet auf die nächste ganze Zahl
-anzahl_lampen = math.ceil(flaeche / abdeckungsflaeche_einzeln)
-
-# Energieverbrauch gesamtes Gewächshaus pro Stunde in Watt
-energieverbrauch_gesamt_stunde = anzahl_lampen * leistungsaufnahme_einzeln
-
-print(f"Anzahl Lampen: {anzahl_lampen}")
-print(f"Energieverbrauch pro Stunde (wenn alle an): {energieverbrauch_gesamt_stunde} W")
-
 # Schwellwert für ausreichende Solareinstrahlung
 SOLAR_THRESHOLD = 100  # W/m²
 
@@ -30,83 +22,186 @@ SOLAR_THRESHOLD = 100  # W/m²
 LIGHT_START_HOUR = 6
 LIGHT_END_HOUR = 20
 
-# Solareinstrahlung einlesen aus bereinigter CSV
-# Diese Datei wurde mit prepare_solar_data.py erstellt
-# und enthält bereits die kombinierten Daten aus Bochum und Bremen
-solar_data = {}
-with open('Solareinstrahlung_Bochum_Bremen.csv', 'r', encoding='utf-8') as f:
-    # Erste Zeile überspringen (Header)
-    next(f)
-    for line in f:
-        parts = line.strip().split(';')
-        if len(parts) < 2:
-            continue
-        
-        # Datum im Format YYYYMMDDHH
-        datum_str = parts[0]
-        try:
-            timestamp = datetime.strptime(datum_str, '%Y%m%d%H')
-            
-            # Solar_W_m2 Wert (bereits in W/m² umgerechnet)
-            solar_w_m2 = float(parts[1].replace(',', '.'))
-            
-            solar_data[timestamp] = solar_w_m2
-        except (ValueError, IndexError):
-            continue
-
-print(f"Solareinstrahlung-Daten geladen: {len(solar_data)} Stunden")
-
-# Stündliche Energieverbrauchsdaten berechnen
-results = []
-
-# Für jede Stunde des Jahres 2019
-start_date = datetime(2019, 1, 1, 0, 0, 0)
-end_date = datetime(2020, 1, 1, 0, 0, 0)
-
-current_time = start_date
-
-while current_time < end_date:
-    # Stunde des Tages (0-23)
-    hour_of_day = current_time.hour
-    
-    # Prüfen, ob wir im Lichtzeitfenster sind (6:00 - 20:00 Uhr)
-    if LIGHT_START_HOUR <= hour_of_day < LIGHT_END_HOUR:
-        # Im Lichtzeitfenster: Prüfe Solareinstrahlung
-        solar_radiation = solar_data.get(current_time, 0)
-        
-        if solar_radiation < SOLAR_THRESHOLD:
-            # Nicht genug Sonnenlicht > Lampen an
-            energy_kw = energieverbrauch_gesamt_stunde / 1000
-        else:
-            # Genug Sonnenlicht > Lampen aus
-            energy_kw = 0
-    else:
-        # Außerhalb des Lichtzeitfensters > Lampen aus
-        energy_kw = 0
-    
-    # Datum/Uhrzeit-Format: YYYYMMDDHH
-    timestamp = current_time.strftime('%Y%m%d%H')
-    results.append([timestamp, round(energy_kw, 2)])
-    
-    # Zur nächsten Stunde
-    current_time += timedelta(hours=1)
-
-# Ergebnisse in CSV-Datei schreiben
-output_file = 'hourly_lamp_energy_2019.csv'
-with open(output_file, 'w', newline='', encoding='utf-8') as f:
-    writer = csv.writer(f, delimiter=';')
-    writer.writerow(['DateTime', 'Energy_kW'])
-    writer.writerows(results)
-
-print(f"\nErgebnisse gespeichert in: {output_file}")
-print(f"Anzahl Datensätze: {len(results)}")
-
-# Statistik berechnen
-total_lamp_hours = sum(1 for r in results if r[1] > 0)
-total_energy_kwh = sum(r[1] for r in results)  # bereits in kW, Summe ergibt kWh
-
-print(f"\nStatistik für 2019:")
-print(f"Gesamte Stunden mit Lampenbetrieb: {total_lamp_hours}")
-print(f"Gesamter Energieverbrauch: {total_energy_kwh:.2f} kWh")
-
 
+def lampenleistung_gesamt(flaeche: float = flaeche,
+                          leistungsaufnahme_einzeln: float = leistungsaufnahme_einzeln,
+                          abdeckungsflaeche_einzeln: float = abdeckungsflaeche_einzeln):
+    '''
+    Anzahl Lampen und Leistung aller Lampen zusammen.
+
+    Returns
+    -------
+    tuple
+        (Anzahl Lampen, Energieverbrauch pro Stunde in W wenn alle an sind)
+    '''
+    # Anzahl der Lampen, aufgerundet auf die nächste ganze Zahl
+    anzahl_lampen = math.ceil(flaeche / abdeckungsflaeche_einzeln)
+
+    # Energieverbrauch gesamtes Gewächshaus pro Stunde in Watt
+    return anzahl_lampen, anzahl_lampen * leistungsaufnahme_einzeln
+
+
+def berechne_lampenenergie_matrix(solar, zeitindex: pd.DatetimeIndex,
+                                  flaeche=flaeche,
+                                  leistungsaufnahme_einzeln=leistungsaufnahme_einzeln,
+                                  abdeckungsflaeche_einzeln=abdeckungsflaeche_einzeln,
+                                  solar_schwelle=SOLAR_THRESHOLD,
+                                  licht_start=LIGHT_START_HOUR,
+                                  licht_ende=LIGHT_END_HOUR) -> np.ndarray:
+    '''
+    Stündliche Lampenleistung für viele Beleuchtungsstrategien in einem Aufruf.
+
+    Alle Strategie-Parameter dürfen Skalare oder 1-D-Arrays gleicher Länge
+    (Anzahl Strategien) sein. Der Zeitindex kann beliebige Jahre umfassen.
+
+    Parameter
+    ----------
+    solar : array
+        Solareinstrahlung in W/m² passend zum Zeitindex (NaN = 0)
+    zeitindex : pd.DatetimeIndex
+        Stündlicher Zeitindex
+    flaeche, leistungsaufnahme_einzeln, abdeckungsflaeche_einzeln : float oder array
+        Gewächshausfläche und Lampendaten je Strategie
+    solar_schwelle : float oder array
+        Unterhalb dieser Einstrahlung (W/m²) sind die Lampen an
+    licht_start, licht_ende : int oder array
+        Lichtzeitfenster [licht_start, licht_ende) in Stunden
+
+    Returns
+    -------
+    np.ndarray
+        Leistung in kW, Form (Strategien x Stunden)
+    '''
+    solar = np.nan_to_num(np.asarray(solar, dtype=float), nan=0.0)
+    if len(solar) != len(zeitindex):
+        raise ValueError("Solardaten und Zeitindex haben unterschiedliche Länge.")
+
+    flaeche, leistungsaufnahme_einzeln, abdeckungsflaeche_einzeln, solar_schwelle, licht_start, licht_ende = (
+        np.atleast_1d(np.asarray(p, dtype=float))[:, None]
+        for p in np.broadcast_arrays(flaeche, leistungsaufnahme_einzeln, abdeckungsflaeche_einzeln,
+                                     solar_schwelle, licht_start, licht_ende))
+
+    # Leistung aller Lampen in kW (Anzahl Lampen aufgerundet)
+    anzahl_lampen = np.ceil(flaeche / abdeckungsflaeche_einzeln)
+    leistung_kw = np.round(anzahl_lampen * leistungsaufnahme_einzeln / 1000, 2)
+
+    # Lampen an: im Lichtzeitfenster und nicht genug Sonnenlicht
+    stunde = zeitindex.hour.to_numpy()
+    an = (licht_start <= stunde) & (stunde < licht_ende) & (solar < solar_schwelle)
+    return np.where(an, leistung_kw, 0.0)
+
+
+def berechne_lampenenergie(solar, jahr: int = 2019,
+                           flaeche: float = flaeche,
+                           leistungsaufnahme_einzeln: float = leistungsaufnahme_einzeln,
+                           abdeckungsflaeche_einzeln: float = abdeckungsflaeche_einzeln,
+                           solar_schwelle: float = SOLAR_THRESHOLD,
+                           licht_start: int = LIGHT_START_HOUR,
+                           licht_ende: int = LIGHT_END_HOUR) -> pd.Series:
+    '''
+    Stündlicher Energieverbrauch der Lampen eines Jahres in kW.
+
+    Parameter
+    ----------
+    solar : array
+        Solareinstrahlung in W/m² für jede Stunde des Jahres (NaN = 0)
+    jahr : int
+        Kalenderjahr
+    flaeche, leistungsaufnahme_einzeln, abdeckungsflaeche_einzeln : float
+        Gewächshausfläche und Lampendaten
+    solar_schwelle : float
+        Unterhalb dieser Einstrahlung (W/m²) sind die Lampen an
+    licht_start, licht_ende : int
+        Lichtzeitfenster [licht_start, licht_ende) in Stunden
+
+    Returns
+    -------
+    pd.Series
+        Energy_kW mit stündlichem Datetime-Index
+    '''
+    zeitindex = jahres_zeitindex(jahr)
+    leistung = berechne_lampenenergie_matrix(
+        solar, zeitindex, flaeche, leistungsaufnahme_einzeln, abdeckungsflaeche_einzeln,
+        solar_schwelle, licht_start, licht_ende)
+    return pd.Series(leistung[0], index=zeitindex, name='Energy_kW')
+
+
+def berechne_lampenenergie_strategien(solar: pd.Series, strategien: pd.DataFrame) -> pd.DataFrame:
+    '''
+    Lampenleistung für eine Tabelle von Beleuchtungsstrategien.
+
+    Parameter
+    ----------
+    solar : pd.Series
+        Solareinstrahlung in W/m² mit stündlichem Datetime-Index (beliebige Jahre)
+    strategien : pd.DataFrame
+        Eine Zeile je Strategie, Spalten aus flaeche, leistungsaufnahme_einzeln,
+        abdeckungsflaeche_einzeln, solar_schwelle, licht_start, licht_ende
+        (fehlende Spalten: Standardwerte oben)
+
+    Returns
+    -------
+    pd.DataFrame
+        Leistung in kW, Zeilen = Stunden, Spalten = Strategien (Index der Tabelle)
+    '''
+    parameter = {spalte: strategien[spalte].to_numpy(dtype=float) for spalte in strategien.columns}
+    leistung = berechne_lampenenergie_matrix(solar.to_numpy(), solar.index, **parameter)
+    leistung = np.broadcast_to(leistung, (len(strategien), len(solar)))
+    return pd.DataFrame(leistung.T, index=solar.index, columns=strategien.index)
+
+
+def strategie_raster(**parameter) -> pd.DataFrame:
+    '''
+    Alle Kombinationen der angegebenen Parameterwerte als Strategietabelle.
+
+    Beispiel: strategie_raster(solar_schwelle=[50, 100, 150], licht_start=[5, 6]) -> 6 Strategien
+    '''
+    index = pd.MultiIndex.from_product(list(parameter.values()), names=list(parameter))
+    return index.to_frame(index=False)
+
+
+def jahres_zeitindex(*jahre: int) -> pd.DatetimeIndex:
+    '''Stündlicher Zeitindex über ein oder mehrere Kalenderjahre.'''
+    return pd.DatetimeIndex(np.concatenate([
+        pd.date_range(f'{jahr}-01-01', f'{jahr + 1}-01-01', freq='h', inclusive='left').to_numpy()
+        for jahr in jahre]))
+
+
+if __name__ == '__main__':
+    from wetter_speicher import oeffne_wetter_speicher
+
+    anzahl_lampen, energieverbrauch_gesamt_stunde = lampenleistung_gesamt()
+    print(f"Anzahl Lampen: {anzahl_lampen}")
+    print(f"Energieverbrauch pro Stunde (wenn alle an): {energieverbrauch_gesamt_stunde} W")
+
+    # Solareinstrahlung einlesen aus bereinigter CSV
+    # Diese Datei wurde mit prepare_solar_data.py erstellt
+    # und enthält bereits die kombinierten Daten aus Bochum und Bremen
+    # Das Jahr 2019 ist ein Slice auf dem memory-mapped Wetterspeicher;
+    # fehlende Stunden (NaN) zählen wie bisher als 0 W/m²
+    wetter_solar = oeffne_wetter_speicher('Solareinstrahlung_Bochum_Bremen.csv', datum_spalte='DateTime')
+    solar_2019 = wetter_solar.jahr(2019, 'Solar_W_m2')
+
+    print(f"Solareinstrahlung-Daten geladen: {len(solar_2019)} Stunden")
+
+    energie = berechne_lampenenergie(solar_2019, 2019)
+    # Lampen aus wie bisher als 0 (nicht 0.0) schreiben
+    results = [[t.strftime('%Y%m%d%H'), e if e > 0 else 0] for t, e in energie.items()]
+
+    # Ergebnisse in CSV-Datei schreiben
+    output_file = 'hourly_lamp_energy_2019.csv'
+    with open(output_file, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, delimiter=';')
+        writer.writerow(['DateTime', 'Energy_kW'])
+        writer.writerows(results)
+
+    print(f"\nErgebnisse gespeichert in: {output_file}")
+    print(f"Anzahl Datensätze: {len(results)}")
+
+    # Statistik berechnen
+    total_lamp_hours = sum(1 for r in results if r[1] > 0)
+    total_energy_kwh = sum(r[1] for r in results)  # bereits in kW, Summe ergibt kWh
+
+    print(f"\nStatistik für 2019:")
+    print(f"Gesamte Stunden mit Lampenbetrieb: {total_lamp_hours}")
+    print(f"Gesamter Energieverbrauch: {total_energy_kwh:.2f} kWh")
@@ -1,24 +1,11 @@
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-import math
 
 # ============================================================
 # Gewächshaus-Parameter
 # ============================================================
 A_grund = 10000                 # Grundfläche in m²
 hoehe = 4.5                     # Höhe in m
-V = A_grund * hoehe             # Luftvolumen in m³ (= 4500 m³)
-
-# Hüllfläche berechnen (Dach + 4 Wände, quadratisch angenommen)
-seite = math.sqrt(A_grund)      # Seitenlänge ≈ 31.6 m
-A_wand = 4 * seite * hoehe      # Wandfläche
-A_dach = A_grund                # Dachfläche ≈ Grundfläche
-A_huell = A_wand + A_dach       # Gesamte Hüllfläche ≈ 1569 m²
-
-print(f"Grundfläche: {A_grund} m²")
-print(f"Volumen: {V} m³")
-print(f"Hüllfläche: {A_huell:.0f} m² (Dach: {A_dach:.0f} + Wände: {A_wand:.0f})")
 
 # Thermische Parameter
 U = 4.0                         # U-Wert in W/(m²·K) - typisch Gewächshaus
@@ -27,83 +14,213 @@ n = 0.5                         # LuftwechselratUe in 1/h
 cp_luft = 0.33333               # Spez. Wärmekapazität Luft in Wh/(K·m³)
 eta_solar = 0.8                 # Solarer Transmissionsgrad (0.75-0.9)
 
-# ============================================================
-# Temperaturdaten Köln einlesen – nur 2019
-# ============================================================
-df_temp = pd.read_csv('Temperatur Köln.csv', sep=';')
-df_temp['MESS_DATUM'] = df_temp['MESS_DATUM'].astype(str)
-df_temp = df_temp[df_temp['MESS_DATUM'].str.startswith('2019')]
-df_temp = df_temp.reset_index(drop=True)
-
-T_a = df_temp['TT_TU'].values   # Außentemperatur in °C
-
-print(f"Temperaturdaten 2019: {len(T_a)} Stunden")
-
-# ============================================================
-# Solardaten Bochum/Bremen einlesen – nur 2019
-# Solar_W_m2 = Globalstrahlung bereits in W/m² (bereinigt)
-# ============================================================
-df_solar = pd.read_csv('Solareinstrahlung_Bochum_Bremen.csv', sep=';')
-df_solar.columns = df_solar.columns.str.strip()
-df_solar['DateTime'] = df_solar['DateTime'].astype(str)
-df_solar = df_solar[df_solar['DateTime'].str.startswith('2019')]
-df_solar = df_solar.reset_index(drop=True)
-
-# Globalstrahlung (bereits in W/m² und bereinigt)
-G_solar = df_solar['Solar_W_m2'].values.astype(float)
-
-print(f"Solardaten 2019: {len(G_solar)} Stunden")
-
-# Sicherstellen, dass beide Zeitreihen gleich lang sind
-n_hours = min(len(T_a), len(G_solar))
-T_a = T_a[:n_hours]
-G_solar = G_solar[:n_hours]
-
-# ============================================================
-# Stündliche Heizlastberechnung
-# ============================================================
-Q_dot = []
-
-for t in range(n_hours):
-    # Transmissionswärmeverlust: Q = U × A × ΔT
-    Q_trans = U * A_huell * (T_i - T_a[t])    # in W
-
-    # Lüftungswärmeverlust: Q = V × n × cp × ΔT
-    Q_luft = V * n * cp_luft * (T_i - T_a[t])  # in W
-
-    # Solare Gewinne durch Dachfläche
-    Q_solar = G_solar[t] * A_dach * eta_solar   # in W
-
-    # Netto-Heizlast in kW
-    Q = (Q_trans + Q_luft - Q_solar) / 1000
-    Q_dot.append(max(Q, 0))  # keine negativen Werte (= keine Kühlung)
-
-Q_dot = np.array(Q_dot)
-
-# ============================================================
-# Ergebnisse ausgeben
-# ============================================================
-print(f"\n--- Ergebnisse Heizlast 2019 ---")
-print(f"Maximale Heizlast: {Q_dot.max():.1f} kW")
-print(f"Mittlere Heizlast: {Q_dot.mean():.1f} kW")
-print(f"Gesamter Heizenergiebedarf: {Q_dot.sum():.0f} kWh/a")
-print(f"Stunden ohne Heizbedarf: {(Q_dot == 0).sum()}")
-
-# CSV exportieren
-df_result = pd.DataFrame({
-    'MESS_DATUM': df_temp['MESS_DATUM'].values[:n_hours],
-    'T_aussen_C': T_a,
-    'Heizlast_kW': Q_dot
-})
-df_result.to_csv('heizlast_2019.csv', index=False)
-print(f"Exportiert nach: heizlast_2019.csv")
-
-# Graph erstellen
-plt.figure(figsize=(12, 5))
-plt.plot(Q_dot, linewidth=0.5, color='crimson')
-plt.xlabel("Stunde des Jahres")
-plt.ylabel("Heizlast [kW]")
-plt.title("Stündliche Heizlast Gewächshaus – Köln 2019")
-plt.grid(True, alpha=0.3)
-plt.tight_layout()
-plt.show()
+JAHR = 2019
+
+
+def geometrie(A_grund: float = A_grund, hoehe: float = hoehe) -> dict:
+    '''
+    Volumen und Hüllfläche des Gewächshauses (Dach + 4 Wände, quadratisch angenommen).
+
+    Returns
+    -------
+    dict
+        V, A_wand, A_dach, A_huell
+    '''
+    V = A_grund * hoehe             # Luftvolumen in m³
+    seite = np.sqrt(A_grund)        # Seitenlänge
+    A_wand = 4 * seite * hoehe      # Wandfläche
+    A_dach = A_grund                # Dachfläche ≈ Grundfläche
+    A_huell = A_wand + A_dach       # Gesamte Hüllfläche
+    return {'V': V, 'A_wand': A_wand, 'A_dach': A_dach, 'A_huell': A_huell}
+
+
+def berechne_heizlast_matrix(T_a, G_solar, A_grund=A_grund, hoehe=hoehe, U=U, T_i=T_i,
+                             n=n, eta_solar=eta_solar, cp_luft=cp_luft) -> np.ndarray:
+    '''
+    Stündliche Heizlast für viele Gewächshaus-Entwürfe in einem Aufruf.
+
+    Alle Parameter dürfen Skalare oder 1-D-Arrays gleicher Länge (Anzahl
+    Entwürfe) sein; sie werden gegeneinander gebroadcastet. Die Zeitreihen
+    gelten für alle Entwürfe gemeinsam.
+
+    Parameter
+    ----------
+    T_a : array
+        Außentemperatur in °C (Stunden)
+    G_solar : array
+        Globalstrahlung in W/m² (Stunden)
+    A_grund, hoehe, U, T_i, n, eta_solar, cp_luft : float oder array
+        Gewächshaus- und thermische Parameter je Entwurf
+
+    Returns
+    -------
+    np.ndarray
+        Heizlast in kW, Form (Entwürfe x Stunden), negative Werte auf 0 gesetzt
+    '''
+    T_a = np.asarray(T_a, dtype=float)
+    G_solar = np.asarray(G_solar, dtype=float)
+    n_hours = min(len(T_a), len(G_solar))
+    T_a, G_solar = T_a[:n_hours], G_solar[:n_hours]
+
+    A_grund, hoehe, U, T_i, n, eta_solar, cp_luft = (
+        np.atleast_1d(np.asarray(p, dtype=float))[:, None]
+        for p in np.broadcast_arrays(A_grund, hoehe, U, T_i, n, eta_solar, cp_luft))
+    geo = geometrie(A_grund, hoehe)
+
+    delta_T = T_i - T_a                                   # (Entwürfe x Stunden)
+
+    # Transmissions- und Lüftungswärmeverlust, solare Gewinne durch Dachfläche (in W)
+    Q = U * geo['A_huell'] * delta_T
+    Q += geo['V'] * n * cp_luft * delta_T
+    Q -= G_solar * geo['A_dach'] * eta_solar
+
+    # Netto-Heizlast in kW, keine negativen Werte (= keine Kühlung)
+    Q /= 1000
+    np.maximum(Q, 0, out=Q)
+    return Q
+
+
+def berechne_heizlast(T_a, G_solar, A_grund: float = A_grund, hoehe: float = hoehe,
+                      U: float = U, T_i: float = T_i, n: float = n,
+                      eta_solar: float = eta_solar, cp_luft: float = cp_luft) -> np.ndarray:
+    '''
+    Stündliche Heizlast (stationäre Bilanz) eines Entwurfs in kW.
+
+    Parameter
+    ----------
+    T_a : array
+        Außentemperatur in °C
+    G_solar : array
+        Globalstrahlung in W/m²
+    A_grund, hoehe, U, T_i, n, eta_solar, cp_luft : float
+        Gewächshaus- und thermische Parameter (siehe oben)
+
+    Returns
+    -------
+    np.ndarray
+        Heizlast in kW, negative Werte auf 0 gesetzt (keine Kühlung)
+    '''
+    return berechne_heizlast_matrix(T_a, G_solar, A_grund, hoehe, U, T_i, n, eta_solar, cp_luft)[0]
+
+
+def berechne_heizlast_entwuerfe(T_a, G_solar, entwuerfe: pd.DataFrame) -> np.ndarray:
+    '''
+    Heizlast-Matrix für eine Tabelle von Entwürfen.
+
+    Parameter
+    ----------
+    T_a, G_solar : array
+        Außentemperatur in °C und Globalstrahlung in W/m²
+    entwuerfe : pd.DataFrame
+        Eine Zeile je Entwurf, Spalten aus A_grund, hoehe, U, T_i, n, eta_solar, cp_luft
+        (fehlende Spalten: Standardwerte oben)
+
+    Returns
+    -------
+    np.ndarray
+        Heizlast in kW, Form (Entwürfe x Stunden)
+    '''
+    parameter = {spalte: entwuerfe[spalte].to_numpy(dtype=float) for spalte in entwuerfe.columns}
+    if not parameter:
+        parameter = {'A_grund': np.full(len(entwuerfe), A_grund)}
+    return berechne_heizlast_matrix(T_a, G_solar, **parameter)
+
+
+def entwurfs_raster(**parameter) -> pd.DataFrame:
+    '''
+    Alle Kombinationen der angegebenen Parameterwerte als Entwurfstabelle.
+
+    Beispiel: entwurfs_raster(A_grund=[5000, 10000], U=[3.0, 4.0, 5.0]) -> 6 Entwürfe
+    '''
+    index = pd.MultiIndex.from_product(list(parameter.values()), names=list(parameter))
+    return index.to_frame(index=False)
+
+
+def exportiere_heizlast(pfad: str, Q: np.ndarray, zeitindex: pd.DatetimeIndex, T_a,
+                        entwurf_namen: list = None):
+    '''
+    Speichert die Heizlast als CSV oder Parquet (nach Dateiendung).
+
+    Ein einzelner Entwurf wird im Format von heizlast_2019.csv geschrieben
+    (MESS_DATUM, T_aussen_C, Heizlast_kW). Bei mehreren Entwürfen folgt je
+    Entwurf eine Spalte Heizlast_kW_<Name>.
+    '''
+    Q = np.atleast_2d(Q)
+    n_hours = Q.shape[1]
+    df = pd.DataFrame({
+        'MESS_DATUM': zeitindex[:n_hours].strftime('%Y%m%d%H'),
+        'T_aussen_C': np.asarray(T_a)[:n_hours],
+    })
+    if Q.shape[0] == 1:
+        df['Heizlast_kW'] = Q[0]
+    else:
+        if entwurf_namen is None:
+            entwurf_namen = [str(i) for i in range(Q.shape[0])]
+        df = pd.concat([df, pd.DataFrame(Q.T, columns=[f'Heizlast_kW_{name}' for name in entwurf_namen])], axis=1)
+
+    if pfad.endswith('.parquet'):
+        df.to_parquet(pfad, index=False)
+    else:
+        df.to_csv(pfad, index=False)
+
+
+if __name__ == '__main__':
+    import matplotlib.pyplot as plt
+
+    from wetter_speicher import oeffne_wetter_speicher
+
+    geo = geometrie()
+    print(f"Grundfläche: {A_grund} m²")
+    print(f"Volumen: {geo['V']} m³")
+    print(f"Hüllfläche: {geo['A_huell']:.0f} m² (Dach: {geo['A_dach']:.0f} + Wände: {geo['A_wand']:.0f})")
+
+    # ============================================================
+    # Temperaturdaten Köln einlesen – nur 2019
+    # (memory-mapped Speicher, das Jahr ist ein Slice ohne Kopie)
+    # ============================================================
+    wetter_temp = oeffne_wetter_speicher('Temperatur Köln.csv', spalten=['TT_TU'])
+    T_a = wetter_temp.jahr(JAHR, 'TT_TU')   # Außentemperatur in °C
+
+    print(f"Temperaturdaten 2019: {len(T_a)} Stunden")
+
+    # ============================================================
+    # Solardaten Bochum/Bremen einlesen – nur 2019
+    # Solar_W_m2 = Globalstrahlung bereits in W/m² (bereinigt)
+    # ============================================================
+    wetter_solar = oeffne_wetter_speicher('Solareinstrahlung_Bochum_Bremen.csv', datum_spalte='DateTime')
+
+    # Globalstrahlung (bereits in W/m² und bereinigt)
+    G_solar = wetter_solar.jahr(JAHR, 'Solar_W_m2')
+
+    print(f"Solardaten 2019: {len(G_solar)} Stunden")
+
+    # Beide Zeitreihen liegen auf demselben Stundenraster des Jahres
+    zeitindex = wetter_temp.zeitindex(JAHR)
+
+    # ============================================================
+    # Stündliche Heizlastberechnung
+    # ============================================================
+    Q_dot = berechne_heizlast(T_a, G_solar)
+
+    # ============================================================
+    # Ergebnisse ausgeben
+    # ============================================================
+    print(f"\n--- Ergebnisse Heizlast 2019 ---")
+    print(f"Maximale Heizlast: {Q_dot.max():.1f} kW")
+    print(f"Mittlere Heizlast: {Q_dot.mean():.1f} kW")
+    print(f"Gesamter Heizenergiebedarf: {Q_dot.sum():.0f} kWh/a")
+    print(f"Stunden ohne Heizbedarf: {(Q_dot == 0).sum()}")
+
+    # CSV exportieren
+    exportiere_heizlast('heizlast_2019.csv', Q_dot, zeitindex, T_a)
+    print(f"Exportiert nach: heizlast_2019.csv")
+
+    # Graph erstellen
+    plt.figure(figsize=(12, 5))
+    plt.plot(Q_dot, linewidth=0.5, color='crimson')
+    plt.xlabel("Stunde des Jahres")
+    plt.ylabel("Heizlast [kW]")
+    plt.title("Stündliche Heizlast Gewächshaus – Köln 2019")
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    plt.show()
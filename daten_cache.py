@@ -0,0 +1,253 @@
+"""
+Binärer Zwischenspeicher (Cache) für die stündlichen Eingangszeitreihen
+- Heizlast aus heizlast_2019.csv
+- Strombedarf aus hourly_lamp_energy_2019.csv
+- COP Wärmepumpe aus heatpump_cop_2019.csv
+- Windkraftanlagen-Leistung aus Windanlage Leistungsdaten.csv
+
+Die CSV-Dateien werden nur beim ersten Aufruf eingelesen und danach spaltenweise
+als Parquet (falls pyarrow installiert ist, sonst als NPZ) im Ordner .cache
+abgelegt. Der Dateiname enthält einen SHA-256-Hash der Quelldateien, d.h. wird
+eine CSV-Datei geändert, passt der Hash nicht mehr und der Cache wird
+automatisch neu erstellt.
+
+Verwendung (Skripte und Notebooks):
+    from daten_cache import lade_zeitreihen
+    zeitreihen = lade_zeitreihen()
+    zeitindex = zeitreihen.index
+"""
+
+import hashlib
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Pfade
+# ============================================================
+
+DATENORDNER = 'Abgabeordner Gruppe 9'
+CACHEORDNER = '.cache'
+
+DATEI_HEIZLAST = os.path.join(DATENORDNER, 'heizlast_2019.csv')
+DATEI_STROMBEDARF = os.path.join(DATENORDNER, 'hourly_lamp_energy_2019.csv')
+DATEI_COP = os.path.join(DATENORDNER, 'heatpump_cop_2019.csv')
+DATEI_WIND = os.path.join(DATENORDNER, 'Windanlage Leistungsdaten.csv')
+
+# Bei Änderungen an den Einlesefunktionen erhöhen -> alter Cache wird ungültig
+CACHE_VERSION = 1
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_VERFUEGBAR = True
+except ImportError:
+    PARQUET_VERFUEGBAR = False
+
+
+# ============================================================
+# Hash der Quelldateien
+# ============================================================
+
+def datei_hash(pfad: str) -> str:
+    '''
+    Berechnet den SHA-256-Hash des Dateiinhalts.
+
+    Parameter
+    ----------
+    pfad : str
+        Pfad zur Datei
+
+    Returns
+    -------
+    str
+        Hash als Hex-String
+    '''
+    h = hashlib.sha256()
+    with open(pfad, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _cache_schluessel(quellen: list, *extra) -> str:
+    h = hashlib.sha256(f'v{CACHE_VERSION}'.encode())
+    for pfad in quellen:
+        h.update(datei_hash(pfad).encode())
+    for wert in extra:
+        h.update(repr(wert).encode())
+    return h.hexdigest()[:16]
+
+
+# ============================================================
+# Einlesen der CSV-Dateien (nur bei leerem/ungültigem Cache)
+# ============================================================
+
+def _lese_heizlast(pfad: str) -> pd.DataFrame:
+    df = pd.read_csv(pfad, sep=',', encoding='utf-8')
+    df['datetime'] = pd.to_datetime(df['MESS_DATUM'].astype(str), format='%Y%m%d%H')
+    df.set_index('datetime', inplace=True)
+    return df[['T_aussen_C', 'Heizlast_kW']].astype('float64')
+
+
+def _lese_strombedarf(pfad: str) -> pd.DataFrame:
+    df = pd.read_csv(pfad, sep=';', encoding='utf-8')
+    df['datetime'] = pd.to_datetime(df['DateTime'].astype(str), format='%Y%m%d%H')
+    df.set_index('datetime', inplace=True)
+    return df[['Energy_kW']].astype('float64')
+
+
+def _lese_cop(pfad: str) -> pd.DataFrame:
+    df = pd.read_csv(pfad, sep=',', encoding='utf-8')
+    df['datetime'] = pd.to_datetime(df['MESS_DATUM'].astype(str), format='%Y%m%d%H')
+    df.set_index('datetime', inplace=True)
+    return df[['T_aussen_C', 'COP']].astype('float64')
+
+
+def lese_wind(pfad: str) -> pd.DataFrame:
+    '''Leistung der Vergleichs-Windkraftanlage aus der Leistungsdatei (z.B. renewables.ninja) als Wind_kW in kW.'''
+    df = pd.read_csv(pfad, sep=';', encoding='utf-8', skiprows=4)
+    df = df[['time', 'electricity']].copy()
+    df['datetime'] = pd.to_datetime(df['time'])
+    df.set_index('datetime', inplace=True)
+    df = df.rename(columns={'electricity': 'Wind_kW'})
+    return df[['Wind_kW']].astype('float64')
+
+
+# ============================================================
+# Lesen/Schreiben des Caches
+# ============================================================
+
+def _cache_pfad(name: str, schluessel: str) -> str:
+    endung = 'parquet' if PARQUET_VERFUEGBAR else 'npz'
+    return os.path.join(CACHEORDNER, f'{name}-{schluessel}.{endung}')
+
+
+def _schreibe_cache(df: pd.DataFrame, pfad: str, name: str):
+    os.makedirs(CACHEORDNER, exist_ok=True)
+
+    # Erst in eine eigene temporäre Datei schreiben, dann umbenennen (kein halber Cache
+    # bei Abbruch; parallele Prozesse, z.B. Worker der Parameterstudie, stören sich nicht)
+    deskriptor, tmp = tempfile.mkstemp(dir=CACHEORDNER, prefix=f'.{name}-', suffix='.tmp')
+    try:
+        with os.fdopen(deskriptor, 'wb') as f:
+            if PARQUET_VERFUEGBAR:
+                df.to_parquet(f, engine='pyarrow', index=True)
+            else:
+                spalten = {f'spalte_{i}': df[s].to_numpy() for i, s in enumerate(df.columns)}
+                np.savez(f,
+                         index=df.index.values.astype('datetime64[ns]').astype('int64'),
+                         spaltennamen=np.array(df.columns, dtype=str),
+                         **spalten)
+        os.replace(tmp, pfad)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+    # Veraltete Cache-Dateien desselben Datensatzes entfernen (nur fertige Dateien)
+    for datei in os.listdir(CACHEORDNER):
+        veraltet = os.path.join(CACHEORDNER, datei)
+        if datei.startswith(name + '-') and datei.endswith(('.parquet', '.npz')) \
+                and veraltet != pfad:
+            try:
+                os.remove(veraltet)
+            except FileNotFoundError:
+                pass   # bereits von einem anderen Prozess entfernt
+
+
+def _lese_cache(pfad: str) -> pd.DataFrame:
+    if PARQUET_VERFUEGBAR:
+        return pd.read_parquet(pfad, engine='pyarrow')
+    with np.load(pfad) as npz:
+        index = pd.DatetimeIndex(npz['index'].astype('datetime64[ns]'), name='datetime')
+        daten = {s: npz[f'spalte_{i}'] for i, s in enumerate(npz['spaltennamen'])}
+    return pd.DataFrame(daten, index=index)
+
+
+def _lade_mit_cache(name: str, quellen: list, erzeuge, *extra) -> pd.DataFrame:
+    pfad = _cache_pfad(name, _cache_schluessel(quellen, *extra))
+    if os.path.exists(pfad):
+        return _lese_cache(pfad)
+    df = erzeuge()
+    _schreibe_cache(df, pfad, name)
+    return df
+
+
+# ============================================================
+# Öffentliche Ladefunktionen
+# ============================================================
+
+def lade_heizlast(pfad: str = DATEI_HEIZLAST) -> pd.DataFrame:
+    '''Heizlast (Spalten T_aussen_C, Heizlast_kW) mit Datetime-Index.'''
+    return _lade_mit_cache('heizlast', [pfad], lambda: _lese_heizlast(pfad))
+
+
+def lade_strombedarf(pfad: str = DATEI_STROMBEDARF) -> pd.DataFrame:
+    '''Strombedarf der Lampen (Spalte Energy_kW) mit Datetime-Index.'''
+    return _lade_mit_cache('strombedarf', [pfad], lambda: _lese_strombedarf(pfad))
+
+
+def lade_cop(pfad: str = DATEI_COP) -> pd.DataFrame:
+    '''COP der Wärmepumpe (Spalten T_aussen_C, COP) mit Datetime-Index.'''
+    return _lade_mit_cache('cop', [pfad], lambda: _lese_cop(pfad))
+
+
+def lade_wind(pfad: str = DATEI_WIND) -> pd.DataFrame:
+    '''Leistung der Vergleichs-Windkraftanlage (Spalte Wind_kW) mit Datetime-Index.'''
+    return _lade_mit_cache('wind', [pfad], lambda: lese_wind(pfad))
+
+
+def lade_zeitreihen(mit_cop: bool = True, mit_wind: bool = True) -> pd.DataFrame:
+    '''
+    Lädt alle Eingangszeitreihen auf einem gemeinsamen Zeitindex.
+
+    Parameter
+    ----------
+    mit_cop : bool
+        COP-Zeitreihe mit aufnehmen (Zukunftssystem)
+    mit_wind : bool
+        Windleistung mit aufnehmen (Zukunftssystem)
+
+    Returns
+    -------
+    pd.DataFrame
+        Spalten Heizlast_kW, Energy_kW und ggf. COP, Wind_kW;
+        Index ist die Schnittmenge der Zeitstempel aller Dateien
+    '''
+    quellen = [DATEI_HEIZLAST, DATEI_STROMBEDARF]
+    if mit_cop:
+        quellen.append(DATEI_COP)
+    if mit_wind:
+        quellen.append(DATEI_WIND)
+
+    def erzeuge():
+        teile = [lade_heizlast()[['Heizlast_kW']], lade_strombedarf()]
+        if mit_cop:
+            teile.append(lade_cop()[['COP']])
+        if mit_wind:
+            teile.append(lade_wind())
+
+        # Gemeinsamen Zeitindex erstellen
+        zeitindex = teile[0].index
+        for teil in teile[1:]:
+            zeitindex = zeitindex.intersection(teil.index)
+
+        df = pd.concat([teil.loc[zeitindex] for teil in teile], axis=1)
+        df.index.name = 'datetime'
+        return df
+
+    name = 'zeitreihen' + ('_cop' if mit_cop else '') + ('_wind' if mit_wind else '')
+    return _lade_mit_cache(name, quellen, erzeuge)
+
+
+if __name__ == '__main__':
+    import time
+
+    start = time.perf_counter()
+    zeitreihen = lade_zeitreihen()
+    dauer = time.perf_counter() - start
+
+    print(f"Zeitreihen geladen: {len(zeitreihen)} Stunden in {dauer*1000:.1f} ms")
+    print(f"Cache-Format: {'Parquet' if PARQUET_VERFUEGBAR else 'NPZ'}")
+    print(zeitreihen.describe().round(2))
@@ -0,0 +1,218 @@
+"""
+Direkte Berechnung des Einsatzes für Netzwerke ohne Freiheitsgrade
+- Erkennt Netzwerke wie das konventionelle Gewächshaus: keine erweiterbaren
+  Komponenten, keine Speicher, je Bus genau eine Einspeisung (Generator oder
+  Link) -> der Einsatz ist durch die Lasten eindeutig bestimmt
+- Einsatz, Energiebilanzen, Grenzpreise (buses_t.marginal_price) und Kosten
+  werden vektorisiert mit NumPy berechnet: Bedarf je Bus rückwärts entlang
+  der Links (p0 = Bedarf / efficiency), z.B. Gasimport = Heizlast / Wirkungsgrad
+- Reicht eine Nennleistung nicht aus, ist auch das LP unzulässig
+  (Status 'warning', 'infeasible')
+- optimiere_schnell() nutzt die direkte Berechnung, sonst das LP (solver.py);
+  pruefe_gegen_lp() vergleicht beide Wege
+
+Verwendung:
+    from direkter_einsatz import optimiere_schnell, pruefe_gegen_lp
+    n_konv = baue_konventionell(zeitreihen)
+    optimiere_schnell(n_konv)                   # Millisekunden statt LP
+    pruefe_gegen_lp(n_konv)                     # Abweichungen zum LP
+"""
+
+import numpy as np
+import pandas as pd
+import pypsa
+
+from solver import optimiere
+
+# Komponenten, die es in direkt berechenbaren Netzwerken nicht geben darf
+_NICHT_ERLAUBT = ('Store', 'StorageUnit', 'Line', 'Transformer', 'ShuntImpedance', 'GlobalConstraint')
+
+
+def _einspeisungen(network: pypsa.Network) -> dict:
+    # Bus -> [(Komponente, Name)] aller Einspeisungen (Generatoren, Links über bus1)
+    einspeisungen = {bus: [] for bus in network.buses.index}
+    for name, bus in network.generators.bus.items():
+        einspeisungen[bus].append(('Generator', name))
+    for name, bus in network.links.bus1.items():
+        einspeisungen[bus].append(('Link', name))
+    return einspeisungen
+
+
+def direkt_loesbar(network: pypsa.Network) -> bool:
+    '''
+    Prüft, ob der Einsatz ohne Optimierung eindeutig aus den Lasten folgt.
+
+    Bedingungen: keine Speicher, Leitungen oder globalen Nebenbedingungen;
+    Generatoren und Links mit fester Nennleistung, ohne Unit Commitment,
+    Rampen oder quadratische Kosten; Links nur in eine Richtung mit
+    positivem Wirkungsgrad und ohne weitere Ausgänge (bus2, ...); je Bus
+    genau eine Einspeisung und keine Kreise über Links. Nennleistungen
+    werden erst bei der Berechnung geprüft.
+    '''
+    if any(len(network.components[komponente].static) for komponente in _NICHT_ERLAUBT):
+        return False
+    for komponente in ('Generator', 'Link'):
+        static = network.components[komponente].static
+        if (static['p_nom_extendable'].any() or static['committable'].any() or not static['active'].all()
+                or (static['marginal_cost_quadratic'] != 0).any()
+                or static[['ramp_limit_up', 'ramp_limit_down']].notna().any().any()
+                or network.get_switchable_as_dense(komponente, 'p_min_pu').lt(0).any().any()):
+            return False
+    if (network.generators['sign'] != 1).any():
+        return False
+    links = network.links
+    weitere_ausgaenge = [spalte for spalte in links.columns if spalte.startswith('bus') and spalte[3:].isdigit()
+                         and int(spalte[3:]) >= 2]
+    if weitere_ausgaenge and (links[weitere_ausgaenge] != '').any().any():
+        return False
+    if len(links) and (network.get_switchable_as_dense('Link', 'efficiency') <= 0).any().any():
+        return False
+
+    einspeisungen = _einspeisungen(network)
+    if any(len(quellen) != 1 for quellen in einspeisungen.values()):
+        return False
+    # Kreise: jeder Bus muss über seine Einspeisungen bei einem Generator enden
+    for bus in network.buses.index:
+        besucht = set()
+        while bus not in besucht:
+            besucht.add(bus)
+            komponente, name = einspeisungen[bus][0]
+            if komponente == 'Generator':
+                break
+            bus = links.at[name, 'bus0']
+        else:
+            return False
+    return True
+
+
+def _einsatz(network: pypsa.Network) -> tuple:
+    # Bedarf je Bus (Lasten + Links, die aus dem Bus gespeist werden) rekursiv von den Lasten her
+    einspeisungen = _einspeisungen(network)
+    links = network.links
+    lasten = network.get_switchable_as_dense('Load', 'p_set')
+    wirkungsgrad = network.get_switchable_as_dense('Link', 'efficiency')
+    kosten = {k: network.get_switchable_as_dense(k, 'marginal_cost') for k in ('Generator', 'Link')}
+    null = np.zeros(len(network.snapshots))
+
+    bedarf, preis = {}, {}
+    p0 = {}
+
+    def bedarf_von(bus):
+        if bus not in bedarf:
+            wert = lasten.loc[:, network.loads.index[network.loads.bus == bus]].to_numpy().sum(axis=1) + null
+            for link in links.index[links.bus0 == bus]:
+                p0[link] = bedarf_von(links.at[link, 'bus1']) / wirkungsgrad[link].to_numpy()
+                wert = wert + p0[link]
+            bedarf[bus] = wert
+        return bedarf[bus]
+
+    def preis_von(bus):
+        if bus not in preis:
+            komponente, name = einspeisungen[bus][0]
+            if komponente == 'Generator':
+                preis[bus] = kosten['Generator'][name].to_numpy()
+            else:
+                preis[bus] = (preis_von(links.at[name, 'bus0']) + kosten['Link'][name].to_numpy()) \
+                    / wirkungsgrad[name].to_numpy()
+        return preis[bus]
+
+    for bus in network.buses.index:
+        bedarf_von(bus)
+        preis_von(bus)
+
+    p_gen = {einspeisungen[bus][0][1]: bedarf[bus] for bus in network.buses.index
+             if einspeisungen[bus][0][0] == 'Generator'}
+    return preis, p_gen, p0
+
+
+def _zulaessig(network: pypsa.Network, komponente: str, einsatz: pd.DataFrame) -> bool:
+    # Einsatz innerhalb p_nom * p_min_pu ... p_nom * p_max_pu (p_nom = inf ohne Obergrenze)
+    p_nom = network.components[komponente].static['p_nom']
+    p_max = network.get_switchable_as_dense(komponente, 'p_max_pu')[einsatz.columns]
+    p_min = network.get_switchable_as_dense(komponente, 'p_min_pu')[einsatz.columns]
+    oben = (p_max * p_nom[einsatz.columns]).where(p_max > 0, 0.0)
+    unten = (p_min * p_nom[einsatz.columns]).where(p_min > 0, 0.0)
+    toleranz = 1e-6 * (1 + einsatz.abs())
+    return bool(((einsatz <= oben + toleranz) & (einsatz >= unten - toleranz)).all().all())
+
+
+def loese_direkt(network: pypsa.Network) -> tuple:
+    '''
+    Einsatz, Grenzpreise und Kosten ohne Optimierung (nur für direkt_loesbar(network)).
+
+    Setzt wie network.optimize generators_t.p, links_t.p0/p1, loads_t.p,
+    buses_t.marginal_price, p_nom_opt und objective.
+
+    Returns
+    -------
+    tuple
+        ('ok', 'optimal') oder ('warning', 'infeasible'), wenn eine Nennleistung nicht ausreicht
+    '''
+    if not direkt_loesbar(network):
+        raise ValueError("Der Einsatz des Netzwerks ist nicht eindeutig bestimmt; LP verwenden (solver.optimiere).")
+    snapshots = network.snapshots
+    preis, p_gen, p0 = _einsatz(network)
+
+    generatoren = pd.DataFrame(p_gen, index=snapshots).reindex(columns=network.generators.index)
+    links = pd.DataFrame(p0, index=snapshots).reindex(columns=network.links.index, fill_value=0.0)
+    if not (_zulaessig(network, 'Generator', generatoren) and _zulaessig(network, 'Link', links)):
+        return 'warning', 'infeasible'
+
+    wirkungsgrad = network.get_switchable_as_dense('Link', 'efficiency')
+    network.generators_t.p = generatoren
+    network.links_t.p0 = links
+    network.links_t.p1 = -links * wirkungsgrad
+    network.loads_t.p = network.get_switchable_as_dense('Load', 'p_set')
+    network.buses_t.marginal_price = pd.DataFrame(preis, index=snapshots)[network.buses.index]
+    for komponente in ('Generator', 'Link'):
+        network.components[komponente].static['p_nom_opt'] = network.components[komponente].static['p_nom']
+
+    gewichtung = network.snapshot_weightings.objective
+    kosten = sum((einsatz * network.get_switchable_as_dense(k, 'marginal_cost')).mul(gewichtung, axis=0).sum().sum()
+                 for k, einsatz in (('Generator', generatoren), ('Link', links)))
+    network._objective = float(kosten)
+    return 'ok', 'optimal'
+
+
+def optimiere_schnell(network: pypsa.Network, solver_name: str = None, **optionen) -> tuple:
+    '''Direkte Berechnung, falls direkt_loesbar(network), sonst solver.optimiere (LP).'''
+    if direkt_loesbar(network):
+        return loese_direkt(network)
+    return optimiere(network, solver_name, **optionen)
+
+
+def pruefe_gegen_lp(network: pypsa.Network, solver_name: str = None, **optionen) -> dict:
+    '''
+    Vergleicht die direkte Berechnung mit dem LP (auf Kopien des Netzwerks).
+
+    Returns
+    -------
+    dict
+        objective_direkt, objective_lp, abweichung_objective (relativ) und
+        abweichung_einsatz (größte absolute Abweichung in kW über Generatoren und Links)
+    '''
+    direkt, lp = network.copy(), network.copy()
+    loese_direkt(direkt)
+    optimiere(lp, solver_name, **optionen)
+    einsatz = max((direkt.generators_t.p - lp.generators_t.p).abs().max().max(),
+                  (direkt.links_t.p0 - lp.links_t.p0).abs().max().max() if len(network.links) else 0.0)
+    return {
+        'objective_direkt': direkt.objective,
+        'objective_lp': lp.objective,
+        'abweichung_objective': abs(direkt.objective - lp.objective) / max(abs(lp.objective), 1.0),
+        'abweichung_einsatz': float(einsatz),
+    }
+
+
+if __name__ == '__main__':
+    import time
+
+    from daten_cache import lade_zeitreihen
+    from netzwerk import baue_konventionell, baue_zukunft
+
+    zeitreihen = lade_zeitreihen()
+    n_konv = baue_konventionell(zeitreihen)
+    start = time.perf_counter()
+    print(optimiere_schnell(n_konv), f"{(time.perf_counter() - start) * 1000:.1f} ms")
+    print(pruefe_gegen_lp(n_konv))
+    print(f"Zukunftssystem direkt lösbar: {direkt_loesbar(baue_zukunft(zeitreihen))}")
@@ -0,0 +1,210 @@
+"""
+Zwischenspeicher (Cache) für gelöste PyPSA-Netzwerke
+- Schlüssel ist ein SHA-256-Hash aus Eingangszeitreihen (Werte und Zeitindex),
+  Parametern (Dataclass), Systemaufbau (Quellcode von z.B. baue_zukunft, ihres
+  Moduls und von netzwerk.py), Solvername und Solveroptionen sowie der
+  PyPSA-Version -> Änderungen am Netzaufbau machen alte Einträge ungültig
+- Gelöste Netzwerke werden als netCDF im Ordner .cache/ergebnisse abgelegt
+  und beim nächsten Aufruf mit gleichem Schlüssel direkt geladen (inkl.
+  Einsatzzeitreihen, p_nom_opt/e_nom_opt und objective)
+- Größe begrenzt über max_eintraege und max_groesse_mb; bei Überschreitung
+  werden die am längsten nicht genutzten Einträge gelöscht (LRU über die
+  Änderungszeit der Dateien)
+- Umgebungsvariable GEWAECHSHAUS_ERGEBNIS_CACHE=0 schaltet den Cache ab
+  (es wird immer neu optimiert)
+
+Verwendung:
+    from ergebnis_cache import ErgebnisCache
+    cache = ErgebnisCache(max_eintraege=10)
+    n_zuk = cache.optimiere(baue_zukunft, zeitreihen, ZukunftParameter())
+    cache.leere()
+"""
+
+import hashlib
+import inspect
+import os
+import tempfile
+import time
+from dataclasses import asdict, is_dataclass
+
+import pandas as pd
+import pypsa
+
+from daten_cache import CACHEORDNER
+from solver import optimiere, solver_optionen, waehle_solver
+
+ERGEBNISORDNER = os.path.join(CACHEORDNER, 'ergebnisse')
+UMGEBUNGSVARIABLE = 'GEWAECHSHAUS_ERGEBNIS_CACHE'
+
+# Bei Änderungen am Dateiformat erhöhen -> alte Einträge werden ungültig
+# (Änderungen am Netzaufbau erkennt der Schlüssel über den Quellcode selbst)
+CACHE_VERSION = 1
+
+
+def _quellcode(baue) -> str:
+    # Quellcode der Aufbaufunktion, ihres Moduls und von netzwerk.py
+    import netzwerk
+
+    teile = []
+    for objekt in (baue, inspect.getmodule(baue), netzwerk):
+        try:
+            teile.append(inspect.getsource(objekt))
+        except (OSError, TypeError):
+            teile.append(f'{getattr(objekt, "__module__", "")}.{getattr(objekt, "__qualname__", objekt)}')
+    return '\n'.join(teile)
+
+
+def ergebnis_schluessel(baue, zeitreihen: pd.DataFrame, parameter=None,
+                        solver_name: str = None, optionen: dict = None) -> str:
+    '''
+    Hash über alle Eingaben einer Optimierung.
+
+    Parameter
+    ----------
+    baue : callable
+        Aufbaufunktion des Netzwerks (z.B. netzwerk.baue_zukunft)
+    zeitreihen : pd.DataFrame
+        Eingangszeitreihen
+    parameter : dataclass
+        Parameter des Systems (None: Standardwerte der Aufbaufunktion)
+    solver_name : str
+        Name des verwendeten Solvers
+    optionen : dict
+        Solveroptionen, wie sie an den Solver übergeben werden
+
+    Returns
+    -------
+    str
+        Hex-String (24 Zeichen)
+    '''
+    h = hashlib.sha256(f'v{CACHE_VERSION}|pypsa {pypsa.__version__}'.encode())
+    h.update(f'{baue.__module__}.{baue.__qualname__}'.encode())
+    h.update(_quellcode(baue).encode())
+    h.update(repr(list(zeitreihen.columns)).encode())
+    h.update(pd.util.hash_pandas_object(zeitreihen, index=True).to_numpy().tobytes())
+    h.update(type(parameter).__name__.encode())
+    werte = asdict(parameter) if is_dataclass(parameter) else {'parameter': parameter}
+    for feld, wert in sorted(werte.items()):
+        h.update(feld.encode())
+        if isinstance(wert, pd.Series):
+            # Preiszeitreihen (tarife.py) über alle Werte, nicht über die gekürzte repr
+            h.update(pd.util.hash_pandas_object(wert, index=True).to_numpy().tobytes())
+        else:
+            h.update(repr(wert).encode())
+    h.update(f'{solver_name}{sorted((optionen or {}).items())!r}'.encode())
+    return h.hexdigest()[:24]
+
+
+class ErgebnisCache:
+    '''
+    Cache für gelöste Netzwerke mit begrenzter Größe (LRU).
+
+    Parameter
+    ----------
+    ordner : str
+        Ablageort der netCDF-Dateien
+    max_eintraege : int
+        Höchstzahl gespeicherter Netzwerke
+    max_groesse_mb : float
+        Höchstgröße aller gespeicherten Netzwerke in MB
+    aktiv : bool
+        False: immer neu optimieren, nichts speichern (Standard: Umgebungsvariable
+        GEWAECHSHAUS_ERGEBNIS_CACHE, sonst aktiv)
+    '''
+
+    def __init__(self, ordner: str = ERGEBNISORDNER, max_eintraege: int = 20,
+                 max_groesse_mb: float = 500.0, aktiv: bool = None):
+        self.ordner = ordner
+        self.max_eintraege = max_eintraege
+        self.max_groesse_mb = max_groesse_mb
+        self.aktiv = aktiv if aktiv is not None else os.environ.get(UMGEBUNGSVARIABLE, '1') != '0'
+
+    def _pfad(self, schluessel: str) -> str:
+        return os.path.join(self.ordner, f'{schluessel}.nc')
+
+    def eintraege(self) -> pd.DataFrame:
+        '''Gespeicherte Einträge (schluessel, groesse_mb, zuletzt_genutzt), zuletzt genutzte zuerst.'''
+        zeilen = []
+        if os.path.isdir(self.ordner):
+            for datei in os.listdir(self.ordner):
+                if datei.endswith('.nc'):
+                    info = os.stat(os.path.join(self.ordner, datei))
+                    zeilen.append({'schluessel': datei[:-3], 'groesse_mb': info.st_size / 2**20,
+                                   'zuletzt_genutzt': pd.Timestamp(info.st_mtime, unit='s')})
+        eintraege = pd.DataFrame(zeilen, columns=['schluessel', 'groesse_mb', 'zuletzt_genutzt'])
+        return eintraege.sort_values('zuletzt_genutzt', ascending=False, ignore_index=True)
+
+    def leere(self):
+        '''Löscht alle Einträge.'''
+        for schluessel in self.eintraege()['schluessel']:
+            os.remove(self._pfad(schluessel))
+
+    def _raeume_auf(self):
+        # Älteste Einträge löschen, bis Anzahl und Gesamtgröße eingehalten sind
+        eintraege = self.eintraege()
+        groesse = eintraege['groesse_mb'].cumsum()
+        zu_viel = (eintraege.index >= self.max_eintraege) | (groesse > self.max_groesse_mb)
+        for schluessel in eintraege.loc[zu_viel, 'schluessel']:
+            try:
+                os.remove(self._pfad(schluessel))
+            except FileNotFoundError:
+                pass   # bereits von einem anderen Prozess entfernt
+
+    def optimiere(self, baue, zeitreihen: pd.DataFrame, parameter=None, solver_name: str = None,
+                  threads: int = None, methode: str = None, presolve: bool = None, **weitere) -> pypsa.Network:
+        '''
+        Gelöstes Netzwerk aus dem Cache oder neu aufgebaut und optimiert.
+
+        Parameter
+        ----------
+        baue : callable
+            Aufbaufunktion baue(zeitreihen, parameter) -> pypsa.Network
+        zeitreihen : pd.DataFrame
+            Eingangszeitreihen
+        parameter : dataclass
+            Parameter des Systems
+        solver_name, threads, methode, presolve, **weitere
+            Wie solver.optimiere
+
+        Returns
+        -------
+        pypsa.Network
+            Gelöstes Netzwerk (bei einem Treffer ohne Optimierungsmodell n.model)
+        '''
+        name = waehle_solver(solver_name)
+        optionen = solver_optionen(name, threads, methode, presolve, **weitere)
+        pfad = self._pfad(ergebnis_schluessel(baue, zeitreihen, parameter, name, optionen))
+
+        if self.aktiv and os.path.exists(pfad):
+            os.utime(pfad)  # als zuletzt genutzt markieren
+            return pypsa.Network(pfad)
+
+        network = baue(zeitreihen, parameter)
+        status, bedingung = optimiere(network, name, threads, methode, presolve, **weitere)
+        if self.aktiv and status == 'ok':
+            os.makedirs(self.ordner, exist_ok=True)
+            # Erst in eine eigene temporäre Datei schreiben, dann umbenennen (kein halber
+            # Eintrag bei Abbruch, parallele Prozesse stören sich nicht)
+            deskriptor, tmp = tempfile.mkstemp(dir=self.ordner, suffix='.tmp')
+            os.close(deskriptor)
+            try:
+                network.export_to_netcdf(tmp)
+                os.replace(tmp, pfad)
+            except BaseException:
+                os.remove(tmp)
+                raise
+            self._raeume_auf()
+        return network
+
+
+if __name__ == '__main__':
+    from daten_cache import lade_zeitreihen
+    from netzwerk import ZukunftParameter, baue_zukunft
+
+    zeitreihen = lade_zeitreihen()
+    cache = ErgebnisCache()
+    for lauf in ('erster Aufruf', 'zweiter Aufruf'):
+        start = time.perf_counter()
+        n = cache.optimiere(baue_zukunft, zeitreihen, ZukunftParameter())
+        print(f"{lauf}: {time.perf_counter() - start:.1f} s, objective {n.objective:,.2f}")
+    print(cache.eintraege().round(2).to_string(index=False))
@@ -0,0 +1,194 @@
+"""
+Spaltenweise Ablage gelöster Läufe (Arrow IPC / Feather, zstd-komprimiert)
+- Je Lauf ein Ordner mit zeitreihen.arrow (eine Spalte je Komponente und
+  Größe, z.B. 'Generator/p/Windkraftanlage', 'Store/e/Waermespeicher') und
+  manifest.json (Kennzahlen wie netzwerk.kennzahlen, Parameter/Metadaten,
+  Spaltenliste, Zeitraum)
+- Lesen über Memory-Mapping: es werden nur die angeforderten Spalten
+  gelesen, nie das ganze Netzwerk
+- lese_spalte() stellt eine Größe über viele Läufe nebeneinander (z.B. den
+  Wärmespeicher-Füllstand aller Läufe einer Parameterstudie)
+- Benötigt pyarrow
+
+Verwendung:
+    from ergebnis_export import speichere_ergebnis, lese_laeufe, lese_spalte, lese_zeitreihen
+    speichere_ergebnis(n_zuk, 'ergebnisse', 'zukunft_basis', metadaten=asdict(parameter))
+    laeufe = lese_laeufe('ergebnisse')                 # eine Zeile je Lauf, nur Manifeste
+    fuellstand = lese_spalte('ergebnisse', 'Store/e/Waermespeicher')
+    wind = lese_zeitreihen('ergebnisse', 'zukunft_basis', ['Generator/p/Windkraftanlage'])
+"""
+
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pypsa
+
+from netzwerk import kennzahlen
+
+# Gespeicherte Zeitreihen (Komponente, Größe)
+ZEITREIHEN = [('Generator', 'p'), ('Link', 'p0'), ('Link', 'p1'), ('Store', 'e'), ('Store', 'p'), ('Load', 'p')]
+
+DATEI_ZEITREIHEN = 'zeitreihen.arrow'
+DATEI_MANIFEST = 'manifest.json'
+INDEXSPALTE = 'snapshot'
+KOMPRESSION = 'zstd'
+
+# Bei Änderungen am Dateiaufbau erhöhen
+FORMAT_VERSION = 1
+
+
+def _als_json(wert):
+    # numpy-Zahlen und Zeitstempel für json.dump
+    if isinstance(wert, np.generic):
+        return wert.item()
+    if isinstance(wert, (pd.Timestamp, datetime)):
+        return wert.isoformat()
+    return str(wert)
+
+
+def speichere_ergebnis(network: pypsa.Network, ordner: str, lauf: str, metadaten: dict = None) -> str:
+    '''
+    Speichert Zeitreihen und Kennzahlen eines gelösten Netzwerks.
+
+    Parameter
+    ----------
+    network : pypsa.Network
+        Gelöstes Netzwerk
+    ordner : str
+        Ablageordner aller Läufe
+    lauf : str
+        Name des Laufs (Unterordner; ein vorhandener Lauf gleichen Namens wird ersetzt)
+    metadaten : dict
+        Zusätzliche Angaben für das Manifest (z.B. Parameter, Solver)
+
+    Returns
+    -------
+    str
+        Pfad des Laufordners
+    '''
+    spalten = {INDEXSPALTE: pa.array(network.snapshots.to_numpy())}
+    for name, werte in network.snapshot_weightings.items():
+        spalten[f'snapshot_weightings/{name}'] = pa.array(werte.to_numpy(dtype=np.float64))
+    for komponente, groesse in ZEITREIHEN:
+        tabelle = network.components[komponente].dynamic[groesse]
+        for name in tabelle.columns:
+            spalten[f'{komponente}/{groesse}/{name}'] = pa.array(tabelle[name].to_numpy(dtype=np.float64))
+
+    pfad = os.path.join(ordner, lauf)
+    os.makedirs(pfad, exist_ok=True)
+    # Erst in temporäre Dateien schreiben, dann umbenennen (kein halber Lauf bei Abbruch)
+    tmp = os.path.join(pfad, DATEI_ZEITREIHEN + '.tmp')
+    feather.write_feather(pa.table(spalten), tmp, compression=KOMPRESSION)
+    os.replace(tmp, os.path.join(pfad, DATEI_ZEITREIHEN))
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'lauf': lauf,
+        'erstellt': datetime.now().isoformat(timespec='seconds'),
+        'snapshots': len(network.snapshots),
+        'beginn': network.snapshots[0],
+        'ende': network.snapshots[-1],
+        'objective': network.objective,
+        'kennzahlen': kennzahlen(network),
+        'metadaten': metadaten or {},
+        'spalten': [name for name in spalten if name != INDEXSPALTE],
+    }
+    tmp = os.path.join(pfad, DATEI_MANIFEST + '.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, default=_als_json, ensure_ascii=False, indent=1)
+    os.replace(tmp, os.path.join(pfad, DATEI_MANIFEST))
+    return pfad
+
+
+def lese_manifest(ordner: str, lauf: str) -> dict:
+    '''Manifest eines Laufs (siehe speichere_ergebnis).'''
+    with open(os.path.join(ordner, lauf, DATEI_MANIFEST), encoding='utf-8') as f:
+        return json.load(f)
+
+
+def lese_laeufe(ordner: str) -> pd.DataFrame:
+    '''
+    Übersicht aller gespeicherten Läufe (liest nur die Manifeste).
+
+    Returns
+    -------
+    pd.DataFrame
+        Index = Lauf; Spalten snapshots, beginn, ende, objective, Kennzahlen
+        und Metadaten (flach)
+    '''
+    zeilen = {}
+    for lauf in sorted(os.listdir(ordner)) if os.path.isdir(ordner) else []:
+        if not os.path.exists(os.path.join(ordner, lauf, DATEI_MANIFEST)):
+            continue
+        manifest = lese_manifest(ordner, lauf)
+        zeilen[lauf] = {'snapshots': manifest['snapshots'], 'beginn': manifest['beginn'],
+                        'ende': manifest['ende'], 'objective': manifest['objective'],
+                        **manifest['kennzahlen'], **manifest['metadaten']}
+    return pd.DataFrame.from_dict(zeilen, orient='index')
+
+
+def lese_zeitreihen(ordner: str, lauf: str, spalten: list = None) -> pd.DataFrame:
+    '''
+    Zeitreihen eines Laufs über Memory-Mapping; gelesen werden nur die angeforderten Spalten.
+
+    Parameter
+    ----------
+    spalten : list
+        Spaltennamen wie im Manifest, z.B. ['Store/e/Stromspeicher'] (None: alle)
+
+    Returns
+    -------
+    pd.DataFrame
+        Index = Snapshots
+    '''
+    auswahl = None if spalten is None else [INDEXSPALTE, *spalten]
+    tabelle = feather.read_table(os.path.join(ordner, lauf, DATEI_ZEITREIHEN), columns=auswahl, memory_map=True)
+    return tabelle.to_pandas().set_index(INDEXSPALTE)
+
+
+def lese_spalte(ordner: str, spalte: str, laeufe: list = None) -> pd.DataFrame:
+    '''
+    Eine Zeitreihe über viele Läufe.
+
+    Parameter
+    ----------
+    spalte : str
+        Spaltenname, z.B. 'Generator/p/Netz_Import'
+    laeufe : list
+        Namen der Läufe (Standard: alle Läufe im Ordner, die die Spalte enthalten)
+
+    Returns
+    -------
+    pd.DataFrame
+        Index = Snapshots, eine Spalte je Lauf
+    '''
+    if laeufe is None:
+        laeufe = [lauf for lauf in lese_laeufe(ordner).index if spalte in lese_manifest(ordner, lauf)['spalten']]
+    teile = {lauf: lese_zeitreihen(ordner, lauf, [spalte])[spalte] for lauf in laeufe}
+    return pd.DataFrame(teile)
+
+
+if __name__ == '__main__':
+    import tempfile
+    import time
+
+    from daten_cache import lade_zeitreihen
+    from netzwerk import NetzModell, ZukunftParameter, baue_zukunft
+
+    zeitreihen = lade_zeitreihen()
+    ordner = tempfile.mkdtemp()
+    modell = NetzModell(baue_zukunft(zeitreihen), ZukunftParameter(), zeitreihen)
+    for kosten in (0.10, 0.1361, 0.20):
+        modell.setze_parameter(netz_import_kosten=kosten)
+        modell.loese()
+        speichere_ergebnis(modell.network, ordner, f'import_{kosten:.4f}', {'netz_import_kosten': kosten})
+
+    start = time.perf_counter()
+    fuellstand = lese_spalte(ordner, 'Store/e/Waermespeicher')
+    print(f"Wärmespeicher aus {fuellstand.shape[1]} Läufen in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(lese_laeufe(ordner)[['netz_import_kosten', 'Gesamtkosten', 'Stromautarkie_prozent']].round(2))
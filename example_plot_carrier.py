@@ -3,6 +3,8 @@ import pandas as pd
 
 import matplotlib.pyplot as plt
 
+from solver import optimiere
+
 # 1. Setup (Simuliert, was in deinem Skript passiert)
 network = pypsa.Network()
 index = pd.date_range("2019-01-01", periods=24, freq="h")
@@ -21,7 +23,7 @@ network.add("Generator", "StromNetz", bus="StromBus", p_nom=100, marginal_cost=1
 network.add("Load", "HausLast", bus="StromBus", p_set=5)
 
 # 2. Lösen
-network.optimize(solver_name='gurobi') # oder glpk
+optimiere(network)  # Gurobi, HiGHS, CBC oder GLPK (solver.py)
 
 # 3. Plotten nach Carrier
 # Hier siehst du, warum 'carrier' nützlich ist: Wir gruppieren danach!
@@ -1,27 +1,21 @@
 """
 Konventionelles Gewächshaus-Modell mit PyPSA
-- Verwendet Gurobi als Optimizer
+- Einsatz direkt berechnet (direkter_einsatz.py), LP über solver.py nur als Rückfallebene
 - Heizlast aus heizlast_2019.csv
 - Strombedarf aus hourly_lamp_energy_2019.csv
 """
 
-import pypsa
-import pandas as pd
-import numpy as np
+from daten_cache import lade_zeitreihen
+from netzwerk import KonventionellParameter, baue_konventionell
+from direkter_einsatz import optimiere_schnell
 
 # ============================================================
 # 1. Daten einlesen
 # ============================================================
 
-# Heizlast einlesen
-df_heizlast = pd.read_csv('Abgabeordner Gruppe 9/heizlast_2019.csv', sep=',', encoding='utf-8')
-df_heizlast['datetime'] = pd.to_datetime(df_heizlast['MESS_DATUM'].astype(str), format='%Y%m%d%H')
-df_heizlast.set_index('datetime', inplace=True)
-
-# Strombedarf (Lampen) einlesen
-df_strombedarf = pd.read_csv('Abgabeordner Gruppe 9/hourly_lamp_energy_2019.csv', sep=';', encoding='utf-8')
-df_strombedarf['datetime'] = pd.to_datetime(df_strombedarf['DateTime'].astype(str), format='%Y%m%d%H')
-df_strombedarf.set_index('datetime', inplace=True)
+# Heizlast und Strombedarf (Lampen) einlesen
+# (beim ersten Aufruf aus den CSV-Dateien, danach aus dem Cache)
+zeitreihen = lade_zeitreihen(mit_cop=False, mit_wind=False)
 
 # ============================================================
 # 2. Parameter definieren
@@ -39,8 +33,8 @@ gas_cost_heat = gas_preis/gaskessel_wirkungsgrad
 # 3. Daten vorbereiten
 # ============================================================
 
-# Gemeinsamen Zeitindex erstellen
-zeitindex = df_heizlast.index.intersection(df_strombedarf.index)
+# Gemeinsamer Zeitindex (bereits beim Laden abgeglichen)
+zeitindex = zeitreihen.index
 
 # Nur die ersten 168 Stunden (1 Woche) für schnellere Tests
 # Kommentiere die nächste Zeile aus, um das ganze Jahr zu simulieren
@@ -51,8 +45,8 @@ print(f"Simulationszeitraum: {zeitindex[0]} bis {zeitindex[-1]}")
 print(f"Anzahl Zeitschritte: {len(zeitindex)}")
 
 # Zeitreihen auf Simulationszeitraum einschränken
-waermebedarf = df_heizlast.loc[zeitindex, 'Heizlast_kW']
-strombedarf = df_strombedarf.loc[zeitindex, 'Energy_kW']
+waermebedarf = zeitreihen.loc[zeitindex, 'Heizlast_kW']
+strombedarf = zeitreihen.loc[zeitindex, 'Energy_kW']
 
 # Datenübersicht
 print(f"\nMittlere Heizlast:     {waermebedarf.mean():>12.2f} kW")
@@ -66,48 +60,17 @@ print(f"\n")
 # 4. PyPSA-Netzwerk erstellen
 # ============================================================
 
-network = pypsa.Network()
-network.set_snapshots(zeitindex)
-
-# Busse
-network.add('Bus', name='Strom', carrier='strom')
-network.add('Bus', name='Waerme', carrier='waerme')
-network.add('Bus', 'Gas', carrier='gas')
-
-# Lasten
-network.add('Load', name='Stromlast', bus='Strom', p_set=strombedarf)
-network.add('Load', name='Waermelast', bus='Waerme', p_set=waermebedarf)
-
-# Netzstrom (Import aus öffentlichem Netz)
-network.add('Generator',
-            name='Stromimport',
-            bus='Strom',
-            p_nom = np.inf,
-            marginal_cost=strom_preis,
-            carrier='grid')
-
-# Gasversorgung
-network.add('Generator',
-            name='Gasimport',
-            bus='Gas',
-            p_nom = np.inf,
-            marginal_cost=gas_preis,
-            carrier='gas')
+parameter = KonventionellParameter(strom_preis=strom_preis, gas_preis=gas_preis,
+                                   gaskessel_wirkungsgrad=gaskessel_wirkungsgrad)
 
-# Gaskessel
-network.add("Link",
-            name="Gaskessel",
-            bus0="Gas",        
-            bus1="Waerme",     
-            p_nom=waermebedarf.max()/gaskessel_wirkungsgrad,
-            efficiency=gaskessel_wirkungsgrad,
-            carrier="gas")
+# Busse, Lasten, Strom-/Gasimport und Gaskessel (netzwerk.py)
+network = baue_konventionell(zeitreihen.loc[zeitindex], parameter)
 
 # ============================================================
-# 5. Optimierung mit Gurobi
+# 5. Optimierung (keine Freiheitsgrade: Einsatz = Last / Wirkungsgrad, sonst LP)
 # ============================================================
 
-network.optimize(solver_name='gurobi')
+optimiere_schnell(network)
 
 # ============================================================
 # 6. Ergebnisse ausgeben
@@ -0,0 +1,167 @@
+"""
+Lückenfüllung für DWD-Wetterdaten aus mehreren Stationen
+- Beliebig viele Stationen in fester Reihenfolge (Priorität)
+- Beliebig viele Messgrößen (z.B. TT_TU, RF_TU, FG_LBERG)
+- Fehlwerte (-999) werden in einem vektorisierten Schritt aus der ersten
+  Station mit gültigem Wert gefüllt
+- Verbleibende Lücken optional linear interpoliert, danach mit dem
+  vorherigen gültigen Wert gefüllt
+- Je Messgröße eine Spalte <Messgröße>_quelle mit der Herkunft des Werts
+
+Verwendung:
+    from luecken_fuellung import lese_dwd_station, fuelle_luecken
+    bochum = lese_dwd_station('Solareinstrahlung_Bochum.csv', ['FG_LBERG'])
+    bremen = lese_dwd_station('Solareinstrahlung_Bremen.csv', ['FG_LBERG'])
+    df = fuelle_luecken([bochum, bremen], ['FG_LBERG'], namen=['Bochum', 'Bremen'])
+"""
+
+import numpy as np
+import pandas as pd
+
+# Fehlwert-Kennung in den DWD-Dateien
+FEHLWERT = -999
+
+# Zeilen pro eingelesenem Block
+CHUNKSIZE = 200_000
+
+# Herkunftsbezeichnungen neben den Stationsnamen
+QUELLE_INTERPOLIERT = 'Interpoliert'
+QUELLE_VORWERT = 'Vorwert'
+
+
+def lese_dwd_station(pfad: str, variablen: list, datum_spalte: str = 'MESS_DATUM',
+                     chunksize: int = CHUNKSIZE) -> pd.DataFrame:
+    '''
+    Liest ausgewählte Messgrößen einer stündlichen DWD-Stationsdatei blockweise ein.
+
+    Parameter
+    ----------
+    pfad : str
+        Pfad zur DWD-Datei (Semikolon-getrennt)
+    variablen : list
+        Spaltennamen der Messgrößen, z.B. ['TT_TU', 'RF_TU']
+    datum_spalte : str
+        Spalte mit dem Zeitstempel im Format YYYYMMDDHH(:MM)
+    chunksize : int
+        Anzahl Zeilen pro Block
+
+    Returns
+    -------
+    pd.DataFrame
+        Messgrößen als float mit Datetime-Index (volle Stunde);
+        -999 bleibt erhalten, nicht lesbare Werte sind NaN
+    '''
+    gesucht = {datum_spalte, *variablen}
+    teile = []
+    for chunk in pd.read_csv(pfad, sep=';', dtype=str, encoding='utf-8', chunksize=chunksize,
+                             usecols=lambda spalte: spalte.strip() in gesucht):
+        chunk.columns = chunk.columns.str.strip()
+
+        # Nur das Datum und die Stunde auswerten (ersten 10 Zeichen)
+        timestamp = pd.to_datetime(chunk[datum_spalte].str.strip().str[:10],
+                                   format='%Y%m%d%H', errors='coerce')
+        teil = pd.DataFrame(
+            {v: pd.to_numeric(chunk[v].str.strip().str.replace(',', '.'), errors='coerce').to_numpy(dtype='float64')
+             for v in variablen},
+            index=pd.DatetimeIndex(timestamp))
+        teile.append(teil[teil.index.notna()])
+
+    df = pd.concat(teile)
+    # Doppelte Zeitstempel: letzter Eintrag gilt
+    df = df[~df.index.duplicated(keep='last')]
+    return df.sort_index()
+
+
+def fuelle_luecken(stationen: list, variablen: list, namen: list = None,
+                   interpolieren: bool = False, max_luecke: int = None,
+                   startwert: float = 0.0, zeitindex: pd.DatetimeIndex = None) -> pd.DataFrame:
+    '''
+    Füllt Fehlwerte mit einer Prioritätsreihenfolge über mehrere Stationen.
+
+    Für jede Stunde und Messgröße wird der Wert der ersten Station in der
+    Liste genommen, die dort einen gültigen Wert hat (nicht -999, nicht NaN).
+    Hat keine Station einen Wert, wird optional interpoliert und sonst der
+    vorherige gültige Wert verwendet (am Anfang der Zeitreihe: startwert).
+
+    Parameter
+    ----------
+    stationen : list
+        DataFrames mit Datetime-Index (z.B. aus lese_dwd_station), höchste Priorität zuerst
+    variablen : list
+        Zu füllende Messgrößen
+    namen : list
+        Stationsnamen für die Herkunftsspalte (Standard: Station_0, Station_1, ...)
+    interpolieren : bool
+        Lücken ohne Stationswert linear interpolieren
+    max_luecke : int
+        Maximale Länge einer interpolierten Lücke in Stunden (None = unbegrenzt)
+    startwert : float
+        Wert, falls schon die ersten Stunden keinen gültigen Wert haben
+    zeitindex : pd.DatetimeIndex
+        Zeitstempel des Ergebnisses (Standard: Zeitstempel der ersten Station)
+
+    Returns
+    -------
+    pd.DataFrame
+        Je Messgröße die gefüllte Spalte und <Messgröße>_quelle (kategorisch)
+    '''
+    if not stationen:
+        raise ValueError("Mindestens eine Station angeben.")
+    if namen is None:
+        namen = [f'Station_{i}' for i in range(len(stationen))]
+    if len(namen) != len(stationen):
+        raise ValueError("Anzahl Namen und Stationen stimmt nicht überein.")
+
+    if zeitindex is None:
+        zeitindex = stationen[0].index
+
+    kategorien = list(namen) + [QUELLE_INTERPOLIERT, QUELLE_VORWERT]
+    code_interpoliert = len(namen)
+    code_vorwert = len(namen) + 1
+
+    ergebnis = {}
+    for variable in variablen:
+        # Matrix Stationen x Stunden, fehlende Stunden einer Station sind NaN
+        werte = np.vstack([
+            station[variable].reindex(zeitindex).to_numpy(dtype='float64')
+            if variable in station.columns else np.full(len(zeitindex), np.nan)
+            for station in stationen
+        ])
+        gueltig = ~np.isnan(werte) & (werte != FEHLWERT)
+
+        # Erste Station mit gültigem Wert (Prioritäts-Merge in einem Schritt)
+        erste = gueltig.argmax(axis=0)
+        hat_wert = gueltig.any(axis=0)
+        gefuellt = np.where(hat_wert, werte[erste, np.arange(len(zeitindex))], np.nan)
+        quelle = np.where(hat_wert, erste, code_vorwert).astype(np.int16)
+
+        reihe = pd.Series(gefuellt, index=zeitindex)
+        if interpolieren:
+            interpoliert = reihe.interpolate(method='time', limit_area='inside')
+            if max_luecke is not None:
+                # Längere Lücken ganz auslassen (limit würde deren Anfang füllen)
+                interpoliert[_lueckenlaenge(np.isnan(gefuellt)) > max_luecke] = np.nan
+            quelle[np.isnan(gefuellt) & interpoliert.notna().to_numpy()] = code_interpoliert
+            reihe = interpoliert
+
+        # Verbleibende Lücken mit dem vorherigen gültigen Wert füllen
+        reihe = reihe.ffill().fillna(startwert)
+
+        ergebnis[variable] = reihe.to_numpy()
+        ergebnis[f'{variable}_quelle'] = pd.Categorical.from_codes(quelle, categories=kategorien)
+
+    return pd.DataFrame(ergebnis, index=zeitindex)
+
+
+def _lueckenlaenge(fehlt: np.ndarray) -> np.ndarray:
+    # Länge der zusammenhängenden Lücke je Stunde (0 für vorhandene Werte)
+    grenzen = np.flatnonzero(np.diff(np.concatenate([[False], fehlt, [False]]).astype(np.int8)))
+    laengen = grenzen[1::2] - grenzen[::2]
+    laenge = np.zeros(len(fehlt), dtype=np.int64)
+    laenge[fehlt] = np.repeat(laengen, laengen)
+    return laenge
+
+
+def herkunft_statistik(df: pd.DataFrame, variable: str) -> pd.Series:
+    '''Anzahl der Werte je Herkunft (Station, Interpoliert, Vorwert) für eine Messgröße.'''
+    return df[f'{variable}_quelle'].value_counts(sort=False)
@@ -0,0 +1,424 @@
+"""
+Aufbau der PyPSA-Netzwerke (Konventionell und Zukunftssystem)
+- Parameter als Dataclass (Standardwerte wie in gh_konventionell.py / Zukunftssystem.py);
+  Preise fest in €/kWh oder als Zeitreihe je Snapshot (tarife.py)
+- baue_konventionell / baue_zukunft erzeugen das Netzwerk aus den Zeitreihen
+  (Spalten wie daten_cache.lade_zeitreihen: Heizlast_kW, Energy_kW, COP, Wind_kW)
+- NetzModell baut das Optimierungsmodell (linopy) einmal auf; Kosten,
+  Verluste, Wirkungsgrade, Lasten und Grenzen werden danach direkt im
+  Modell geändert und neu gelöst, ohne die Nebenbedingungen neu zu erzeugen
+
+Verwendung:
+    from netzwerk import ZukunftParameter, NetzModell, baue_zukunft
+    modell = NetzModell(baue_zukunft(zeitreihen), ZukunftParameter(), zeitreihen)
+    modell.loese()
+    modell.setze_parameter(netz_import_kosten=0.20, capital_cost_stromspeicher=30)
+    modell.loese()
+"""
+
+from dataclasses import dataclass, replace
+
+import numpy as np
+import pandas as pd
+import pypsa
+import xarray as xr
+from linopy import LinearExpression
+
+from solver import solver_optionen as optionen_fuer, waehle_solver
+from windkraft import p_max_pu_aus_leistung
+
+
+# ============================================================
+# Parameter
+# ============================================================
+
+@dataclass
+class KonventionellParameter:
+    strom_preis: float = 0.1361                 # €/kWh (oder pd.Series je Snapshot, tarife.py)
+    gas_preis: float = 0.03                     # €/kWh (oder pd.Series je Snapshot, tarife.py)
+    gaskessel_wirkungsgrad: float = 0.95
+
+    def komponentenwerte(self, zeitreihen: pd.DataFrame) -> list:
+        '''(Komponente, Name, Attribut, Wert) für alle von den Parametern abhängigen Werte.'''
+        return [
+            ('Generator', 'Stromimport', 'marginal_cost', self.strom_preis),
+            ('Generator', 'Gasimport', 'marginal_cost', self.gas_preis),
+            ('Link', 'Gaskessel', 'efficiency', self.gaskessel_wirkungsgrad),
+            ('Link', 'Gaskessel', 'p_nom', zeitreihen['Heizlast_kW'].max() / self.gaskessel_wirkungsgrad),
+        ]
+
+
+@dataclass
+class ZukunftParameter:
+    # Windkraftanlage
+    capital_cost_wind: float = 100              # €/kW/a als Annuität
+    wind_lifetime: float = 20                   # Jahre
+    wind_nennleistung_vergleichsanlage: float = 6000   # kW
+    # Stromspeicher
+    capital_cost_stromspeicher: float = 45      # €/kWh/a als Annuität
+    stromspeicher_lifetime: float = 15
+    stromspeicher_standing_loss: float = 0.0001  # Verlust pro Stunde
+    # Wärmepumpe
+    capital_cost_wp: float = 38                 # €/kW/a als Annuität
+    wp_lifetime: float = 20
+    # Wärmespeicher
+    capital_cost_waermespeicher: float = 2      # €/kWh/a als Annuität
+    waermespeicher_lifetime: float = 25
+    waermespeicher_standing_loss: float = 0.005  # Verlust pro Stunde
+    # Stromnetz
+    netz_import_kosten: float = 0.1361          # €/kWh (oder pd.Series je Snapshot, tarife.py)
+
+    def komponentenwerte(self, zeitreihen: pd.DataFrame) -> list:
+        '''(Komponente, Name, Attribut, Wert) für alle von den Parametern abhängigen Werte.'''
+        return [
+            ('Generator', 'Windkraftanlage', 'capital_cost', self.capital_cost_wind),
+            ('Generator', 'Windkraftanlage', 'lifetime', self.wind_lifetime),
+            ('Generator', 'Windkraftanlage', 'p_max_pu',
+             p_max_pu_aus_leistung(zeitreihen['Wind_kW'], self.wind_nennleistung_vergleichsanlage)),
+            ('Store', 'Stromspeicher', 'capital_cost', self.capital_cost_stromspeicher),
+            ('Store', 'Stromspeicher', 'lifetime', self.stromspeicher_lifetime),
+            ('Store', 'Stromspeicher', 'standing_loss', self.stromspeicher_standing_loss),
+            ('Link', 'Waermepumpe', 'capital_cost', self.capital_cost_wp),
+            ('Link', 'Waermepumpe', 'lifetime', self.wp_lifetime),
+            ('Store', 'Waermespeicher', 'capital_cost', self.capital_cost_waermespeicher),
+            ('Store', 'Waermespeicher', 'lifetime', self.waermespeicher_lifetime),
+            ('Store', 'Waermespeicher', 'standing_loss', self.waermespeicher_standing_loss),
+            ('Generator', 'Netz_Import', 'marginal_cost', self.netz_import_kosten),
+        ]
+
+
+# ============================================================
+# Netzwerke
+# ============================================================
+
+def preis_je_snapshot(preis, snapshots: pd.Index):
+    '''
+    Fester Preis unverändert, Preiszeitreihe auf die Snapshots des Netzwerks gebracht.
+
+    Raises
+    ------
+    ValueError
+        Wenn die Zeitreihe nicht alle Snapshots abdeckt
+    '''
+    if not isinstance(preis, pd.Series):
+        return preis
+    werte = preis.reindex(snapshots)
+    if werte.isna().any():
+        raise ValueError(f"Preiszeitreihe '{preis.name}' deckt {int(werte.isna().sum())} Snapshots nicht ab.")
+    return werte
+
+
+def baue_konventionell(zeitreihen: pd.DataFrame, parameter: KonventionellParameter = None) -> pypsa.Network:
+    '''Konventionelles Gewächshaus: Netzstrom für die Lampen, Gaskessel für die Wärme.'''
+    p = parameter or KonventionellParameter()
+    waermebedarf = zeitreihen['Heizlast_kW']
+
+    network = pypsa.Network()
+    network.set_snapshots(zeitreihen.index)
+
+    network.add('Bus', name='Strom', carrier='strom')
+    network.add('Bus', name='Waerme', carrier='waerme')
+    network.add('Bus', name='Gas', carrier='gas')
+
+    network.add('Load', name='Stromlast', bus='Strom', p_set=zeitreihen['Energy_kW'])
+    network.add('Load', name='Waermelast', bus='Waerme', p_set=waermebedarf)
+
+    network.add('Generator', name='Stromimport', bus='Strom',
+                p_nom=np.inf, marginal_cost=preis_je_snapshot(p.strom_preis, network.snapshots), carrier='grid')
+    network.add('Generator', name='Gasimport', bus='Gas',
+                p_nom=np.inf, marginal_cost=preis_je_snapshot(p.gas_preis, network.snapshots), carrier='gas')
+    network.add('Link', name='Gaskessel', bus0='Gas', bus1='Waerme',
+                p_nom=waermebedarf.max() / p.gaskessel_wirkungsgrad,
+                efficiency=p.gaskessel_wirkungsgrad, carrier='gas')
+    return network
+
+
+def baue_zukunft(zeitreihen: pd.DataFrame, parameter: ZukunftParameter = None) -> pypsa.Network:
+    '''Zukunftssystem: Windkraft, Strom- und Wärmespeicher, Wärmepumpe, Netzimport als Backup.'''
+    p = parameter or ZukunftParameter()
+
+    network = pypsa.Network()
+    network.set_snapshots(zeitreihen.index)
+
+    network.add('Bus', name='Strom', carrier='strom')
+    network.add('Bus', name='Waerme', carrier='waerme')
+
+    network.add('Load', name='Stromlast', bus='Strom', p_set=zeitreihen['Energy_kW'])
+    network.add('Load', name='Waermelast', bus='Waerme', p_set=zeitreihen['Heizlast_kW'])
+
+    network.add('Generator', name='Windkraftanlage', bus='Strom', p_nom_extendable=True,
+                p_max_pu=p_max_pu_aus_leistung(zeitreihen['Wind_kW'], p.wind_nennleistung_vergleichsanlage),
+                capital_cost=p.capital_cost_wind, lifetime=p.wind_lifetime, carrier='wind')
+    network.add('Store', name='Stromspeicher', bus='Strom', e_nom_extendable=True,
+                capital_cost=p.capital_cost_stromspeicher, lifetime=p.stromspeicher_lifetime,
+                standing_loss=p.stromspeicher_standing_loss, e_cyclic=True)
+    network.add('Link', name='Waermepumpe', bus0='Strom', bus1='Waerme',
+                efficiency=zeitreihen['COP'], p_nom_extendable=True,
+                capital_cost=p.capital_cost_wp, lifetime=p.wp_lifetime)
+    network.add('Store', name='Waermespeicher', bus='Waerme', e_nom_extendable=True,
+                capital_cost=p.capital_cost_waermespeicher, standing_loss=p.waermespeicher_standing_loss,
+                e_cyclic=True, lifetime=p.waermespeicher_lifetime)
+    network.add('Generator', name='Netz_Import', bus='Strom', p_nom_extendable=True,
+                marginal_cost=preis_je_snapshot(p.netz_import_kosten, network.snapshots), carrier='grid')
+    return network
+
+
+# ============================================================
+# Modell mit Aktualisierung ohne Neuaufbau
+# ============================================================
+
+def zeitreihe(network, komponente, name, attribut) -> pd.Series:
+    '''Statischer oder zeitabhängiger Wert einer Komponente als Series über die Snapshots.'''
+    c = network.components[komponente]
+    dynamisch = c.dynamic[attribut] if attribut in c.dynamic else None
+    if dynamisch is not None and name in dynamisch.columns:
+        return dynamisch[name]
+    return pd.Series(c.static.at[name, attribut], index=network.snapshots)
+
+
+def _als_dataarray(werte: pd.Series, name: str) -> xr.DataArray:
+    # Series über die Snapshots -> DataArray (snapshot, name)
+    return xr.DataArray(werte.to_numpy(dtype=float)[:, None],
+                        coords={'snapshot': werte.index, 'name': [name]}, dims=['snapshot', 'name'])
+
+
+def setze_koeffizient(constraint, labels: xr.DataArray, werte: xr.DataArray):
+    '''Ersetzt in einer linopy-Nebenbedingung den Koeffizienten der Variablen `labels` durch `werte`.'''
+    labels = labels.reindex_like(constraint.vars.isel(_term=0), fill_value=-1)
+    werte = werte.reindex_like(labels)
+    treffer = constraint.vars == labels
+    constraint.update(coeffs=xr.where(treffer, werte, constraint.coeffs).transpose(*constraint.coeffs.dims))
+
+
+class NetzModell:
+    '''
+    PyPSA-Netzwerk mit einmal aufgebautem Optimierungsmodell.
+
+    Änderbar ohne Neuaufbau: capital_cost, marginal_cost (Zielfunktion),
+    standing_loss (Store), p_max_pu (Generator), efficiency (Link),
+    p_set (Load), e_initial (nicht zyklischer Store), p_nom fester
+    Komponenten sowie p_nom_min/p_nom_max bzw. e_nom_min/e_nom_max
+    erweiterbarer Komponenten. lifetime wird nur im Netzwerk gesetzt
+    (keine Wirkung auf das Modell).
+    '''
+
+    def __init__(self, network: pypsa.Network, parameter=None, zeitreihen: pd.DataFrame = None):
+        self.network = network
+        self.parameter = parameter
+        self.zeitreihen = zeitreihen
+        self.model = network.optimize.create_model(include_objective_constant=False)
+
+    def setze(self, komponente: str, name: str, attribut: str, wert):
+        '''Setzt ein Attribut im Netzwerk und überträgt es in das Optimierungsmodell.'''
+        n = self.network
+        alt_p_set = zeitreihe(n, komponente, name, attribut) if attribut == 'p_set' else None
+        c = n.components[komponente]
+        if isinstance(wert, pd.Series):
+            c.dynamic[attribut].loc[:, name] = wert.reindex(n.snapshots).to_numpy()
+        else:
+            if attribut in c.dynamic and name in c.dynamic[attribut].columns:
+                c.dynamic[attribut].drop(columns=name, inplace=True)
+            c.static.at[name, attribut] = wert
+
+        if attribut == 'lifetime':
+            return
+        if attribut == 'capital_cost':
+            self._aktualisiere_investition(komponente, name)
+        elif attribut == 'marginal_cost':
+            self._aktualisiere_betrieb(komponente, name)
+        elif attribut == 'standing_loss' and komponente == 'Store':
+            self._aktualisiere_standing_loss(name)
+        elif attribut == 'p_max_pu':
+            self._aktualisiere_leistungsgrenze(komponente, name)
+        elif attribut == 'p_nom' and not n.components[komponente].static.at[name, 'p_nom_extendable']:
+            self._aktualisiere_leistungsgrenze(komponente, name)
+        elif attribut == 'efficiency' and komponente == 'Link':
+            self._aktualisiere_wirkungsgrad(name)
+        elif attribut == 'p_set' and komponente == 'Load':
+            bus = n.loads.at[name, 'bus']
+            differenz = zeitreihe(n, 'Load', name, 'p_set') - alt_p_set
+            c = self.model.constraints['Bus-nodal_balance']
+            c.update(rhs=c.rhs + _als_dataarray(differenz, bus).reindex_like(c.rhs, fill_value=0.0))
+        elif attribut == 'e_initial' and komponente == 'Store':
+            self._aktualisiere_startwert(name)
+        elif attribut in ('p_nom_max', 'e_nom_max', 'p_nom_min', 'e_nom_min'):
+            self._aktualisiere_ausbaugrenze(komponente, name, attribut)
+        else:
+            raise ValueError(f"{komponente}.{attribut} kann nicht im bestehenden Modell geändert werden.")
+
+    def setze_parameter(self, parameter=None, **aenderungen):
+        '''
+        Übernimmt einen neuen Parametersatz (oder einzelne Felder) in Netzwerk und Modell.
+
+        Nur Werte, die sich gegenüber dem aktuellen Parametersatz ändern, werden übertragen.
+        '''
+        neu = parameter if parameter is not None else replace(self.parameter, **aenderungen)
+        alt = {(k, name, attr): wert for k, name, attr, wert in self.parameter.komponentenwerte(self.zeitreihen)}
+        for komponente, name, attribut, wert in neu.komponentenwerte(self.zeitreihen):
+            bisher = alt.get((komponente, name, attribut))
+            if bisher is not None and np.array_equal(np.asarray(bisher), np.asarray(wert)):
+                continue
+            self.setze(komponente, name, attribut, wert)
+        self.parameter = neu
+
+    def loese(self, solver_name: str = None, **solver_optionen) -> tuple:
+        '''
+        Löst das (ggf. geänderte) Modell und schreibt die Ergebnisse in das Netzwerk.
+
+        Solver und Optionen über solver.py (Standard: bester verfügbarer Solver).
+        '''
+        name = waehle_solver(solver_name)
+        return self.network.optimize.solve_model(solver_name=name,
+                                                 solver_options=optionen_fuer(name, **solver_optionen))
+
+    # --------------------------------------------------------
+    # Übertragung einzelner Attribute in das linopy-Modell
+    # --------------------------------------------------------
+
+    def _setze_zielfunktion(self, variable: str, name: str, werte: xr.DataArray):
+        # Terme der Variablen ersetzen (fehlende Terme, z.B. bisher Kosten 0, werden ergänzt)
+        m = self.model
+        var = m.variables[variable].sel(name=[name])
+        ausdruck = m.objective.expression
+        behalten = ~np.isin(ausdruck.vars.values, var.labels.values.ravel())
+        rest = LinearExpression(ausdruck.data.isel(_term=np.nonzero(behalten)[0]), m)
+        m.objective = rest + (werte * var).sum()
+
+    def _aktualisiere_investition(self, komponente, name):
+        n = self.network
+        groesse = 'e_nom' if komponente == 'Store' else 'p_nom'
+        if not n.components[komponente].static.at[name, f'{groesse}_extendable']:
+            return
+        kosten = xr.DataArray([float(n.components[komponente].static.at[name, 'capital_cost'])],
+                              coords={'name': [name]}, dims=['name'])
+        self._setze_zielfunktion(f'{komponente}-{groesse}', name, kosten)
+
+    def _aktualisiere_betrieb(self, komponente, name):
+        n = self.network
+        gewichtung = n.snapshot_weightings.objective
+        kosten = zeitreihe(n, komponente, name, 'marginal_cost') * gewichtung
+        self._setze_zielfunktion(f'{komponente}-p', name, _als_dataarray(kosten, name))
+
+    def _aktualisiere_standing_loss(self, name):
+        # e_t = (1 - standing_loss)^w · e_(t-1) + ...  (zyklisch: e_(-1) = e_(T-1))
+        n, m = self.network, self.model
+        verlust = zeitreihe(n, 'Store', name, 'standing_loss')
+        faktor = (1 - verlust) ** n.snapshot_weightings.stores
+        if not n.stores.at[name, 'e_cyclic']:
+            # nicht zyklisch: erster Snapshot ohne Vorgänger (Startwert e_initial in der rechten Seite)
+            faktor.iloc[0] = 0.0
+        labels = m.variables['Store-e'].labels.sel(name=[name]).roll(snapshot=1, roll_coords=False)
+        setze_koeffizient(m.constraints['Store-energy_balance'], labels, _als_dataarray(faktor, name))
+
+    def _aktualisiere_startwert(self, name):
+        # nicht zyklisch: e_0 - ... = e_initial (rechte Seite im ersten Snapshot, ohne Verlustfaktor)
+        n = self.network
+        if n.stores.at[name, 'e_cyclic']:
+            return
+        c = self.model.constraints['Store-energy_balance']
+        rhs = c.rhs.copy()
+        rhs.loc[{'snapshot': n.snapshots[0], 'name': name}] = -float(n.stores.at[name, 'e_initial'])
+        c.update(rhs=rhs)
+
+    def _aktualisiere_leistungsgrenze(self, komponente, name):
+        n, m = self.network, self.model
+        p_max_pu = zeitreihe(n, komponente, name, 'p_max_pu')
+        if n.components[komponente].static.at[name, 'p_nom_extendable']:
+            # p - p_max_pu · p_nom <= 0
+            labels = m.variables[f'{komponente}-p_nom'].labels.sel(name=[name])
+            labels = labels.expand_dims(snapshot=n.snapshots).transpose('snapshot', 'name')
+            setze_koeffizient(m.constraints[f'{komponente}-ext-p-upper'], labels,
+                              _als_dataarray(-p_max_pu, name))
+        else:
+            # p <= p_nom · p_max_pu  und  p >= p_nom · p_min_pu
+            p_nom = float(n.components[komponente].static.at[name, 'p_nom'])
+            p_min_pu = zeitreihe(n, komponente, name, 'p_min_pu')
+            for grenze, pu in (('upper', p_max_pu), ('lower', p_min_pu)):
+                c = m.constraints[f'{komponente}-fix-p-{grenze}']
+                rhs = c.rhs.copy()
+                rhs.loc[{'name': name}] = (p_nom * pu).to_numpy()
+                c.update(rhs=rhs)
+
+    def _aktualisiere_wirkungsgrad(self, name):
+        # Koeffizient von Link-p in der Bilanz von bus1
+        n, m = self.network, self.model
+        bus1 = n.links.at[name, 'bus1']
+        effizienz = zeitreihe(n, 'Link', name, 'efficiency')
+        labels = m.variables['Link-p'].labels.sel(name=[name]).assign_coords(name=[bus1])
+        setze_koeffizient(m.constraints['Bus-nodal_balance'], labels, _als_dataarray(effizienz, bus1))
+
+    def _aktualisiere_ausbaugrenze(self, komponente, name, attribut):
+        m = self.model
+        groesse, grenze = attribut.rsplit('_', 1)
+        wert = float(self.network.components[komponente].static.at[name, attribut])
+        variable = m.variables[f'{komponente}-{groesse}']
+        if grenze == 'max':
+            obere = variable.upper.copy()
+            obere.loc[{'name': name}] = wert
+            variable.upper = obere
+        else:
+            c = m.constraints[f'{komponente}-ext-{groesse}-lower']
+            rhs = c.rhs.copy()
+            rhs.loc[{'name': name}] = wert
+            c.update(rhs=rhs)
+
+
+def kennzahlen(network: pypsa.Network) -> dict:
+    '''
+    Kennzahlen eines gelösten Netzwerks (wie in Zukunftssystem.py / gh_konventionell.py).
+
+    Returns
+    -------
+    dict
+        p_nom_opt_<Name> (Generatoren, Links), e_nom_opt_<Name> (Speicher),
+        Investitionskosten/Betriebskosten/Gesamtkosten in €/a,
+        Netzimport_kWh und Stromautarkie_prozent (Windkraft / Stromlast)
+    '''
+    ergebnis = {}
+    investition = 0.0
+    for komponente, groesse in (('Generator', 'p_nom'), ('Link', 'p_nom'), ('Store', 'e_nom')):
+        static = network.components[komponente].static
+        for name in static.index:
+            ergebnis[f'{groesse}_opt_{name}'] = static.at[name, f'{groesse}_opt']
+        erweiterbar = static[f'{groesse}_extendable']
+        investition += (static[f'{groesse}_opt'] * static['capital_cost'])[erweiterbar].sum()
+
+    gewichtung = network.snapshot_weightings.objective
+    erzeugung = network.generators_t.p
+    marginal = network.get_switchable_as_dense('Generator', 'marginal_cost')
+    betrieb = (erzeugung * marginal).mul(gewichtung, axis=0).sum().sum()
+
+    # Energiemengen mit der Snapshot-Gewichtung (z.B. Typtage) hochrechnen
+    energie = erzeugung.mul(network.snapshot_weightings.generators, axis=0).sum()
+    import_generatoren = network.generators.index[network.generators.carrier == 'grid']
+    strom_last = network.loads_t.p['Stromlast'].mul(network.snapshot_weightings.generators).sum()
+    wind = energie.get('Windkraftanlage', 0.0)
+
+    ergebnis.update({
+        'Investitionskosten': investition,
+        'Betriebskosten': betrieb,
+        'Gesamtkosten': investition + betrieb,
+        'Netzimport_kWh': energie[import_generatoren].sum(),
+        'Stromautarkie_prozent': wind / strom_last * 100 if strom_last > 0 else 0.0,
+    })
+    return ergebnis
+
+
+if __name__ == '__main__':
+    import time
+
+    from daten_cache import lade_zeitreihen
+
+    zeitreihen = lade_zeitreihen()
+
+    start = time.perf_counter()
+    modell = NetzModell(baue_zukunft(zeitreihen), ZukunftParameter(), zeitreihen)
+    print(f"Modellaufbau: {time.perf_counter() - start:.2f} s")
+
+    for kosten in [0.1361, 0.20, 0.30]:
+        start = time.perf_counter()
+        modell.setze_parameter(netz_import_kosten=kosten)
+        aenderung = time.perf_counter() - start
+        modell.loese()
+        print(f"netz_import_kosten = {kosten:.4f} €/kWh: Änderung {aenderung:.3f} s, "
+              f"Gesamtkosten {modell.network.objective:,.0f} €/a")
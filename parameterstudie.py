@@ -0,0 +1,231 @@
+"""
+Parameterstudie für Zukunftssystem und konventionelles Gewächshaus
+- Entwürfe als Raster (alle Kombinationen) oder Stichprobe (Latin Hypercube)
+- Läufe verteilt auf einen lokalen Prozesspool (Standard: alle Kerne)
+- Zeitreihen liegen einmal im Shared Memory und werden von allen Prozessen
+  nur gelesen (keine Kopie je Lauf)
+- Jeder Prozess baut die Modelle einmal auf und ändert danach nur noch die
+  Parameter im bestehenden Modell (netzwerk.NetzModell)
+- Konventionelle Läufe mit gleichen Parametern werden nur einmal gerechnet,
+  ohne LP über direkter_einsatz (Einsatz durch die Lasten bestimmt)
+- Ergebnis: eine Tabelle mit einer Zeile je Lauf und System; optional
+  zusätzlich die Zeitreihen jedes Laufs spaltenweise (ergebnis_export)
+
+Verwendung:
+    from parameterstudie import parameter_raster, fuehre_studie_aus
+    entwuerfe = parameter_raster(capital_cost_stromspeicher=[20, 45, 70],
+                                 netz_import_kosten=[0.10, 0.1361, 0.20])
+    ergebnis = fuehre_studie_aus(entwuerfe)
+    ergebnis = fuehre_studie_aus(entwuerfe, ablage='ergebnisse/studie')   # mit Zeitreihen je Lauf
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import fields, replace
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+
+from direkter_einsatz import direkt_loesbar, loese_direkt
+from netzwerk import (KonventionellParameter, NetzModell, ZukunftParameter, baue_konventionell,
+                      baue_zukunft, kennzahlen)
+from solver import waehle_solver
+
+SYSTEME = {
+    'Zukunft': (ZukunftParameter, baue_zukunft),
+    'Konventionell': (KonventionellParameter, baue_konventionell),
+}
+
+# Zustand je Arbeitsprozess (in _initialisiere gesetzt)
+_speicher = None
+_zeitreihen = None
+_modelle = {}
+_solver = None
+_ablage = None
+
+
+def parameter_raster(**werte) -> pd.DataFrame:
+    '''
+    Alle Kombinationen der angegebenen Parameterwerte.
+
+    Beispiel: parameter_raster(capital_cost_wind=[80, 100], netz_import_kosten=[0.1, 0.2]) -> 4 Entwürfe
+    '''
+    index = pd.MultiIndex.from_product(list(werte.values()), names=list(werte))
+    return index.to_frame(index=False)
+
+
+def parameter_stichprobe(grenzen: dict, anzahl: int, seed: int = None) -> pd.DataFrame:
+    '''
+    Latin-Hypercube-Stichprobe: jeder Parameter wird in `anzahl` gleich breite
+    Intervalle geteilt und jedes Intervall genau einmal getroffen.
+
+    Parameter
+    ----------
+    grenzen : dict
+        Parametername -> (untere Grenze, obere Grenze)
+    anzahl : int
+        Anzahl Entwürfe
+    seed : int
+        Startwert des Zufallsgenerators
+    '''
+    rng = np.random.default_rng(seed)
+    spalten = {}
+    for name, (unten, oben) in grenzen.items():
+        anteil = (rng.permutation(anzahl) + rng.random(anzahl)) / anzahl
+        spalten[name] = unten + anteil * (oben - unten)
+    return pd.DataFrame(spalten)
+
+
+def _initialisiere(name, form, spalten, index, solver_name, solver_optionen, ablage=None):
+    # Zeitreihen aus dem Shared Memory einbinden (nur lesend, ohne Kopie)
+    global _speicher, _zeitreihen, _solver, _ablage
+    _speicher = shared_memory.SharedMemory(name=name)
+    werte = np.ndarray(form, dtype=np.float64, buffer=_speicher.buf)
+    werte.flags.writeable = False
+    _zeitreihen = pd.DataFrame(werte, index=index, columns=spalten, copy=False)
+    _solver = (solver_name, solver_optionen)
+    _ablage = ablage
+    _modelle.clear()
+
+
+def _speichere(ergebnis, network, system, lauf, werte):
+    # Kennzahlen übernehmen, Zeitreihen optional ablegen
+    ergebnis.update(kennzahlen(network))
+    if _ablage:
+        from ergebnis_export import speichere_ergebnis
+        speichere_ergebnis(network, _ablage, f'{system}_{lauf:05d}', {'system': system, **werte})
+
+
+def _fuehre_lauf(aufgabe) -> dict:
+    lauf, system, werte = aufgabe
+    klasse, baue = SYSTEME[system]
+    ergebnis = {'lauf': lauf, 'system': system, **werte}
+    try:
+        if system == 'Konventionell':
+            network = baue(_zeitreihen, replace(klasse(), **werte))
+            if direkt_loesbar(network):
+                status, bedingung = loese_direkt(network)
+                ergebnis.update(status=status, bedingung=bedingung)
+                if status == 'ok':
+                    _speichere(ergebnis, network, system, lauf, werte)
+                return ergebnis
+        if system not in _modelle:
+            standard = klasse()
+            _modelle[system] = NetzModell(baue(_zeitreihen, standard), standard, _zeitreihen)
+        modell = _modelle[system]
+        modell.setze_parameter(replace(klasse(), **werte))
+        status, bedingung = modell.loese(_solver[0], **_solver[1])
+        ergebnis.update(status=status, bedingung=bedingung)
+        if status == 'ok':
+            _speichere(ergebnis, modell.network, system, lauf, werte)
+    except Exception as fehler:
+        # Einzelne Läufe dürfen fehlschlagen, ohne die Studie abzubrechen;
+        # das Modell des Prozesses wird beim nächsten Lauf neu aufgebaut
+        _modelle.pop(system, None)
+        ergebnis.update(status='fehler', bedingung=f'{type(fehler).__name__}: {fehler}')
+    return ergebnis
+
+
+def _aufgaben(entwuerfe: pd.DataFrame, systeme) -> tuple:
+    # Läufe je System; konventionelle Läufe nur je verschiedener Parameterkombination
+    bekannt = set()
+    for system in systeme:
+        bekannt |= {feld.name for feld in fields(SYSTEME[system][0])}
+    unbekannt = set(entwuerfe.columns) - bekannt
+    if unbekannt:
+        raise ValueError(f"Unbekannte Parameter: {sorted(unbekannt)}")
+
+    aufgaben, zuordnung = [], {}
+    for system in systeme:
+        spalten = [feld.name for feld in fields(SYSTEME[system][0]) if feld.name in entwuerfe.columns]
+        if system == 'Zukunft':
+            for lauf, zeile in zip(entwuerfe.index, entwuerfe[spalten].to_dict('records')):
+                aufgaben.append((lauf, system, zeile))
+        else:
+            eindeutig = entwuerfe[spalten].drop_duplicates()
+            for lauf, zeile in zip(eindeutig.index, eindeutig.to_dict('records')):
+                aufgaben.append((lauf, system, zeile))
+            zuordnung[system] = spalten
+    return aufgaben, zuordnung
+
+
+def fuehre_studie_aus(entwuerfe: pd.DataFrame, zeitreihen: pd.DataFrame = None,
+                      systeme=('Zukunft', 'Konventionell'), prozesse: int = None,
+                      ablage: str = None, solver_name: str = None, **solver_optionen) -> pd.DataFrame:
+    '''
+    Führt alle Entwürfe für die gewählten Systeme im Prozesspool aus.
+
+    Parameter
+    ----------
+    entwuerfe : pd.DataFrame
+        Eine Zeile je Lauf, Spalten = Felder von ZukunftParameter / KonventionellParameter
+        (nicht angegebene Felder: Standardwerte)
+    zeitreihen : pd.DataFrame
+        Heizlast_kW, Energy_kW, COP, Wind_kW (Standard: daten_cache.lade_zeitreihen())
+    systeme : tuple
+        'Zukunft' und/oder 'Konventionell'
+    prozesse : int
+        Anzahl Arbeitsprozesse (Standard: alle Kerne)
+    ablage : str
+        Ordner für Zeitreihen und Kennzahlen jedes Laufs (ergebnis_export.speichere_ergebnis,
+        Laufname <System>_<lauf>); None: nur die Ergebnistabelle
+    solver_name, **solver_optionen
+        Solver und Optionen (solver.py); ohne Angabe ein Thread je Prozess, bei HiGHS keine Ausgabe
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je (lauf, system) mit Parametern, Status, p_nom_opt_* / e_nom_opt_*,
+        Kosten, Netzimport und Stromautarkie
+    '''
+    if zeitreihen is None:
+        from daten_cache import lade_zeitreihen
+        zeitreihen = lade_zeitreihen()
+    entwuerfe = entwuerfe.reset_index(drop=True)
+    prozesse = prozesse or os.cpu_count()
+    solver_name = waehle_solver(solver_name)
+    solver_optionen = {'threads': 1, **solver_optionen}
+    if solver_name == 'highs':
+        solver_optionen.setdefault('output_flag', False)
+
+    aufgaben, zuordnung = _aufgaben(entwuerfe, systeme)
+
+    werte = zeitreihen.to_numpy(dtype=np.float64)
+    speicher = shared_memory.SharedMemory(create=True, size=max(werte.nbytes, 1))
+    try:
+        np.ndarray(werte.shape, dtype=np.float64, buffer=speicher.buf)[:] = werte
+        initargs = (speicher.name, werte.shape, list(zeitreihen.columns), zeitreihen.index,
+                    solver_name, solver_optionen, ablage)
+        chunksize = max(1, len(aufgaben) // (prozesse * 4))
+        with ProcessPoolExecutor(max_workers=prozesse, initializer=_initialisiere, initargs=initargs) as pool:
+            ergebnisse = list(pool.map(_fuehre_lauf, aufgaben, chunksize=chunksize))
+    finally:
+        speicher.close()
+        speicher.unlink()
+
+    tabelle = pd.DataFrame(ergebnisse)
+    # Konventionelle Ergebnisse allen Läufen mit denselben Parametern zuordnen
+    teile = [tabelle[tabelle['system'] == 'Zukunft']] if 'Zukunft' in systeme else []
+    for system, spalten in zuordnung.items():
+        einzeln = tabelle[tabelle['system'] == system].drop(columns='lauf')
+        if spalten:
+            laeufe = entwuerfe[spalten].reset_index(names='lauf')
+            teile.append(laeufe.merge(einzeln, on=spalten, how='left'))
+        else:
+            teile.append(einzeln.merge(pd.DataFrame({'lauf': entwuerfe.index}), how='cross'))
+    return pd.concat(teile, ignore_index=True).sort_values(['lauf', 'system'], ignore_index=True)
+
+
+if __name__ == '__main__':
+    import time
+
+    entwuerfe = parameter_raster(capital_cost_stromspeicher=[20, 45, 70],
+                                 netz_import_kosten=[0.10, 0.1361, 0.20],
+                                 strom_preis=[0.1361])
+    start = time.perf_counter()
+    ergebnis = fuehre_studie_aus(entwuerfe)
+    print(f"{len(entwuerfe)} Entwürfe in {time.perf_counter() - start:.1f} s")
+    spalten = ['lauf', 'system', 'capital_cost_stromspeicher', 'netz_import_kosten',
+               'e_nom_opt_Stromspeicher', 'p_nom_opt_Windkraftanlage', 'Gesamtkosten', 'Stromautarkie_prozent']
+    print(ergebnis[spalten].to_string())
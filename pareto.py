@@ -0,0 +1,200 @@
+"""
+Pareto-Front Kosten vs. Netzimport bzw. Stromautarkie (Epsilon-Constraint)
+- Zukunftssystem wird einmal aufgebaut (netzwerk.NetzModell), zusätzlich mit
+  einer Nebenbedingung für das Zweitziel:
+    netzimport: Σ_t w_t · p_Netzimport,t ≤ ε   (kWh/a)
+    autarkie:   Σ_t w_t · p_Wind,t ≥ ε/100 · Stromlast   (Stromautarkie in %)
+- Das Modell wird einmal an HiGHS (highspy) übergeben; je Stufe ändert sich
+  nur die Schranke ε dieser Zeile, gelöst wird mit der Basis der vorigen Stufe
+- Erster Punkt ist das Kostenoptimum ohne Schranke; Standardstufen reichen
+  von dort bis Netzimport 0 bzw. Stromautarkie 100 %
+- Ergebnis: eine Zeile je Stufe mit Kosten, Netzimport, Stromautarkie und
+  Kapazitäten (Spalten wie netzwerk.kennzahlen)
+
+Verwendung:
+    from pareto import pareto_front
+    front = pareto_front(zeitreihen, punkte=20)
+    front = pareto_front(zeitreihen, kriterium='autarkie', stufen=[80, 90, 100])
+"""
+
+import time
+
+import highspy
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+from netzwerk import NetzModell, ZukunftParameter, baue_zukunft
+
+KRITERIEN = ('netzimport', 'autarkie')
+GRENZE = 'Pareto-grenze'
+
+# Größen je Variable des PyPSA-Modells für die Ergebnistabelle
+_KAPAZITAETEN = (('Generator-p_nom', 'p_nom_opt_'), ('Link-p_nom', 'p_nom_opt_'), ('Store-e_nom', 'e_nom_opt_'))
+
+
+def _energie(modell: NetzModell, carrier: str):
+    # Σ_t w_t · p_t aller Generatoren mit dem Träger als linopy-Ausdruck und als Spaltenvektor-Labels/Gewichte
+    n = modell.network
+    namen = list(n.generators.index[n.generators.carrier == carrier])
+    gewichtung = xr.DataArray(n.snapshot_weightings.generators.to_numpy(), coords={'snapshot': n.snapshots})
+    variable = modell.model.variables['Generator-p'].sel(name=namen)
+    labels, gewichte = xr.broadcast(variable.labels, gewichtung)
+    return (variable * gewichtung).sum(), labels.values.ravel(), gewichte.values.ravel()
+
+
+def _highs_modell(m) -> tuple:
+    # HiGHS-Modell wie linopy.Model.to_highspy, aber Zeilen mit nur einer Variablen als Schranken
+    # (ein Warmstart lässt den Presolve aus, der sie sonst entfernen würde)
+    M = m.matrices
+    A = M.A.tocsr(copy=True)
+    A.eliminate_zeros()          # explizite Nullen, z.B. nach NetzModell-Aktualisierungen
+    unten = np.where(M.sense != '<', M.b, -np.inf)
+    oben = np.where(M.sense != '>', M.b, np.inf)
+    lb, ub = M.lb.astype(float), M.ub.astype(float)
+
+    anzahl = np.diff(A.indptr)
+    einzeln = np.flatnonzero(anzahl == 1)
+    spalten = A.indices[A.indptr[einzeln]]
+    a = A.data[A.indptr[einzeln]]
+    np.maximum.at(lb, spalten, np.where(a > 0, unten[einzeln] / a, oben[einzeln] / a))
+    np.minimum.at(ub, spalten, np.where(a > 0, oben[einzeln] / a, unten[einzeln] / a))
+
+    behalten = np.flatnonzero(anzahl != 1)
+    A = A[behalten]
+    h = highspy.Highs()
+    h.addVars(len(lb), lb, ub)
+    h.changeColsCost(len(M.c), np.arange(len(M.c), dtype=np.int32), M.c)
+    h.addRows(A.shape[0], unten[behalten], oben[behalten], A.nnz, A.indptr, A.indices, A.data)
+    return h, M.clabels[behalten]
+
+
+def _stufen(kriterium: str, startwert: float, punkte: int) -> np.ndarray:
+    # Gleichmäßig vom Kostenoptimum bis Netzimport 0 bzw. Autarkie 100 % (ohne den Startwert selbst)
+    ende = 0.0 if kriterium == 'netzimport' else max(100.0, startwert)
+    return np.linspace(startwert, ende, punkte)[1:]
+
+
+def pareto_front(zeitreihen: pd.DataFrame = None, parameter: ZukunftParameter = None,
+                 kriterium: str = 'netzimport', punkte: int = 20, stufen=None,
+                 threads: int = None, protokoll: bool = False) -> pd.DataFrame:
+    '''
+    Pareto-Front des Zukunftssystems mit dem Epsilon-Constraint-Verfahren.
+
+    Parameter
+    ----------
+    zeitreihen : pd.DataFrame
+        Heizlast_kW, Energy_kW, COP, Wind_kW (Standard: daten_cache.lade_zeitreihen())
+    parameter : ZukunftParameter
+        Kosten und Verluste
+    kriterium : str
+        'netzimport' (Obergrenze Netzimport in kWh/a) oder 'autarkie' (Untergrenze Stromautarkie in %)
+    punkte : int
+        Anzahl Punkte einschließlich Kostenoptimum (nur ohne stufen)
+    stufen : list
+        Eigene Schranken ε (Netzimport in kWh/a bzw. Stromautarkie in %); Kostenoptimum wird immer ergänzt
+    threads : int
+        Threads für HiGHS
+    protokoll : bool
+        Fortschritt je Stufe ausgeben
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je Stufe: stufe (ε, beim Kostenoptimum NaN), status, Gesamtkosten,
+        Investitionskosten, Betriebskosten, Netzimport_kWh, Stromautarkie_prozent,
+        p_nom_opt_* / e_nom_opt_*, iterationen, zeit_s
+    '''
+    if kriterium not in KRITERIEN:
+        raise ValueError(f"kriterium muss eines von {KRITERIEN} sein.")
+    if zeitreihen is None:
+        from daten_cache import lade_zeitreihen
+        zeitreihen = lade_zeitreihen()
+    parameter = parameter or ZukunftParameter()
+
+    modell = NetzModell(baue_zukunft(zeitreihen, parameter), parameter, zeitreihen)
+    n, m = modell.network, modell.model
+    netzimport, import_labels, import_gewichte = _energie(modell, 'grid')
+    wind, wind_labels, wind_gewichte = _energie(modell, 'wind')
+    strom_last = float(n.loads_t.p_set['Stromlast'].mul(n.snapshot_weightings.generators).sum())
+    # Schranke zunächst inaktiv; je Stufe wird nur die Zeilengrenze in HiGHS geändert
+    if kriterium == 'netzimport':
+        m.add_constraints(netzimport <= 0.0, name=GRENZE)
+    else:
+        m.add_constraints(wind >= 0.0, name=GRENZE)
+
+    h, zeilen = _highs_modell(m)
+    spalte = pd.Series(np.arange(len(m.matrices.vlabels)), index=m.matrices.vlabels)
+    zeile = int(np.flatnonzero(zeilen == m.constraints[GRENZE].labels.item())[0])
+    kapazitaeten = {}
+    kosten = np.zeros(len(spalte))
+    for variable, praefix in _KAPAZITAETEN:
+        labels = m.variables[variable].labels
+        for name, label in zip(labels.coords['name'].values, labels.values):
+            kapazitaeten[f'{praefix}{name}'] = int(spalte[label])
+        komponente = variable.split('-')[0]
+        kosten[spalte[labels.values].to_numpy()] = \
+            n.components[komponente].static.loc[labels.coords['name'].values, 'capital_cost']
+
+    import_spalten = spalte[import_labels].to_numpy()
+    wind_spalten = spalte[wind_labels].to_numpy()
+
+    h.setOptionValue('output_flag', False)
+    h.setOptionValue('solver', 'simplex')
+    if threads is not None:
+        h.setOptionValue('threads', threads)
+
+    def loese_stufe(stufe):
+        if np.isnan(stufe):
+            h.changeRowBounds(zeile, -highspy.kHighsInf, highspy.kHighsInf)
+        elif kriterium == 'netzimport':
+            h.changeRowBounds(zeile, -highspy.kHighsInf, float(stufe))
+        else:
+            h.changeRowBounds(zeile, float(stufe) / 100 * strom_last, highspy.kHighsInf)
+        start = time.perf_counter()
+        h.run()
+        dauer = time.perf_counter() - start
+        status = h.modelStatusToString(h.getModelStatus())
+        ergebnis = {'stufe': stufe, 'status': status, 'iterationen': h.getInfo().simplex_iteration_count,
+                    'zeit_s': dauer}
+        if h.getModelStatus() == highspy.HighsModelStatus.kOptimal:
+            x = np.asarray(h.getSolution().col_value)
+            gesamt = h.getInfo().objective_function_value
+            investition = float(kosten @ x)
+            wind_kWh = float(x[wind_spalten] @ wind_gewichte)
+            ergebnis.update({
+                'Gesamtkosten': gesamt,
+                'Investitionskosten': investition,
+                'Betriebskosten': gesamt - investition,
+                'Netzimport_kWh': float(x[import_spalten] @ import_gewichte),
+                'Stromautarkie_prozent': wind_kWh / strom_last * 100 if strom_last > 0 else 0.0,
+                **{name: float(x[i]) for name, i in kapazitaeten.items()},
+            })
+        if protokoll:
+            print(f"ε = {stufe:>12,.1f}: {status}, {ergebnis.get('Gesamtkosten', np.nan):,.0f} €/a, "
+                  f"{ergebnis['iterationen']} Iterationen, {dauer:.2f} s")
+        return ergebnis
+
+    zeilen = [loese_stufe(np.nan)]
+    if stufen is None:
+        startwert = zeilen[0].get('Netzimport_kWh' if kriterium == 'netzimport' else 'Stromautarkie_prozent')
+        stufen = _stufen(kriterium, startwert, punkte) if startwert is not None else []
+    zeilen += [loese_stufe(stufe) for stufe in stufen]
+    return pd.DataFrame(zeilen)
+
+
+if __name__ == '__main__':
+    from daten_cache import lade_zeitreihen
+    from solver import optimiere
+
+    zeitreihen = lade_zeitreihen()
+
+    start = time.perf_counter()
+    optimiere(baue_zukunft(zeitreihen), 'highs', methode='simplex', output_flag=False)
+    print(f"Einzelne Optimierung (Kaltstart): {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    front = pareto_front(zeitreihen, punkte=21, protokoll=True)
+    print(f"Pareto-Front mit {len(front)} Punkten: {time.perf_counter() - start:.1f} s")
+    print(front[['stufe', 'Gesamtkosten', 'Netzimport_kWh', 'Stromautarkie_prozent',
+                 'p_nom_opt_Windkraftanlage', 'e_nom_opt_Stromspeicher']].round(1).to_string(index=False))
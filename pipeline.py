@@ -0,0 +1,424 @@
+"""
+Inkrementelle Vorverarbeitung: von den Wetterdaten bis zu den Optimierungseingaben
+
+Bisher wird die Kette von Hand ausgeführt und jede Stufe schreibt eine CSV,
+die die nächste wieder einliest:
+    prepare_solar_data.py -> calculation_energy_lamp.py -> calculation_heat_transfer.py
+    -> calculation_COP.py -> Zukunftssystem.py / vergleich.py
+
+Die Pipeline kennt die Abhängigkeiten der Stufen und bildet für jede Stufe
+einen Fingerabdruck aus
+- dem Quellcode der Berechnung samt Standardwerten und verwendeten
+  Modulkonstanten (z.B. A_grund, U, hoehe),
+- den Parametern,
+- dem Hash der eingelesenen Dateien und
+- den Fingerabdrücken der vorgelagerten Stufen.
+Nur Stufen mit geändertem Fingerabdruck werden neu berechnet. Innerhalb eines
+Prozesses werden Ergebnisse im Arbeitsspeicher weitergereicht, zusätzlich
+liegen sie als Pickle im Ordner .cache/pipeline.
+
+Beispiel: Eine Änderung von U in der Heizlast berechnet nur 'heizlast' und
+'zeitreihen' neu, Solardaten und Lampen kommen aus dem Cache.
+
+Verwendung:
+    from pipeline import standard_pipeline
+    pipeline = standard_pipeline()
+    zeitreihen = pipeline.ausfuehren('zeitreihen')
+    pipeline.setze_parameter('heizlast', U=3.5)
+    zeitreihen = pipeline.ausfuehren('zeitreihen')
+"""
+
+import hashlib
+import inspect
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from calculation_COP import berechne_cop, berechne_cop_matrix
+from calculation_energy_lamp import berechne_lampenenergie, berechne_lampenenergie_matrix
+from calculation_heat_transfer import berechne_heizlast, berechne_heizlast_matrix, geometrie
+from daten_cache import CACHEORDNER, DATEI_WIND, DATENORDNER, datei_hash, lese_wind
+from prepare_solar_data import kombiniere_solardaten, lese_dwd_solar
+from wetter_speicher import oeffne_wetter_speicher
+
+PIPELINEORDNER = os.path.join(CACHEORDNER, 'pipeline')
+
+_datei_hashes = {}
+
+
+def _datei_hash_gemerkt(pfad: str) -> str:
+    # Hash nur neu berechnen, wenn sich Größe oder Änderungszeit geändert haben
+    info = os.stat(pfad)
+    schluessel = (os.path.abspath(pfad), info.st_size, info.st_mtime_ns)
+    if schluessel not in _datei_hashes:
+        _datei_hashes[schluessel] = datei_hash(pfad)
+    return _datei_hashes[schluessel]
+
+
+def _quellcode(funktion) -> str:
+    try:
+        return inspect.getsource(funktion)
+    except (OSError, TypeError):
+        return f'{funktion.__module__}.{funktion.__qualname__}'
+
+
+def _wert_hash(wert) -> str:
+    # Werte über ihren Inhalt (Arrays/Tabellen vollständig, nicht über die gekürzte repr)
+    if isinstance(wert, (pd.Series, pd.DataFrame, pd.Index)):
+        return pd.util.hash_pandas_object(wert, index=True).to_numpy().tobytes().hex()
+    if isinstance(wert, np.ndarray):
+        inhalt = repr((wert.dtype, wert.shape)).encode() + np.ascontiguousarray(wert).tobytes()
+        return hashlib.sha256(inhalt).hexdigest()
+    return repr(wert)
+
+
+def _namen(code) -> set:
+    # Globale Namen einer Funktion einschließlich innerer Funktionen und Comprehensions
+    namen = set(code.co_names)
+    for konstante in code.co_consts:
+        if inspect.iscode(konstante):
+            namen |= _namen(konstante)
+    return namen
+
+
+def _eigenes_modul(funktion) -> bool:
+    # Funktion aus einer Datei dieses Projekts (nicht aus site-packages/Standardbibliothek)
+    datei = getattr(getattr(funktion, '__code__', None), 'co_filename', '')
+    return os.path.dirname(os.path.abspath(datei)) == os.path.dirname(os.path.abspath(__file__))
+
+
+def _code_fingerabdruck(funktion, _besucht: set = None) -> str:
+    # Quellcode samt aufgelöster Standardwerte und Werte verwendeter Modulkonstanten
+    # (z.B. A_grund: float = A_grund -> Wert von A_grund); aufgerufene Funktionen aus
+    # diesem Projekt gehen rekursiv ein, Module und Paketfunktionen nur über ihren Namen
+    besucht = set() if _besucht is None else _besucht
+    if funktion in besucht:
+        return ''
+    besucht.add(funktion)
+    teile = [_quellcode(funktion)]
+    try:
+        signatur = inspect.signature(funktion)
+    except (TypeError, ValueError):
+        signatur = None
+    if signatur is not None:
+        for name, parameter in signatur.parameters.items():
+            if parameter.default is not inspect.Parameter.empty:
+                teile.append(f'{name}={_wert_hash(parameter.default)}')
+
+    code = getattr(funktion, '__code__', None)
+    if code is not None:
+        globale = funktion.__globals__
+        for name in sorted(_namen(code) & set(globale)):
+            wert = globale[name]
+            if inspect.ismodule(wert):
+                continue
+            if inspect.isfunction(wert) and _eigenes_modul(wert):
+                teile.append(f'{name}:{_code_fingerabdruck(wert, besucht)}')
+            elif callable(wert):
+                teile.append(f'{name}:{getattr(wert, "__module__", "")}.{getattr(wert, "__qualname__", name)}')
+            else:
+                teile.append(f'{name}={_wert_hash(wert)}')
+    return '\n'.join(teile)
+
+
+# ============================================================
+# Pipeline
+# ============================================================
+
+class Stufe:
+    '''
+    Eine Verarbeitungsstufe der Pipeline.
+
+    Parameter
+    ----------
+    name : str
+        Name der Stufe
+    funktion : callable
+        Berechnung; erhält Eingaben, Dateien und Parameter als Keyword-Argumente
+    eingaben : dict
+        Argumentname -> Name der vorgelagerten Stufe
+    parameter : dict
+        Argumentname -> Parameterwert
+    dateien : dict
+        Argumentname -> Dateipfad (der Dateiinhalt geht in den Fingerabdruck ein)
+    code : list
+        Weitere Funktionen, deren Quellcode in den Fingerabdruck eingeht
+    '''
+
+    def __init__(self, name, funktion, eingaben=None, parameter=None, dateien=None, code=None):
+        self.name = name
+        self.funktion = funktion
+        self.eingaben = dict(eingaben or {})
+        self.parameter = dict(parameter or {})
+        self.dateien = dict(dateien or {})
+        self.code = list(code or [])
+
+
+class Pipeline:
+    '''
+    Führt Stufen in Abhängigkeitsreihenfolge aus und berechnet nur veraltete Stufen neu.
+
+    Parameter
+    ----------
+    cacheordner : str
+        Ordner für die Zwischenergebnisse (None = nur im Arbeitsspeicher)
+    '''
+
+    def __init__(self, cacheordner: str = PIPELINEORDNER):
+        self.cacheordner = cacheordner
+        self.stufen = {}
+        self._ergebnisse = {}   # Name -> (Fingerabdruck, Ergebnis)
+        self.protokoll = []     # (Stufe, 'berechnet' | 'speicher' | 'cache')
+
+    def stufe(self, name, funktion, eingaben=None, parameter=None, dateien=None, code=None):
+        '''Fügt eine Stufe hinzu (siehe Stufe).'''
+        self.stufen[name] = Stufe(name, funktion, eingaben, parameter, dateien, code)
+        return self
+
+    def setze_parameter(self, name: str, **parameter):
+        '''Ändert Parameter einer Stufe; betroffene Stufen werden beim nächsten Lauf neu berechnet.'''
+        self.stufen[name].parameter.update(parameter)
+
+    def _reihenfolge(self, ziele) -> list:
+        reihenfolge, besucht, aktiv = [], set(), set()
+
+        def besuche(name):
+            if name in besucht:
+                return
+            if name in aktiv:
+                raise ValueError(f"Zyklische Abhängigkeit bei Stufe '{name}'.")
+            if name not in self.stufen:
+                raise KeyError(f"Unbekannte Stufe '{name}'.")
+            aktiv.add(name)
+            for vorgaenger in self.stufen[name].eingaben.values():
+                besuche(vorgaenger)
+            aktiv.discard(name)
+            besucht.add(name)
+            reihenfolge.append(name)
+
+        for ziel in ziele:
+            besuche(ziel)
+        return reihenfolge
+
+    def fingerabdruck(self, name: str, _bekannt: dict = None) -> str:
+        '''Fingerabdruck einer Stufe inklusive aller vorgelagerten Stufen.'''
+        bekannt = {} if _bekannt is None else _bekannt
+        if name in bekannt:
+            return bekannt[name]
+
+        stufe = self.stufen[name]
+        h = hashlib.sha256(name.encode())
+        for funktion in [stufe.funktion, *stufe.code]:
+            h.update(_code_fingerabdruck(funktion).encode())
+        for schluessel in sorted(stufe.parameter):
+            h.update(f'{schluessel}={_wert_hash(stufe.parameter[schluessel])}'.encode())
+        for schluessel in sorted(stufe.dateien):
+            h.update(f'{schluessel}={_datei_hash_gemerkt(stufe.dateien[schluessel])}'.encode())
+        for schluessel in sorted(stufe.eingaben):
+            h.update(f'{schluessel}={self.fingerabdruck(stufe.eingaben[schluessel], bekannt)}'.encode())
+
+        bekannt[name] = h.hexdigest()[:16]
+        return bekannt[name]
+
+    def _cache_pfad(self, name: str, fingerabdruck: str) -> str:
+        return os.path.join(self.cacheordner, f'{name}-{fingerabdruck}.pkl')
+
+    def _lade_cache(self, name: str, fingerabdruck: str):
+        if self.cacheordner is None:
+            return None
+        pfad = self._cache_pfad(name, fingerabdruck)
+        if os.path.exists(pfad):
+            return pd.read_pickle(pfad)
+        return None
+
+    def _schreibe_cache(self, name: str, fingerabdruck: str, ergebnis):
+        if self.cacheordner is None:
+            return
+        os.makedirs(self.cacheordner, exist_ok=True)
+        pfad = self._cache_pfad(name, fingerabdruck)
+        # Eigene temporäre Datei je Prozess, dann umbenennen (parallele Läufe stören sich nicht)
+        deskriptor, tmp = tempfile.mkstemp(dir=self.cacheordner, prefix=f'.{name}-', suffix='.tmp')
+        try:
+            with os.fdopen(deskriptor, 'wb') as f:
+                pd.to_pickle(ergebnis, f)
+            os.replace(tmp, pfad)
+        except BaseException:
+            os.remove(tmp)
+            raise
+        # Veraltete Ergebnisse derselben Stufe entfernen (nur fertige Dateien)
+        for datei in os.listdir(self.cacheordner):
+            veraltet = os.path.join(self.cacheordner, datei)
+            if datei.startswith(name + '-') and datei.endswith('.pkl') and veraltet != pfad:
+                try:
+                    os.remove(veraltet)
+                except FileNotFoundError:
+                    pass
+
+    def ausfuehren(self, *ziele):
+        '''
+        Führt die Zielstufen und alle veralteten Vorgänger aus.
+
+        Parameter
+        ----------
+        *ziele : str
+            Namen der gewünschten Stufen
+
+        Returns
+        -------
+        Ergebnis der Stufe (ein Ziel) oder dict Name -> Ergebnis (mehrere Ziele)
+        '''
+        bekannt = {}
+        for name in self._reihenfolge(ziele):
+            stufe = self.stufen[name]
+            fingerabdruck = self.fingerabdruck(name, bekannt)
+
+            # 1. Im Arbeitsspeicher vorhanden und aktuell
+            if name in self._ergebnisse and self._ergebnisse[name][0] == fingerabdruck:
+                self.protokoll.append((name, 'speicher'))
+                continue
+
+            # 2. Auf der Festplatte vorhanden
+            ergebnis = self._lade_cache(name, fingerabdruck)
+            if ergebnis is not None:
+                self._ergebnisse[name] = (fingerabdruck, ergebnis)
+                self.protokoll.append((name, 'cache'))
+                continue
+
+            # 3. Neu berechnen
+            argumente = {arg: self._ergebnisse[vorgaenger][1] for arg, vorgaenger in stufe.eingaben.items()}
+            argumente.update(stufe.dateien)
+            argumente.update(stufe.parameter)
+            ergebnis = stufe.funktion(**argumente)
+
+            self._ergebnisse[name] = (fingerabdruck, ergebnis)
+            self._schreibe_cache(name, fingerabdruck, ergebnis)
+            self.protokoll.append((name, 'berechnet'))
+
+        if len(ziele) == 1:
+            return self._ergebnisse[ziele[0]][1]
+        return {ziel: self._ergebnisse[ziel][1] for ziel in ziele}
+
+
+# ============================================================
+# Stufen der Gewächshaus-Vorverarbeitung
+# ============================================================
+
+def _jahresindex(jahr: int) -> pd.DatetimeIndex:
+    return pd.date_range(f'{jahr}-01-01', f'{jahr + 1}-01-01', freq='h', inclusive='left')
+
+
+def stufe_solar_roh(bochum: str, bremen: str) -> pd.Series:
+    '''Solareinstrahlung in W/m² aus den DWD-Rohdaten (Bochum, Fallback Bremen).'''
+    solar, _ = kombiniere_solardaten(lese_dwd_solar(bochum), lese_dwd_solar(bremen))
+    return solar.rename('Solar_W_m2')
+
+
+def stufe_solar_bereinigt(solar_datei: str) -> pd.Series:
+    '''Solareinstrahlung in W/m² aus der bereits bereinigten Datei.'''
+    wetter = oeffne_wetter_speicher(solar_datei, datum_spalte='DateTime')
+    return pd.concat([pd.Series(wetter.jahr(j, 'Solar_W_m2'), index=wetter.zeitindex(j))
+                      for j in sorted(wetter.jahre)]).rename('Solar_W_m2')
+
+
+def stufe_temperatur(temperatur_datei: str, jahr: int) -> pd.Series:
+    '''Außentemperatur TT_TU in °C eines Jahres.'''
+    wetter = oeffne_wetter_speicher(temperatur_datei, spalten=['TT_TU'])
+    return pd.Series(np.array(wetter.jahr(jahr, 'TT_TU')),
+                     index=wetter.zeitindex(jahr), name='T_aussen_C')
+
+
+def stufe_lampen(solar: pd.Series, jahr: int, **parameter) -> pd.Series:
+    '''Stündlicher Energieverbrauch der Lampen in kW.'''
+    solar_jahr = solar.reindex(_jahresindex(jahr))
+    return berechne_lampenenergie(solar_jahr.to_numpy(), jahr, **parameter)
+
+
+def stufe_heizlast(temperatur: pd.Series, solar: pd.Series, **parameter) -> pd.DataFrame:
+    '''Stündliche Heizlast in kW (Spalten wie heizlast_2019.csv).'''
+    G_solar = solar.reindex(temperatur.index).fillna(0).to_numpy()
+    Q_dot = berechne_heizlast(temperatur.to_numpy(), G_solar, **parameter)
+    return pd.DataFrame({'T_aussen_C': temperatur.to_numpy(), 'Heizlast_kW': Q_dot}, index=temperatur.index)
+
+
+def stufe_cop(temperatur: pd.Series, **parameter) -> pd.DataFrame:
+    '''Stündlicher COP der Wärmepumpe (Spalten wie heatpump_cop_2019.csv).'''
+    COP = berechne_cop(temperatur, **parameter)
+    return pd.DataFrame({'T_aussen_C': temperatur, 'COP': COP})
+
+
+def stufe_wind(wind_datei: str) -> pd.DataFrame:
+    '''Leistung der Vergleichs-Windkraftanlage in kW.'''
+    return lese_wind(wind_datei)
+
+
+def stufe_zeitreihen(heizlast: pd.DataFrame, lampen: pd.Series,
+                     cop: pd.DataFrame, wind: pd.DataFrame) -> pd.DataFrame:
+    '''Alle Eingangszeitreihen auf gemeinsamem Zeitindex (wie daten_cache.lade_zeitreihen).'''
+    teile = [heizlast[['Heizlast_kW']], lampen.to_frame('Energy_kW'), cop[['COP']], wind[['Wind_kW']]]
+    zeitindex = teile[0].index
+    for teil in teile[1:]:
+        zeitindex = zeitindex.intersection(teil.index)
+    df = pd.concat([teil.loc[zeitindex] for teil in teile], axis=1)
+    df.index.name = 'datetime'
+    return df
+
+
+def standard_pipeline(jahr: int = 2019,
+                      temperatur_datei: str = 'Temperatur Köln.csv',
+                      solar_datei: str = os.path.join(DATENORDNER, 'Solareinstrahlung_Bochum_Bremen.csv'),
+                      bochum_datei: str = 'Solareinstrahlung_Bochum.csv',
+                      bremen_datei: str = 'Solareinstrahlung_Bremen.csv',
+                      wind_datei: str = DATEI_WIND,
+                      cacheordner: str = PIPELINEORDNER) -> Pipeline:
+    '''
+    Pipeline der Gewächshaus-Vorverarbeitung mit den Stufen
+    solar, temperatur, lampen, heizlast, cop, wind und zeitreihen.
+
+    Liegen die DWD-Rohdaten aus Bochum und Bremen vor, wird die Stufe 'solar'
+    daraus berechnet, sonst wird die bereinigte Solardatei verwendet.
+    Parameter der Berechnungen ändern mit setze_parameter, z.B.
+    pipeline.setze_parameter('heizlast', U=3.5).
+    '''
+    pipeline = Pipeline(cacheordner)
+
+    if os.path.exists(bochum_datei) and os.path.exists(bremen_datei):
+        pipeline.stufe('solar', stufe_solar_roh,
+                       dateien={'bochum': bochum_datei, 'bremen': bremen_datei},
+                       code=[kombiniere_solardaten, lese_dwd_solar])
+    else:
+        pipeline.stufe('solar', stufe_solar_bereinigt, dateien={'solar_datei': solar_datei})
+
+    pipeline.stufe('temperatur', stufe_temperatur,
+                   dateien={'temperatur_datei': temperatur_datei}, parameter={'jahr': jahr})
+    pipeline.stufe('lampen', stufe_lampen, eingaben={'solar': 'solar'}, parameter={'jahr': jahr},
+                   code=[berechne_lampenenergie, berechne_lampenenergie_matrix])
+    pipeline.stufe('heizlast', stufe_heizlast, eingaben={'temperatur': 'temperatur', 'solar': 'solar'},
+                   code=[berechne_heizlast, berechne_heizlast_matrix, geometrie])
+    pipeline.stufe('cop', stufe_cop, eingaben={'temperatur': 'temperatur'}, code=[berechne_cop, berechne_cop_matrix])
+    pipeline.stufe('wind', stufe_wind, dateien={'wind_datei': wind_datei}, code=[lese_wind])
+    pipeline.stufe('zeitreihen', stufe_zeitreihen,
+                   eingaben={'heizlast': 'heizlast', 'lampen': 'lampen', 'cop': 'cop', 'wind': 'wind'})
+    return pipeline
+
+
+if __name__ == '__main__':
+    import time
+
+    pipeline = standard_pipeline()
+
+    start = time.perf_counter()
+    zeitreihen = pipeline.ausfuehren('zeitreihen')
+    print(f"1. Lauf: {time.perf_counter() - start:.2f} s")
+    print(f"   {pipeline.protokoll}")
+
+    # Nur die Heizlast ändert sich -> solar, lampen, cop, wind bleiben
+    pipeline.protokoll.clear()
+    pipeline.setze_parameter('heizlast', U=3.5)
+    start = time.perf_counter()
+    zeitreihen = pipeline.ausfuehren('zeitreihen')
+    print(f"2. Lauf (U = 3.5): {time.perf_counter() - start:.2f} s")
+    print(f"   {pipeline.protokoll}")
+
+    print(f"\nMittlere Heizlast: {zeitreihen['Heizlast_kW'].mean():.2f} kW")
@@ -0,0 +1,252 @@
+"""
+Rollierender Horizont für lange Simulationszeiträume (mehrere Wetterjahre)
+- Betrieb des Zukunftssystems mit festen Kapazitäten (z.B. aus einer
+  Auslegung mit Typtagen oder einem Einzeljahr)
+- Überlappende Fenster fester Länge: gelöst wird jeweils das ganze Fenster,
+  übernommen nur der vordere Teil (horizont - ueberlappung Stunden); das
+  letzte Fenster beginnt direkt nach dem zuletzt übernommenen Teil und ist
+  ggf. kürzer
+- Speicherfüllstände (Stromspeicher, Wärmespeicher) am Ende des übernommenen
+  Teils sind Startwerte (e_initial) des nächsten Fensters
+- Das Optimierungsmodell wird nur einmal für die Fensterlänge aufgebaut und je
+  Fenster über netzwerk.NetzModell aktualisiert (nur ein kürzeres letztes
+  Fenster wird neu aufgebaut) -> Speicherbedarf abhängig von der
+  Fensterlänge, nicht vom Gesamtzeitraum
+- pruefe_speicherbilanz: Speicherbilanz des zusammengesetzten Einsatzes,
+  insbesondere an den Fenstergrenzen
+- Ergebnis: Netzwerk über den Gesamtzeitraum mit zusammengesetztem Einsatz
+  (netzwerk.kennzahlen anwendbar)
+
+Verwendung:
+    from rollierender_horizont import kapazitaeten, rollierender_horizont
+    zeitreihen = pd.concat([zeitreihen_2019, zeitreihen_2024])
+    ergebnis = rollierender_horizont(zeitreihen, kapazitaeten(ausgelegtes_netzwerk),
+                                     horizont=168, ueberlappung=24)
+"""
+
+import numpy as np
+import pandas as pd
+import pypsa
+
+from netzwerk import NetzModell, ZukunftParameter, baue_zukunft, preis_je_snapshot
+from windkraft import p_max_pu_aus_leistung
+
+# Ergebnisgrößen, die über die Fenster zusammengesetzt werden
+ERGEBNISSE = [('Generator', 'p'), ('Link', 'p0'), ('Link', 'p1'), ('Store', 'e'), ('Store', 'p'), ('Load', 'p')]
+
+
+def kapazitaeten(network: pypsa.Network) -> dict:
+    '''
+    Optimierte Kapazitäten aller erweiterbaren Komponenten mit Investitionskosten.
+
+    Komponenten ohne capital_cost (z.B. Netz_Import) bleiben im rollierenden
+    Horizont erweiterbar.
+
+    Returns
+    -------
+    dict
+        (Komponente, Name) -> p_nom_opt bzw. e_nom_opt
+    '''
+    ergebnis = {}
+    for komponente, groesse in (('Generator', 'p_nom'), ('Link', 'p_nom'), ('Store', 'e_nom')):
+        static = network.components[komponente].static
+        auswahl = static[f'{groesse}_extendable'] & (static['capital_cost'] > 0)
+        for name in static.index[auswahl]:
+            ergebnis[(komponente, name)] = float(static.at[name, f'{groesse}_opt'])
+    return ergebnis
+
+
+def baue_betrieb(zeitreihen: pd.DataFrame, kapazitaeten: dict, parameter: ZukunftParameter = None) -> pypsa.Network:
+    '''Zukunftssystem mit festen Kapazitäten und nicht zyklischen Speichern (Start bei e_initial = 0).'''
+    network = baue_zukunft(zeitreihen, parameter)
+    for (komponente, name), wert in kapazitaeten.items():
+        groesse = 'e_nom' if komponente == 'Store' else 'p_nom'
+        network.components[komponente].static.at[name, f'{groesse}_extendable'] = False
+        network.components[komponente].static.at[name, groesse] = wert
+    network.stores['e_cyclic'] = False
+    network.stores['e_initial'] = 0.0
+    return network
+
+
+def _fenster(laenge: int, horizont: int, ueberlappung: int) -> list:
+    # (Fensterbeginn = Beginn übernommener Teil, Ende übernommener Teil, Fensterende);
+    # das letzte Fenster endet am Zeitraumende und wird ganz übernommen
+    schritt = horizont - ueberlappung
+    fenster = []
+    for anfang in range(0, laenge, schritt):
+        if anfang + horizont >= laenge:
+            fenster.append((anfang, laenge, laenge))
+            break
+        fenster.append((anfang, anfang + schritt, anfang + horizont))
+    return fenster
+
+
+def zeitreihenwerte(zeitreihen: pd.DataFrame, parameter: ZukunftParameter, snapshots) -> list:
+    '''
+    Zeitabhängige Werte eines Zeitabschnitts auf den Snapshots eines bestehenden Modells.
+
+    Returns
+    -------
+    list
+        (Komponente, Name, Attribut, Series) für NetzModell.setze
+    '''
+    def auf_snapshots(werte):
+        return pd.Series(np.asarray(werte, dtype=float), index=snapshots)
+
+    preise = []
+    if isinstance(parameter.netz_import_kosten, pd.Series):
+        preise.append(('Generator', 'Netz_Import', 'marginal_cost',
+                       auf_snapshots(preis_je_snapshot(parameter.netz_import_kosten, zeitreihen.index))))
+    return preise + [
+        ('Load', 'Stromlast', 'p_set', auf_snapshots(zeitreihen['Energy_kW'])),
+        ('Load', 'Waermelast', 'p_set', auf_snapshots(zeitreihen['Heizlast_kW'])),
+        ('Generator', 'Windkraftanlage', 'p_max_pu',
+         auf_snapshots(p_max_pu_aus_leistung(zeitreihen['Wind_kW'], parameter.wind_nennleistung_vergleichsanlage))),
+        ('Link', 'Waermepumpe', 'efficiency', auf_snapshots(zeitreihen['COP'])),
+    ]
+
+
+def rollierender_horizont(zeitreihen: pd.DataFrame, kapazitaeten: dict, parameter: ZukunftParameter = None,
+                          horizont: int = 168, ueberlappung: int = 24, e_initial: dict = None,
+                          solver_name: str = None, **solver_optionen) -> pypsa.Network:
+    '''
+    Betrieb des Zukunftssystems über einen langen Zeitraum in überlappenden Fenstern.
+
+    Parameter
+    ----------
+    zeitreihen : pd.DataFrame
+        Heizlast_kW, Energy_kW, COP, Wind_kW über den Gesamtzeitraum (z.B. mehrere Jahre hintereinander)
+    kapazitaeten : dict
+        (Komponente, Name) -> feste Kapazität in kW bzw. kWh (siehe kapazitaeten())
+    parameter : ZukunftParameter
+        Kosten und Verluste
+    horizont : int
+        Fensterlänge in Snapshots
+    ueberlappung : int
+        Snapshots am Fensterende, die nur als Vorausschau dienen und im nächsten Fenster neu gelöst werden
+    e_initial : dict
+        Speicherfüllstände zu Beginn in kWh (Standard: 0)
+
+    Returns
+    -------
+    pypsa.Network
+        Netzwerk über den Gesamtzeitraum mit zusammengesetztem Einsatz, p_nom_opt/e_nom_opt
+        und objective (Summe der Betriebskosten über alle übernommenen Teile)
+    '''
+    if not 0 <= ueberlappung < horizont:
+        raise ValueError("ueberlappung muss zwischen 0 und horizont - 1 liegen.")
+    parameter = parameter or ZukunftParameter()
+    laenge = len(zeitreihen)
+    horizont = min(horizont, laenge)
+
+    modell = NetzModell(baue_betrieb(zeitreihen.iloc[:horizont], kapazitaeten, parameter), parameter)
+    n = modell.network
+    speicher = list(n.stores.index)
+    zustand = {name: 0.0 for name in speicher}
+    zustand.update(e_initial or {})
+
+    spalten = {(k, a): list(n.components[k].static.index) for k, a in ERGEBNISSE}
+    werte = {(k, a): np.zeros((laenge, len(namen))) for (k, a), namen in spalten.items()}
+    betriebskosten = 0.0
+    erhalt = (1 - n.stores['standing_loss']) ** n.snapshot_weightings.stores.iloc[0]
+
+    for nummer, (anfang, bis, ende) in enumerate(_fenster(laenge, horizont, ueberlappung)):
+        if ende - anfang != len(n.snapshots):
+            # kürzeres letztes Fenster: eigenes Modell statt erneut gelöster, schon übernommener Stunden
+            modell = NetzModell(baue_betrieb(zeitreihen.iloc[anfang:ende], kapazitaeten, parameter), parameter)
+            n = modell.network
+        elif nummer:
+            fenster = zeitreihen.iloc[anfang:ende]
+            for komponente, name, attribut, wert in zeitreihenwerte(fenster, parameter, n.snapshots):
+                modell.setze(komponente, name, attribut, wert)
+        for name in speicher:
+            modell.setze('Store', name, 'e_initial', zustand[name])
+
+        status, bedingung = modell.loese(solver_name, **solver_optionen)
+        if status != 'ok':
+            raise RuntimeError(f"Fenster {nummer} ({zeitreihen.index[anfang]}): {status}, {bedingung}")
+
+        # nur den vorderen Teil übernehmen; Überlappung wird im nächsten Fenster neu gelöst
+        teil = slice(0, bis - anfang)
+        for (komponente, attribut), namen in spalten.items():
+            dynamic = n.components[komponente].dynamic
+            werte[(komponente, attribut)][anfang:bis] = dynamic[attribut][namen].to_numpy()[teil]
+        p = n.generators_t.p.to_numpy()[teil]
+        marginal = n.get_switchable_as_dense('Generator', 'marginal_cost').to_numpy()
+        gewichtung = n.snapshot_weightings.objective.to_numpy()
+        betriebskosten += float((p * marginal[teil] * gewichtung[teil, None]).sum())
+        # PyPSA rechnet e_initial ohne Speicherverlust -> Verlust der ersten Stunde hier anwenden
+        zustand = (n.stores_t.e.iloc[teil.stop - 1] * erhalt).to_dict()
+
+    # Ergebnis über den Gesamtzeitraum (nur Daten, kein Optimierungsmodell)
+    ergebnis = baue_zukunft(zeitreihen, parameter)
+    for (komponente, attribut), namen in spalten.items():
+        ergebnis.components[komponente].dynamic[attribut] = pd.DataFrame(
+            werte[(komponente, attribut)], index=ergebnis.snapshots, columns=namen)
+    # feste Kapazitäten; übrige erweiterbare Komponenten (z.B. Netz_Import): größter Einsatz
+    for komponente, groesse, einsatz in (('Generator', 'p_nom', 'p'), ('Link', 'p_nom', 'p0'), ('Store', 'e_nom', 'e')):
+        static = ergebnis.components[komponente].static
+        dynamic = ergebnis.components[komponente].dynamic
+        static[f'{groesse}_opt'] = static[groesse]
+        for name in static.index[static[f'{groesse}_extendable']]:
+            static.at[name, f'{groesse}_opt'] = kapazitaeten.get((komponente, name), dynamic[einsatz][name].max())
+    ergebnis._objective = betriebskosten
+    pruefe_speicherbilanz(ergebnis, {name: 0.0 for name in speicher} | (e_initial or {}))
+    return ergebnis
+
+
+def pruefe_speicherbilanz(network: pypsa.Network, e_initial: dict = None, toleranz: float = 1e-6) -> pd.DataFrame:
+    '''
+    Prüft e_t = (1 - standing_loss)^w · e_(t-1) - w · p_t für alle Speicher und Snapshots.
+
+    Im ersten Snapshot gilt e_(-1) = e_initial ohne Speicherverlust (wie in PyPSA).
+    Abweichungen über `toleranz` (relativ zu e_nom_opt, mindestens 1 kWh) -> AssertionError.
+
+    Parameter
+    ----------
+    network : pypsa.Network
+        Netzwerk mit stores_t.e und stores_t.p (z.B. Ergebnis von rollierender_horizont)
+    e_initial : dict
+        Speicherfüllstände zu Beginn in kWh (Standard: e_initial der Speicher)
+
+    Returns
+    -------
+    pd.DataFrame
+        Residuum der Speicherbilanz in kWh je Snapshot und Speicher
+    '''
+    stores = network.stores
+    e, p = network.stores_t.e[stores.index], network.stores_t.p[stores.index]
+    w = network.snapshot_weightings.stores.to_numpy()[:, None]
+    erhalt = (1 - stores['standing_loss'].to_numpy()) ** w
+    start = stores['e_initial'].to_dict() | (e_initial or {})
+    vorher = e.shift(1).to_numpy() * erhalt
+    vorher[0] = [start[name] for name in stores.index]
+    residuum = pd.DataFrame(e.to_numpy() - vorher + w * p.to_numpy(), index=e.index, columns=e.columns)
+    grenze = toleranz * stores['e_nom_opt'].clip(lower=1.0)
+    fehler = residuum.abs().max()
+    abweichend = fehler[fehler > grenze]
+    assert abweichend.empty, f"Speicherbilanz verletzt: {abweichend.round(3).to_dict()} kWh " \
+                             f"(größte Abweichung bei {residuum.abs().idxmax()[abweichend.index].to_dict()})"
+    return residuum
+
+
+if __name__ == '__main__':
+    import time
+
+    from daten_cache import lade_zeitreihen
+    from netzwerk import kennzahlen
+
+    zeitreihen = lade_zeitreihen()
+
+    # Auslegung auf dem Jahr 2019
+    auslegung = NetzModell(baue_zukunft(zeitreihen), ZukunftParameter(), zeitreihen)
+    auslegung.loese()
+    kap = kapazitaeten(auslegung.network)
+    print({name: round(wert, 1) for (_, name), wert in kap.items()})
+
+    # Betrieb über drei Jahre (hier mangels weiterer Winddaten dreimal das Wetterjahr 2019)
+    jahre = pd.concat([zeitreihen.set_axis(zeitreihen.index + pd.DateOffset(years=k)) for k in range(3)])
+    start = time.perf_counter()
+    ergebnis = rollierender_horizont(jahre, kap, horizont=168, ueberlappung=24)
+    print(f"{len(jahre)} Snapshots in {time.perf_counter() - start:.1f} s")
+    print({k: round(v, 1) for k, v in kennzahlen(ergebnis).items()})
@@ -0,0 +1,226 @@
+"""
+Solver-Auswahl und Solver-Benchmark
+- Wählt unter den installierten Solvern (linopy.available_solvers) in der
+  Reihenfolge Gurobi, HiGHS, CBC, GLPK; Gurobi nur mit gültiger, nicht
+  größenbeschränkter Lizenz (geprüft über ein kleines Testmodell), sonst
+  (z.B. auf dem Build-Server oder mit der pip-Lizenz) wird HiGHS verwendet
+- Vorgabe über die Umgebungsvariable GEWAECHSHAUS_SOLVER (z.B. =highs)
+- Einheitliche Optionen threads, methode ('simplex', 'barriere', 'auto') und
+  presolve werden in die Optionsnamen des jeweiligen Solvers übersetzt
+- benchmark() misst Modellaufbau, Lösen und Ergebnisübernahme je Solver für
+  Konventionell und Zukunftssystem bei verschiedenen Zeithorizonten
+
+Verwendung:
+    from solver import optimiere, waehle_solver
+    optimiere(network)                          # bester verfügbarer Solver
+    optimiere(network, 'highs', threads=4, methode='barriere')
+
+    python solver.py                            # Benchmark
+"""
+
+import os
+import time
+from functools import lru_cache
+
+import linopy
+import pandas as pd
+import pypsa
+
+SOLVER_REIHENFOLGE = ('gurobi', 'highs', 'cbc', 'glpk')
+UMGEBUNGSVARIABLE = 'GEWAECHSHAUS_SOLVER'
+
+# Abgestimmte Standardoptionen je Solver (LP mit ~10^5 Variablen, Barriere ohne Crossover ist meist am schnellsten)
+STANDARD_OPTIONEN = {
+    'gurobi': {'methode': 'barriere', 'presolve': True, 'crossover': False},
+    'highs': {'methode': 'auto', 'presolve': True},
+    'cbc': {'presolve': True},
+    'glpk': {},
+}
+
+# Übersetzung der einheitlichen Optionen in die Optionsnamen der Solver
+_THREADS = {'gurobi': 'Threads', 'highs': 'threads', 'cbc': 'threads'}
+_METHODE = {
+    'gurobi': ('Method', {'simplex': 1, 'barriere': 2, 'auto': -1}),
+    'highs': ('solver', {'simplex': 'simplex', 'barriere': 'ipm', 'auto': 'choose'}),
+}
+_PRESOLVE = {
+    'gurobi': ('Presolve', {True: -1, False: 0}),
+    'highs': ('presolve', {True: 'on', False: 'off'}),
+    'cbc': ('presolve', {True: 'on', False: 'off'}),
+}
+_CROSSOVER = {'gurobi': ('Crossover', {True: -1, False: 0})}
+
+# Größenbeschränkte Gurobi-Lizenzen (pip-Installation) erlauben höchstens 2000 Variablen
+_GUROBI_TESTGROESSE = 2001
+
+
+@lru_cache(maxsize=None)
+def gurobi_lizenz() -> bool:
+    '''
+    Prüft, ob Gurobi mit einer vollwertigen Lizenz nutzbar ist.
+
+    linopy.available_solvers prüft nur, ob gurobipy importiert werden kann. Ohne
+    Lizenz schlägt bereits gurobipy.Env() fehl, mit der größenbeschränkten
+    pip-Lizenz erst das Lösen eines Modells mit mehr als 2000 Variablen.
+    '''
+    try:
+        import gurobipy
+    except ImportError:
+        return False
+    try:
+        with gurobipy.Env(params={'OutputFlag': 0}) as env, gurobipy.Model(env=env) as modell:
+            modell.addVars(_GUROBI_TESTGROESSE)
+            modell.optimize()
+    except gurobipy.GurobiError:
+        return False
+    return True
+
+
+def verfuegbare_solver() -> list:
+    '''Installierte und (bei Gurobi) lizenzierte Solver aus SOLVER_REIHENFOLGE (in dieser Reihenfolge).'''
+    return [name for name in SOLVER_REIHENFOLGE if name in linopy.available_solvers
+            and (name != 'gurobi' or gurobi_lizenz())]
+
+
+def waehle_solver(solver_name: str = None) -> str:
+    '''
+    Solvername für die Optimierung.
+
+    Reihenfolge: Argument, Umgebungsvariable GEWAECHSHAUS_SOLVER, erster
+    verfügbarer Solver aus SOLVER_REIHENFOLGE.
+    '''
+    name = solver_name or os.environ.get(UMGEBUNGSVARIABLE)
+    verfuegbar = verfuegbare_solver()
+    if name:
+        if name not in linopy.available_solvers:
+            raise RuntimeError(f"Solver '{name}' ist nicht installiert (verfügbar: {verfuegbar}).")
+        return name
+    if not verfuegbar:
+        raise RuntimeError(f"Keiner der Solver {SOLVER_REIHENFOLGE} ist installiert.")
+    return verfuegbar[0]
+
+
+def solver_optionen(solver_name: str, threads: int = None, methode: str = None,
+                    presolve: bool = None, **weitere) -> dict:
+    '''
+    Optionen für den Solver aus den einheitlichen Angaben.
+
+    Parameter
+    ----------
+    solver_name : str
+        'gurobi', 'highs', 'cbc' oder 'glpk'
+    threads : int
+        Anzahl Threads (None: Standard aus STANDARD_OPTIONEN bzw. des Solvers)
+    methode : str
+        'simplex', 'barriere' oder 'auto'
+    presolve : bool
+        Presolve ein/aus
+    **weitere
+        Solverspezifische Optionen, unverändert übernommen (z.B. output_flag=False)
+
+    Returns
+    -------
+    dict
+        Optionen für linopy/PyPSA (solver_options)
+    '''
+    standard = STANDARD_OPTIONEN.get(solver_name, {})
+    threads = threads if threads is not None else standard.get('threads')
+    methode = methode if methode is not None else standard.get('methode')
+    presolve = presolve if presolve is not None else standard.get('presolve')
+    # Crossover nur beim Barriereverfahren abschalten
+    crossover = standard.get('crossover') if methode == 'barriere' else None
+
+    optionen = {}
+    if threads is not None and solver_name in _THREADS:
+        optionen[_THREADS[solver_name]] = threads
+    if methode is not None and solver_name in _METHODE:
+        name, werte = _METHODE[solver_name]
+        if methode not in werte:
+            raise ValueError(f"methode muss eine von {list(werte)} sein.")
+        optionen[name] = werte[methode]
+    if presolve is not None and solver_name in _PRESOLVE:
+        name, werte = _PRESOLVE[solver_name]
+        optionen[name] = werte[bool(presolve)]
+    if crossover is not None and solver_name in _CROSSOVER:
+        name, werte = _CROSSOVER[solver_name]
+        optionen[name] = werte[bool(crossover)]
+    optionen.update(weitere)
+    return optionen
+
+
+def optimiere(network: pypsa.Network, solver_name: str = None, threads: int = None,
+              methode: str = None, presolve: bool = None, **weitere) -> tuple:
+    '''network.optimize mit automatisch gewähltem Solver und abgestimmten Optionen.'''
+    name = waehle_solver(solver_name)
+    # Konstante der Zielfunktion (Investition fester Komponenten) nicht als Variable ins LP
+    # (wie netzwerk.NetzModell; Standard ab PyPSA 2.0)
+    return network.optimize(solver_name=name, include_objective_constant=False,
+                            solver_options=solver_optionen(name, threads, methode, presolve, **weitere))
+
+
+def benchmark(solver=None, horizonte=(168, 720, 8760), systeme=('Konventionell', 'Zukunft'),
+              zeitreihen: pd.DataFrame = None, wiederholungen: int = 1, **optionen) -> pd.DataFrame:
+    '''
+    Laufzeiten je Solver, System und Zeithorizont.
+
+    Parameter
+    ----------
+    solver : list
+        Solvernamen (Standard: alle verfügbaren)
+    horizonte : tuple
+        Anzahl Stunden ab Jahresbeginn
+    systeme : tuple
+        'Konventionell' und/oder 'Zukunft'
+    zeitreihen : pd.DataFrame
+        Eingangszeitreihen (Standard: daten_cache.lade_zeitreihen())
+    wiederholungen : int
+        Läufe je Kombination (es wird jeweils der schnellste Lauf ausgewiesen)
+    **optionen
+        threads, methode, presolve oder solverspezifische Optionen (siehe solver_optionen)
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je (system, horizont, solver) mit aufbau_s, loesen_s, auslesen_s,
+        gesamt_s, status und objective
+    '''
+    from netzwerk import baue_konventionell, baue_zukunft
+
+    if zeitreihen is None:
+        from daten_cache import lade_zeitreihen
+        zeitreihen = lade_zeitreihen()
+    baue = {'Konventionell': baue_konventionell, 'Zukunft': baue_zukunft}
+
+    zeilen = []
+    for system in systeme:
+        for horizont in horizonte:
+            ausschnitt = zeitreihen.iloc[:horizont]
+            for name in solver or verfuegbare_solver():
+                bester = None
+                for _ in range(wiederholungen):
+                    start = time.perf_counter()
+                    n = baue[system](ausschnitt)
+                    n.optimize.create_model(include_objective_constant=False)
+                    aufgebaut = time.perf_counter()
+                    status, bedingung = n.model.solve(solver_name=name, **solver_optionen(name, **optionen))
+                    geloest = time.perf_counter()
+                    if status == 'ok':
+                        n.optimize.assign_solution()
+                        n.optimize.assign_duals(False)
+                        n.optimize.post_processing()
+                    ende = time.perf_counter()
+                    lauf = {'system': system, 'horizont': len(ausschnitt), 'solver': name,
+                            'aufbau_s': aufgebaut - start, 'loesen_s': geloest - aufgebaut,
+                            'auslesen_s': ende - geloest, 'gesamt_s': ende - start,
+                            'status': f'{status}/{bedingung}',
+                            'objective': n.model.objective.value if status == 'ok' else float('nan')}
+                    if bester is None or lauf['gesamt_s'] < bester['gesamt_s']:
+                        bester = lauf
+                zeilen.append(bester)
+    return pd.DataFrame(zeilen)
+
+
+if __name__ == '__main__':
+    print(f"Verfügbare Solver: {verfuegbare_solver()}, gewählt: {waehle_solver()}")
+    ergebnis = benchmark()
+    print(ergebnis.round(3).to_string(index=False))
@@ -0,0 +1,226 @@
+"""
+Synthetische Wetterjahre für Monte-Carlo-Risikoanalysen
+- Saisonaler Block-Bootstrap: das Zieljahr wird aus Blöcken ganzer Tage
+  (Standard 7 Tage) zusammengesetzt; jeder Block stammt aus einem Spenderjahr
+  und beginnt dort höchstens saisonfenster Tage vor oder nach seiner
+  Zielposition (Jahreszeit bleibt erhalten)
+- Alle Spalten eines Blocks kommen aus denselben Stunden desselben
+  Spenderjahrs -> Kreuzkorrelation zwischen Temperatur, Solarstrahlung,
+  Wind und den daraus berechneten Größen (Heizlast, COP, Lampenenergie) sowie
+  Tagesgang und Autokorrelation innerhalb der Blöcke bleiben erhalten
+- Spenderjahre müssen alle Spalten gemeinsam enthalten. Standard ist 2019
+  (Modelleingaben aus daten_cache plus T_aussen_C und Solar_W_m2); weitere
+  DWD-Jahre (Temperaturdaten 2024.csv, Solarhistorie 2009-2025) können als
+  Spender dienen, sobald für sie auch eine Windzeitreihe vorliegt
+  (z.B. über pipeline.standard_pipeline und windkraft)
+- wetterjahre() ist ein Generator: Szenarien werden einzeln erzeugt und
+  können in Stapeln (stapelweise) bewertet werden, ohne alle gleichzeitig
+  im Speicher zu halten; Szenario k ist über (seed, k) reproduzierbar
+- bewerte_szenarien() rechnet den Betrieb mit festen Kapazitäten je Szenario
+  im einmal aufgebauten Modell (netzwerk.NetzModell) und liefert die
+  Kennzahlen ebenfalls als Strom; risiko() fasst sie zusammen
+
+Verwendung:
+    from szenarien import wetterjahre, bewerte_szenarien, risiko
+    for jahr in wetterjahre(anzahl=1000, seed=1):
+        ...
+    tabelle = pd.DataFrame(bewerte_szenarien(wetterjahre(anzahl=200), kapazitaeten(n_zuk)))
+    print(risiko(tabelle, 'Betriebskosten'))
+"""
+
+import os
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from daten_cache import DATENORDNER, lade_heizlast, lade_zeitreihen
+from netzwerk import NetzModell, ZukunftParameter, baue_zukunft, kennzahlen
+from rollierender_horizont import baue_betrieb, zeitreihenwerte
+
+STUNDEN_JE_TAG = 24
+
+
+# ============================================================
+# Spenderjahre
+# ============================================================
+
+def standard_spender() -> list:
+    '''
+    Spenderjahr 2019: Heizlast_kW, Energy_kW, COP, Wind_kW (daten_cache.lade_zeitreihen)
+    sowie die Wettergrößen T_aussen_C und Solar_W_m2 derselben Stunden.
+    '''
+    from wetter_speicher import oeffne_wetter_speicher
+
+    zeitreihen = lade_zeitreihen()
+    temperatur = lade_heizlast()['T_aussen_C'].reindex(zeitreihen.index)
+    solar = oeffne_wetter_speicher(os.path.join(DATENORDNER, 'Solareinstrahlung_Bochum_Bremen.csv'),
+                                   datum_spalte='DateTime').als_dataframe(2019)['Solar_W_m2']
+    return [zeitreihen.assign(T_aussen_C=temperatur, Solar_W_m2=solar.reindex(zeitreihen.index))]
+
+
+def _tagesbloecke(spender: list) -> tuple:
+    # Spenderjahre als Array (Spender, Tag, Stunde, Spalte) auf gemeinsamer Tageszahl
+    spalten = list(spender[0].columns)
+    for jahr in spender[1:]:
+        if list(jahr.columns) != spalten:
+            raise ValueError(f"Alle Spenderjahre brauchen die Spalten {spalten}.")
+    tage = min(len(jahr) // STUNDEN_JE_TAG for jahr in spender)
+    werte = np.stack([jahr[spalten].to_numpy(dtype=np.float64)[:tage * STUNDEN_JE_TAG] for jahr in spender])
+    if np.isnan(werte).any():
+        raise ValueError("Spenderjahre dürfen keine Lücken (NaN) enthalten.")
+    return werte.reshape(len(spender), tage, STUNDEN_JE_TAG, len(spalten)), spalten
+
+
+# ============================================================
+# Szenariogenerator
+# ============================================================
+
+def wetterjahre(anzahl: int = None, spender: list = None, blocklaenge: int = 7, saisonfenster: int = 15,
+                seed: int = 0, index: pd.DatetimeIndex = None):
+    '''
+    Erzeugt synthetische Jahre durch saisonalen Block-Bootstrap (Generator).
+
+    Parameter
+    ----------
+    anzahl : int
+        Anzahl Szenarien (None: unbegrenzt, z.B. mit islice begrenzen)
+    spender : list
+        Spenderjahre als DataFrames mit stündlichem Index und gleichen Spalten
+        (Standard: standard_spender())
+    blocklaenge : int
+        Blocklänge in Tagen
+    saisonfenster : int
+        Größte Verschiebung eines Blocks gegenüber seiner Zielposition in Tagen
+    seed : int
+        Startwert; Szenario k hängt nur von (seed, k) ab
+    index : pd.DatetimeIndex
+        Zeitindex der Szenarien (Standard: Index des ersten Spenderjahrs, auf ganze Tage gekürzt)
+
+    Yields
+    ------
+    pd.DataFrame
+        Ein synthetisches Jahr mit den Spalten der Spenderjahre; attrs['bloecke'] enthält
+        je Block (Zieltag, Spender, Quelltag, Tage)
+    '''
+    if blocklaenge < 1 or saisonfenster < 0:
+        raise ValueError("blocklaenge muss >= 1 und saisonfenster >= 0 sein.")
+    spender = spender if spender is not None else standard_spender()
+    werte, spalten = _tagesbloecke(spender)
+    anzahl_spender, tage = werte.shape[:2]
+    if index is None:
+        index = spender[0].index[:tage * STUNDEN_JE_TAG]
+    if len(index) != tage * STUNDEN_JE_TAG:
+        raise ValueError(f"index muss {tage * STUNDEN_JE_TAG} Stunden umfassen.")
+
+    folge = np.random.SeedSequence(seed)
+    nummer = 0
+    while anzahl is None or nummer < anzahl:
+        rng = np.random.default_rng(folge.spawn(1)[0])
+        jahr = np.empty((tage, STUNDEN_JE_TAG, len(spalten)))
+        bloecke = []
+        for ziel in range(0, tage, blocklaenge):
+            laenge = min(blocklaenge, tage - ziel)
+            von = max(0, ziel - saisonfenster)
+            bis = min(tage - laenge, ziel + saisonfenster)
+            quelle = int(rng.integers(von, bis + 1))
+            nr = int(rng.integers(anzahl_spender))
+            jahr[ziel:ziel + laenge] = werte[nr, quelle:quelle + laenge]
+            bloecke.append((ziel, nr, quelle, laenge))
+        szenario = pd.DataFrame(jahr.reshape(-1, len(spalten)), index=index, columns=spalten)
+        szenario.attrs['bloecke'] = bloecke
+        yield szenario
+        nummer += 1
+
+
+def stapelweise(szenarien, groesse: int):
+    '''Fasst einen Strom von Szenarien zu Listen mit höchstens groesse Einträgen zusammen (Generator).'''
+    szenarien = iter(szenarien)
+    while stapel := list(islice(szenarien, groesse)):
+        yield stapel
+
+
+# ============================================================
+# Bewertung
+# ============================================================
+
+def bewerte_szenarien(szenarien, kapazitaeten: dict, parameter: ZukunftParameter = None,
+                      solver_name: str = None, **solver_optionen):
+    '''
+    Betrieb des Zukunftssystems mit festen Kapazitäten je Szenario (Generator).
+
+    Das Modell wird für das erste Szenario aufgebaut; für jedes weitere werden
+    nur Lasten, Windverfügbarkeit und COP im bestehenden Modell ersetzt.
+    Speicher sind zyklisch (Füllstand am Jahresende = Jahresanfang).
+
+    Parameter
+    ----------
+    szenarien : iterable
+        Szenarien wie von wetterjahre() (alle mit demselben Zeitindex)
+    kapazitaeten : dict
+        (Komponente, Name) -> feste Kapazität (rollierender_horizont.kapazitaeten)
+    parameter : ZukunftParameter
+        Kosten und Verluste
+
+    Yields
+    ------
+    dict
+        szenario (laufende Nummer), status und Kennzahlen wie netzwerk.kennzahlen
+    '''
+    parameter = parameter or ZukunftParameter()
+    modell = None
+    for nummer, szenario in enumerate(szenarien):
+        if modell is None:
+            network = baue_betrieb(szenario, kapazitaeten, parameter)
+            network.stores['e_cyclic'] = True
+            modell = NetzModell(network, parameter, szenario)
+        else:
+            for komponente, name, attribut, wert in zeitreihenwerte(szenario, parameter, modell.network.snapshots):
+                modell.setze(komponente, name, attribut, wert)
+        status, bedingung = modell.loese(solver_name, **solver_optionen)
+        ergebnis = {'szenario': nummer, 'status': status}
+        if status == 'ok':
+            ergebnis.update(kennzahlen(modell.network))
+        yield ergebnis
+
+
+def risiko(tabelle: pd.DataFrame, spalte: str = 'Betriebskosten', niveau: float = 0.95) -> dict:
+    '''
+    Kennwerte der Verteilung einer Ergebnisgröße über die Szenarien.
+
+    Returns
+    -------
+    dict
+        mittelwert, standardabweichung, minimum, maximum, quantil (Value at Risk auf
+        dem Niveau) und cvar (Mittelwert der Szenarien oberhalb des Quantils)
+    '''
+    werte = tabelle[spalte].dropna()
+    quantil = werte.quantile(niveau)
+    return {'anzahl': len(werte), 'mittelwert': float(werte.mean()), 'standardabweichung': float(werte.std()),
+            'minimum': float(werte.min()), 'maximum': float(werte.max()), 'quantil': float(quantil),
+            'cvar': float(werte[werte >= quantil].mean())}
+
+
+if __name__ == '__main__':
+    import time
+
+    from rollierender_horizont import kapazitaeten
+
+    spender = standard_spender()
+    original = spender[0]
+
+    # Kreuzkorrelation und Tagesmittel: Original vs. 200 synthetische Jahre
+    start = time.perf_counter()
+    korrelation = sum(jahr.corr() for jahr in wetterjahre(200, spender, seed=1)) / 200
+    print(f"200 Szenarien in {time.perf_counter() - start:.2f} s")
+    print("Korrelation Original:\n", original.corr().round(2))
+    print("Korrelation synthetisch (Mittel):\n", korrelation.round(2))
+
+    # Monte Carlo: Betrieb mit den Kapazitäten der Auslegung auf 2019
+    auslegung = NetzModell(baue_zukunft(original), ZukunftParameter(), original)
+    auslegung.loese()
+    kap = kapazitaeten(auslegung.network)
+    start = time.perf_counter()
+    tabelle = pd.DataFrame(bewerte_szenarien(wetterjahre(20, spender, seed=2), kap))
+    print(f"20 Szenarien bewertet in {time.perf_counter() - start:.1f} s")
+    print({k: round(v, 1) for k, v in risiko(tabelle).items()})
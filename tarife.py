@@ -0,0 +1,265 @@
+"""
+Zeitabhängige Strom- und Gaspreise für die Optimierung
+- Einlesen der Destatis-Tabellen 61243-0005 (Strom) und 61243-0014 (Erdgas)
+  für Nicht-Haushalte: Semikolon-getrennt, mehrzeiliger Kopf, Halbjahre,
+  Jahresverbrauchsklassen und drei Preisarten, Dezimalkomma, '-' = kein Wert
+- Der Energieträger wird aus dem Tabellenkopf gelesen, nicht aus dem
+  Dateinamen (im Abgabeordner enthält "Strompreise 2019.csv" die Gaspreise
+  und "Erdgaspreise 2019.csv" die Strompreise)
+- tarif_zeitreihe() bildet Halbjahr und Verbrauchsklasse auf die Snapshots ab;
+  Halbjahre ohne Wert (2019: 1. Halbjahr) erhalten den Preis des nächsten
+  Halbjahrs mit Wert derselben Klasse
+- spotpreis_zeitreihe() übernimmt stündliche Börsenpreise (z.B. Day-Ahead in
+  EUR/MWh) mit festem Aufschlag für Netzentgelte, Umlagen usw.
+- Die Zeitreihen werden als Preis in die Parameter übernommen
+  (netz_import_kosten, strom_preis, gas_preis); im bestehenden Modell
+  (netzwerk.NetzModell) ändert ein Tarifwechsel nur die Kostenkoeffizienten
+
+Verwendung:
+    from tarife import lade_preistabellen, tarif_zeitreihe, mit_tarifen
+    tabelle = lade_preistabellen()
+    strom = tarif_zeitreihe(tabelle, zeitreihen.index, 'Strom', jahresverbrauch_MWh=5300)
+    modell.setze_parameter(mit_tarifen(modell.parameter, strom=strom))
+"""
+
+import os
+import re
+from dataclasses import fields, replace
+
+import numpy as np
+import pandas as pd
+
+from daten_cache import DATENORDNER
+
+DATEI_STROMPREISE = os.path.join(DATENORDNER, 'Strompreise 2019.csv')
+DATEI_GASPREISE = os.path.join(DATENORDNER, 'Erdgaspreise 2019.csv')
+
+# Preisarten der Destatis-Tabellen (Spaltenkopf -> Kurzname)
+PREISARTEN = ('ohne_steuern', 'ohne_ust', 'inkl_steuern')
+INSGESAMT = 'Insgesamt'
+
+# Preisfelder der Parameter-Dataclasses je Energieträger
+_PREISFELDER = {'strom': ('netz_import_kosten', 'strom_preis'), 'gas': ('gas_preis',)}
+
+
+# ============================================================
+# Einlesen der Destatis-Tabellen
+# ============================================================
+
+def _zahl(text: str) -> float:
+    # '0,0362' -> 0.0362; '-', '.', '' -> NaN
+    text = text.strip()
+    if not text or text in ('-', '.', 'x', '...'):
+        return np.nan
+    return float(text.replace(',', '.'))
+
+
+def _klassengrenzen(klasse: str) -> tuple:
+    # 'unter 278 MWh', '278 bis unter 2 778 MWh', '1 111 111 MWh und mehr' -> (von, bis) in MWh
+    zahlen = [float(re.sub(r'\s', '', z)) for z in re.findall(r'\d[\d\s]*\d|\d', klasse)]
+    if klasse.startswith('unter'):
+        return 0.0, zahlen[0]
+    if 'bis unter' in klasse:
+        return zahlen[0], zahlen[1]
+    if 'und mehr' in klasse:
+        return zahlen[0], np.inf
+    return np.nan, np.nan
+
+
+def _preisart(kopf: str) -> str:
+    if 'inkl' in kopf:
+        return 'inkl_steuern'
+    if 'Umsatzsteuer' in kopf:
+        return 'ohne_ust'
+    return 'ohne_steuern'
+
+
+def lese_destatis(pfad: str) -> pd.DataFrame:
+    '''
+    Liest eine Destatis-Preistabelle (Strom- oder Erdgaspreise für Nicht-Haushalte).
+
+    Parameter
+    ----------
+    pfad : str
+        CSV-Datei wie von Destatis (GENESIS) exportiert
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je (Jahr, Halbjahr, Verbrauchsklasse, Preisart) mit den Spalten
+        energietraeger ('strom'/'gas'), jahr, halbjahr, klasse, von_MWh, bis_MWh,
+        preisart und preis (€/kWh, NaN ohne Wert)
+    '''
+    with open(pfad, encoding='utf-8-sig') as f:
+        zeilen = [zeile.rstrip('\n').split(';') for zeile in f]
+
+    energietraeger, preisarten = None, None
+    jahr, halbjahr = None, None
+    daten = []
+    for felder in zeilen:
+        erstes = felder[0].strip()
+        if erstes.startswith('___'):
+            break
+        zweites = felder[1].strip() if len(felder) > 1 else ''
+        if not erstes and 'preise' in zweites and energietraeger is None:
+            energietraeger = 'gas' if zweites.startswith('Erdgas') else 'strom'
+        elif not erstes and 'Durchschnittspreise' in zweites:
+            # Preisart je Wertespalte (Spalten 1, 3, 5; dazwischen Qualitätskennzeichen)
+            preisarten = {i: _preisart(felder[i]) for i in range(1, len(felder), 2) if felder[i].strip()}
+        elif re.fullmatch(r'\d{4}', erstes):
+            jahr = int(erstes)
+        elif re.fullmatch(r'\d\. Halbjahr', erstes):
+            halbjahr = int(erstes[0])
+        elif jahr is not None and halbjahr is not None and erstes:
+            von, bis = _klassengrenzen(erstes)
+            for spalte, preisart in preisarten.items():
+                daten.append({'energietraeger': energietraeger, 'jahr': jahr, 'halbjahr': halbjahr,
+                              'klasse': erstes, 'von_MWh': von, 'bis_MWh': bis, 'preisart': preisart,
+                              'preis': _zahl(felder[spalte]) if spalte < len(felder) else np.nan})
+    if energietraeger is None or preisarten is None or not daten:
+        raise ValueError(f"{pfad}: keine Destatis-Preistabelle (Kopf oder Werte nicht gefunden).")
+    return pd.DataFrame(daten)
+
+
+def lade_preistabellen(dateien=(DATEI_STROMPREISE, DATEI_GASPREISE)) -> pd.DataFrame:
+    '''Alle Preistabellen in einer Tabelle (Energieträger laut Tabellenkopf, siehe lese_destatis).'''
+    return pd.concat([lese_destatis(pfad) for pfad in dateien], ignore_index=True)
+
+
+# ============================================================
+# Preise je Snapshot
+# ============================================================
+
+def _klasse_fuer(tabelle: pd.DataFrame, jahresverbrauch_MWh: float) -> str:
+    if jahresverbrauch_MWh is None:
+        return INSGESAMT
+    passend = tabelle[(tabelle['von_MWh'] <= jahresverbrauch_MWh) & (jahresverbrauch_MWh < tabelle['bis_MWh'])]
+    if passend.empty:
+        raise ValueError(f"Keine Verbrauchsklasse für {jahresverbrauch_MWh} MWh/a.")
+    return passend['klasse'].iloc[0]
+
+
+def tarif_zeitreihe(tabelle: pd.DataFrame, snapshots: pd.DatetimeIndex, energietraeger: str,
+                    jahresverbrauch_MWh: float = None, preisart: str = 'ohne_ust') -> pd.Series:
+    '''
+    Halbjahrespreis der passenden Verbrauchsklasse je Snapshot.
+
+    Parameter
+    ----------
+    tabelle : pd.DataFrame
+        Preistabellen (lade_preistabellen)
+    snapshots : pd.DatetimeIndex
+        Zeitindex des Netzwerks
+    energietraeger : str
+        'strom' oder 'gas'
+    jahresverbrauch_MWh : float
+        Jahresverbrauch zur Wahl der Verbrauchsklasse (None: Klasse 'Insgesamt')
+    preisart : str
+        'ohne_steuern', 'ohne_ust' (Standard, entspricht den bisherigen festen Preisen) oder 'inkl_steuern'
+
+    Returns
+    -------
+    pd.Series
+        Preis in €/kWh über die Snapshots. Halbjahre ohne Wert und Jahre außerhalb
+        der Tabelle erhalten den Preis des zeitlich nächsten Halbjahrs mit Wert.
+    '''
+    energietraeger = energietraeger.lower()
+    if preisart not in PREISARTEN:
+        raise ValueError(f"preisart muss eine von {PREISARTEN} sein.")
+    auswahl = tabelle[(tabelle['energietraeger'] == energietraeger) & (tabelle['preisart'] == preisart)]
+    if auswahl.empty:
+        raise ValueError(f"Keine Preise für '{energietraeger}' in der Tabelle.")
+    klasse = _klasse_fuer(auswahl, jahresverbrauch_MWh)
+
+    # Halbjahre fortlaufend nummeriert (Jahr * 2 + Halbjahr - 1)
+    werte = auswahl[auswahl['klasse'] == klasse].dropna(subset=['preis'])
+    if werte.empty:
+        raise ValueError(f"Keine Preise für '{energietraeger}', Klasse '{klasse}'.")
+    je_halbjahr = pd.Series(werte['preis'].to_numpy(),
+                            index=werte['jahr'] * 2 + werte['halbjahr'] - 1).sort_index()
+    halbjahre = snapshots.year * 2 + (snapshots.month > 6)
+    preise = je_halbjahr.reindex(np.unique(halbjahre), method='nearest')
+    return pd.Series(preise.reindex(halbjahre).to_numpy(), index=snapshots,
+                     name=f'{energietraeger}_{preisart}')
+
+
+def spotpreis_zeitreihe(spotpreise: pd.Series, snapshots: pd.DatetimeIndex, einheit: str = 'EUR/MWh',
+                        aufschlag: float = 0.0) -> pd.Series:
+    '''
+    Börsenpreise (z.B. Day-Ahead) als Bezugspreis je Snapshot.
+
+    Parameter
+    ----------
+    spotpreise : pd.Series
+        Preise mit Zeitindex, stündlich oder feiner (wird zu Stundenmitteln zusammengefasst)
+    snapshots : pd.DatetimeIndex
+        Zeitindex des Netzwerks
+    einheit : str
+        'EUR/MWh' oder 'EUR/kWh'
+    aufschlag : float
+        Fester Aufschlag in €/kWh (Netzentgelte, Umlagen, Steuern)
+
+    Returns
+    -------
+    pd.Series
+        Preis in €/kWh über die Snapshots
+    '''
+    if einheit not in ('EUR/MWh', 'EUR/kWh'):
+        raise ValueError("einheit muss 'EUR/MWh' oder 'EUR/kWh' sein.")
+    stuendlich = spotpreise.astype(float).resample('h').mean()
+    preise = stuendlich.reindex(snapshots)
+    if preise.isna().any():
+        raise ValueError(f"Spotpreise fehlen für {int(preise.isna().sum())} Snapshots.")
+    if einheit == 'EUR/MWh':
+        preise = preise / 1000
+    return (preise + aufschlag).rename('spot')
+
+
+def mit_tarifen(parameter, strom: pd.Series = None, gas: pd.Series = None):
+    '''
+    Parametersatz mit Preiszeitreihen statt fester Preise.
+
+    Setzt je nach Dataclass netz_import_kosten (ZukunftParameter) bzw.
+    strom_preis und gas_preis (KonventionellParameter).
+    '''
+    vorhanden = {feld.name for feld in fields(parameter)}
+    aenderungen = {}
+    for energietraeger, preis in (('strom', strom), ('gas', gas)):
+        if preis is not None:
+            aenderungen.update({feld: preis for feld in _PREISFELDER[energietraeger] if feld in vorhanden})
+    return replace(parameter, **aenderungen)
+
+
+if __name__ == '__main__':
+    import time
+
+    from daten_cache import lade_zeitreihen
+    from direkter_einsatz import optimiere_schnell
+    from netzwerk import (KonventionellParameter, NetzModell, ZukunftParameter, baue_konventionell,
+                          baue_zukunft, kennzahlen)
+
+    tabelle = lade_preistabellen()
+    print(tabelle[tabelle['halbjahr'] == 2].pivot_table(index=['energietraeger', 'klasse'], columns='preisart',
+                                                         values='preis', sort=False))
+
+    zeitreihen = lade_zeitreihen()
+    strom_MWh = zeitreihen['Energy_kW'].sum() / 1000
+    gas_MWh = zeitreihen['Heizlast_kW'].sum() / KonventionellParameter().gaskessel_wirkungsgrad / 1000
+    strom = tarif_zeitreihe(tabelle, zeitreihen.index, 'strom', strom_MWh)
+    gas = tarif_zeitreihe(tabelle, zeitreihen.index, 'gas', gas_MWh)
+    print(f"Strom ({strom_MWh:,.0f} MWh/a): {strom.mean():.4f} €/kWh, Gas ({gas_MWh:,.0f} MWh/a): {gas.mean():.4f} €/kWh")
+
+    n_konv = baue_konventionell(zeitreihen, mit_tarifen(KonventionellParameter(), strom, gas))
+    optimiere_schnell(n_konv)
+    print(f"Konventionell mit Destatis-Tarif: {n_konv.objective:,.0f} €/a")
+
+    # Tarifwechsel im bestehenden Modell: nur Kostenkoeffizienten
+    modell = NetzModell(baue_zukunft(zeitreihen), ZukunftParameter(), zeitreihen)
+    modell.loese()
+    print(f"Zukunft fester Preis: {modell.network.objective:,.0f} €/a")
+    inkl = tarif_zeitreihe(tabelle, zeitreihen.index, 'strom', strom_MWh, preisart='inkl_steuern')
+    start = time.perf_counter()
+    modell.setze_parameter(mit_tarifen(modell.parameter, strom=inkl))
+    print(f"Tarifwechsel in {time.perf_counter() - start:.2f} s")
+    modell.loese()
+    print(f"Zukunft inkl. Steuern: {kennzahlen(modell.network)['Gesamtkosten']:,.0f} €/a")
@@ -0,0 +1,318 @@
+"""
+Dynamische thermische Simulation des Gewächshauses (RC-Modell)
+- Drei thermische Massen: Luft (inkl. Einbauten/Pflanzen), Hülle (Glas + Tragwerk), Boden
+- Wärmeströme: Lüftung Luft->außen, Hülle innen/außen, Boden->Luft, Boden->Erdreich
+- Solare Gewinne werden auf Luft, Hülle und Boden verteilt
+- Ideale Heizung hält die Luft auf mindestens T_i; Überhitzung (T_Luft > T_i)
+  und gespeicherte Solargewinne werden abgebildet
+- Zeitschritte von 1-60 Minuten, Ausgabe als stündliche Heizlast_kW
+
+Im Gegensatz zu calculation_heat_transfer.py (stationär, ohne Speicher) wird
+das Modell mit dem impliziten Euler-Verfahren gelöst. Alle Zeitschritte und
+alle Entwürfe bilden ein lineares Gleichungssystem mit Bandstruktur, das in
+einem Aufruf von scipy.linalg.solve_banded gelöst wird. Je Zeitschritt gilt
+einer von zwei Betriebszuständen:
+    geheizt:       T_Luft = T_i, Heizleistung unbekannt (>= 0)
+    nicht geheizt: Heizleistung = 0, T_Luft unbekannt (>= T_i)
+Die Rechnung läuft abschnittsweise vorwärts: Ein Fenster (z.B. ein Tag) wird
+mit unverändertem Betriebszustand gelöst und beim ersten Zeitschritt, in dem
+die Annahme verletzt ist, abgeschnitten; dort wechselt der Zustand. Das
+Ergebnis ist exakt (wie eine Schritt-für-Schritt-Regelung), die Anzahl der
+Gleichungslösungen entspricht etwa der Anzahl der Schaltvorgänge und ist
+unabhängig von der Schrittweite. Ein Jahr mit 5-Minuten-Schritten dauert
+deutlich unter einer Sekunde.
+
+Verwendung:
+    from thermische_simulation import simuliere
+    ergebnis = simuliere(T_aussen, G_solar, schritt_minuten=5)
+    heizlast = ergebnis['Heizlast_kW'][0]     # stündlich, wie heizlast_2019.csv
+"""
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import solve_banded
+
+from calculation_heat_transfer import exportiere_heizlast, geometrie
+
+# ============================================================
+# Standardparameter
+# ============================================================
+
+STANDARD_PARAMETER = {
+    # wie im stationären Modell (calculation_heat_transfer.py)
+    'A_grund': 10000,           # Grundfläche in m²
+    'hoehe': 4.5,               # Höhe in m
+    'U': 4.0,                   # U-Wert Hülle in W/(m²·K)
+    'T_i': 20,                  # Solltemperatur (Heizgrenze) in °C
+    'n': 0.5,                   # Luftwechselrate in 1/h
+    'cp_luft': 0.33333,         # Spez. Wärmekapazität Luft in Wh/(K·m³)
+    'eta_solar': 0.8,           # Solarer Transmissionsgrad
+    # Wärmekapazitäten
+    'c_innen': 5.0,             # Einbauten/Pflanzen in Wh/(m²·K), bezogen auf Grundfläche
+    'c_huelle': 3.0,            # Glas + Tragwerk in Wh/(m²·K), bezogen auf Hüllfläche
+    'c_boden': 160.0,           # aktive Bodenschicht (~0,3 m) in Wh/(m²·K)
+    # Boden
+    'h_boden': 5.0,             # Wärmeübergang Luft-Boden in W/(m²·K)
+    'u_boden': 0.5,             # Boden -> tiefes Erdreich in W/(m²·K)
+    'T_erdreich': 10.0,         # Temperatur tiefes Erdreich in °C
+    # Aufteilung der solaren Gewinne (Rest: Boden)
+    'anteil_solar_luft': 0.3,
+    'anteil_solar_huelle': 0.1,
+}
+
+# Bandbreite des Gleichungssystems: 3 Zustände je Zeitschritt,
+# Kopplung an den vorherigen Zeitschritt -> 3 Nebendiagonalen unten, 2 oben
+_L, _U = 3, 2
+
+
+def _parameter_matrix(entwuerfe: pd.DataFrame, parameter: dict) -> dict:
+    # Alle Parameter als Spaltenvektoren (Entwürfe x 1)
+    werte = dict(STANDARD_PARAMETER)
+    werte.update(parameter)
+    if entwuerfe is not None:
+        werte.update({s: entwuerfe[s].to_numpy(dtype=float) for s in entwuerfe.columns})
+    unbekannt = set(werte) - set(STANDARD_PARAMETER)
+    if unbekannt:
+        raise ValueError(f"Unbekannte Parameter: {sorted(unbekannt)}")
+    namen = list(werte)
+    gebroadcastet = np.broadcast_arrays(*[np.asarray(werte[s], dtype=float) for s in namen])
+    return {s: np.atleast_1d(w)[:, None] for s, w in zip(namen, gebroadcastet)}
+
+
+def _kennwerte(p: dict, dt: float) -> dict:
+    # Leitwerte in W/K, Kapazitäten in Wh/K (dt in h -> C/dt in W/K)
+    geo = geometrie(p['A_grund'], p['hoehe'])
+    H_huelle = p['U'] * geo['A_huell']
+    k = {
+        'H_ve': geo['V'] * p['n'] * p['cp_luft'],
+        # Hülle als zwei gleiche Reihenwiderstände: innen und außen je 2·U·A
+        'H_as': 2 * H_huelle,
+        'H_so': 2 * H_huelle,
+        'H_ag': p['h_boden'] * p['A_grund'],
+        'H_gd': p['u_boden'] * p['A_grund'],
+        'C_a': (geo['V'] * p['cp_luft'] + p['c_innen'] * p['A_grund']) / dt,
+        'C_s': p['c_huelle'] * geo['A_huell'] / dt,
+        'C_g': p['c_boden'] * p['A_grund'] / dt,
+        'A_solar': geo['A_dach'] * p['eta_solar'],
+    }
+    # Hauptdiagonale je Zustand (Luft, Hülle, Boden)
+    k['a_aa'] = k['C_a'] + k['H_as'] + k['H_ag'] + k['H_ve']
+    k['a_ss'] = k['C_s'] + k['H_as'] + k['H_so']
+    k['a_gg'] = k['C_g'] + k['H_ag'] + k['H_gd']
+    return k
+
+
+def _quellterme(k: dict, p: dict, T_o: np.ndarray, S: np.ndarray) -> np.ndarray:
+    # Von den Zuständen unabhängige Wärmeströme je Zeitschritt und Zustand (Entwürfe x Schritte x 3)
+    f_luft, f_huelle = p['anteil_solar_luft'], p['anteil_solar_huelle']
+    f_boden = 1 - f_luft - f_huelle
+    r = np.empty(T_o.shape + (3,))
+    r[:, :, 0] = k['H_ve'] * T_o + f_luft * k['A_solar'] * S
+    r[:, :, 1] = k['H_so'] * T_o + f_huelle * k['A_solar'] * S
+    r[:, :, 2] = k['H_gd'] * p['T_erdreich'] + f_boden * k['A_solar'] * S
+    return r
+
+
+def _loese(k: dict, p: dict, r: np.ndarray, geheizt: np.ndarray, start: np.ndarray):
+    '''
+    Löst das implizite Euler-System für gegebene Heiz-Zeitschritte.
+
+    Unbekannte je Zeitschritt: [T_Luft bzw. Heizleistung, T_Hülle, T_Boden].
+    k, p und start enthalten eine Zeile je Entwurf, r und geheizt die Zeitschritte
+    des Fensters (Entwürfe x Schritte [x 3]). Alle Entwürfe werden
+    hintereinander in ein Bandsystem gelegt.
+    '''
+    D, N, _ = r.shape
+    T_set = p['T_i']
+    a_aa, a_ss, a_gg = k['a_aa'], k['a_ss'], k['a_gg']
+    eins = np.ones((D, N))
+
+    # Bandmatrix: ab[_U - (c - r), c] = A[r, c]
+    ab = np.zeros((_L + _U + 1, D * N * 3))
+
+    def setze(i, j, wert):
+        # Eintrag (Zustand i, Zustand j) im selben Zeitschritt
+        ab[_U - (j - i), j::3] = (wert * eins).ravel()
+
+    setze(0, 0, np.where(geheizt, -1.0, a_aa))
+    setze(0, 1, -k['H_as'])
+    setze(0, 2, -k['H_ag'])
+    setze(1, 0, np.where(geheizt, 0.0, -k['H_as']))
+    setze(1, 1, a_ss)
+    setze(2, 0, np.where(geheizt, 0.0, -k['H_ag']))
+    setze(2, 2, a_gg)
+
+    # Kopplung an den vorherigen Zeitschritt (Abstand 3 Zeilen)
+    vorher_geheizt = np.zeros((D, N), dtype=bool)
+    vorher_geheizt[:, 1:] = geheizt[:, :-1]
+    erster = np.zeros((D, N), dtype=bool)
+    erster[:, 0] = True
+    for i, C in enumerate([k['C_a'], k['C_s'], k['C_g']]):
+        kopplung = -C * eins
+        kopplung[erster] = 0.0
+        if i == 0:
+            kopplung[vorher_geheizt] = 0.0
+        # Zeile r = 3m + i, Spalte c = r - 3 -> ab[_U + 3, c]
+        ab[_U + 3, i::3] = np.roll(kopplung, -1, axis=1).ravel()
+    ab[_U + 3, -3:] = 0.0
+
+    # Rechte Seite
+    b = r.copy()
+    # Bekannte Lufttemperatur in geheizten Schritten auf die rechte Seite
+    b[:, :, 0] -= np.where(geheizt, a_aa * T_set, 0.0)
+    b[:, :, 1] += np.where(geheizt, k['H_as'] * T_set, 0.0)
+    b[:, :, 2] += np.where(geheizt, k['H_ag'] * T_set, 0.0)
+    b[:, :, 0] += np.where(vorher_geheizt, k['C_a'] * T_set, 0.0)
+    # Anfangszustand
+    b[:, 0, 0] += (k['C_a'] * start[:, [0]]).ravel()
+    b[:, 0, 1] += (k['C_s'] * start[:, [1]]).ravel()
+    b[:, 0, 2] += (k['C_g'] * start[:, [2]]).ravel()
+
+    z = solve_banded((_L, _U), ab, b.ravel(), overwrite_ab=True, overwrite_b=True,
+                     check_finite=False).reshape(D, N, 3)
+    T_luft = np.where(geheizt, T_set * eins, z[:, :, 0])
+    Q_heiz = np.where(geheizt, z[:, :, 0], 0.0)
+    return T_luft, z[:, :, 1], z[:, :, 2], Q_heiz
+
+
+def simuliere(T_aussen, G_solar, schritt_minuten: int = 5, entwuerfe: pd.DataFrame = None,
+              fenster_stunden: int = 24, toleranz: float = 1e-6, **parameter) -> dict:
+    '''
+    Simuliert ein Jahr (oder beliebigen Zeitraum) für einen oder viele Entwürfe.
+
+    Parameter
+    ----------
+    T_aussen : array
+        Stündliche Außentemperatur in °C (Momentanwert zur vollen Stunde)
+    G_solar : array
+        Stündliche Globalstrahlung in W/m² (Stundenmittel)
+    schritt_minuten : int
+        Zeitschritt in Minuten, muss 60 teilen (z.B. 1, 5, 15, 60)
+    entwuerfe : pd.DataFrame
+        Optional: eine Zeile je Entwurf, Spalten aus STANDARD_PARAMETER
+    fenster_stunden : int
+        Länge des gemeinsam gelösten Fensters in Stunden
+    toleranz : float
+        Toleranz für T_Luft < T_i bzw. Heizleistung < 0 (in K bzw. W)
+    **parameter
+        Einzelne Parameter (Skalar oder Array je Entwurf), siehe STANDARD_PARAMETER
+
+    Returns
+    -------
+    dict
+        Heizlast_kW     stündliche Heizlast, Form (Entwürfe x Stunden)
+        T_luft_C        stündliches Mittel der Lufttemperatur, Form (Entwürfe x Stunden)
+        T_luft_max_C    stündliches Maximum der Lufttemperatur
+        schaltvorgaenge Anzahl Wechsel zwischen geheizt / nicht geheizt je Entwurf
+        loesungen       Anzahl gelöster Gleichungssysteme
+    '''
+    if 60 % schritt_minuten:
+        raise ValueError("schritt_minuten muss 60 ohne Rest teilen.")
+    T_aussen = np.asarray(T_aussen, dtype=float)
+    G_solar = np.nan_to_num(np.asarray(G_solar, dtype=float), nan=0.0)
+    n_stunden = min(len(T_aussen), len(G_solar))
+    T_aussen, G_solar = T_aussen[:n_stunden], G_solar[:n_stunden]
+
+    p = _parameter_matrix(entwuerfe, parameter)
+    D = len(p['A_grund'])
+    teile = 60 // schritt_minuten
+    dt = schritt_minuten / 60                         # in h
+    k = _kennwerte(p, dt)
+
+    # Eingangsdaten auf Teilschritte: Temperatur linear interpoliert, Strahlung als Stundenmittel
+    # Stunde k umfasst [k - 0,5 h, k + 0,5 h), Auswertung in der Mitte des Teilschritts
+    N = n_stunden * teile
+    w = fenster_stunden * teile
+    t = np.arange(N + w) / teile + dt / 2 - 0.5       # + ein Fenster Überhang am Ende
+    T_o = np.broadcast_to(np.interp(t, np.arange(n_stunden), T_aussen), (D, N + w))
+    S = np.broadcast_to(np.repeat(G_solar, teile)[np.minimum(np.arange(N + w), N - 1)], (D, N + w))
+    r = _quellterme(k, p, T_o, S)
+
+    # Anfangszustand: alle Massen auf Solltemperatur, Start ohne Heizung
+    zustand = np.hstack([p['T_i'], p['T_i'], p['T_i']])
+    geheizt = np.zeros(D, dtype=bool)
+    gewechselt = np.zeros(D, dtype=bool)
+    position = np.zeros(D, dtype=np.intp)
+    T_luft = np.empty((D, N + w))
+    Q_heiz = np.empty((D, N + w))
+    schaltvorgaenge = np.zeros(D, dtype=int)
+
+    loesungen = 0
+    while (aktiv := np.nonzero(position < N)[0]).size:
+        # Fenster ab der aktuellen Position, Betriebszustand im ganzen Fenster unverändert
+        schritte = position[aktiv, None] + np.arange(w)
+        k_a = {name: wert[aktiv] for name, wert in k.items()}
+        p_a = {name: wert[aktiv] for name, wert in p.items()}
+        maske = np.repeat(geheizt[aktiv, None], w, axis=1)
+        T_l, T_s, T_g, Q = _loese(k_a, p_a, r[aktiv[:, None], schritte], maske, zustand[aktiv])
+        loesungen += 1
+
+        # Erster Zeitschritt, in dem die Annahme nicht mehr gilt; direkt nach einem
+        # Wechsel ist der erste Schritt gültig (sonst hätte nicht gewechselt werden müssen)
+        verletzt = np.where(maske, Q < -toleranz, T_l < p_a['T_i'] - toleranz)
+        verletzt[:, 0] &= ~gewechselt[aktiv]
+        gueltig = np.where(verletzt.any(axis=1), verletzt.argmax(axis=1), w)
+
+        # Gültigen Abschnitt übernehmen
+        spalten = np.arange(w)
+        uebernehmen = spalten < gueltig[:, None]
+        zeilen = np.broadcast_to(aktiv[:, None], schritte.shape)
+        T_luft[zeilen[uebernehmen], schritte[uebernehmen]] = T_l[uebernehmen]
+        Q_heiz[zeilen[uebernehmen], schritte[uebernehmen]] = Q[uebernehmen]
+
+        weiter = gueltig > 0
+        letzter = np.nonzero(weiter)[0], gueltig[weiter] - 1
+        zustand[aktiv[weiter]] = np.stack([T_l[letzter], T_s[letzter], T_g[letzter]], axis=1)
+        position[aktiv] += gueltig
+        wechsel = gueltig < w
+        gewechselt[aktiv] = wechsel
+        geheizt[aktiv[wechsel]] = ~geheizt[aktiv[wechsel]]
+        schaltvorgaenge[aktiv[wechsel]] += 1
+
+    # Auf Stunden aggregieren (Heizleistung W -> kW)
+    Q_h = Q_heiz[:, :N].reshape(D, n_stunden, teile).mean(axis=2) / 1000
+    T_h = T_luft[:, :N].reshape(D, n_stunden, teile)
+    return {
+        'Heizlast_kW': np.maximum(Q_h, 0.0),
+        'T_luft_C': T_h.mean(axis=2),
+        'T_luft_max_C': T_h.max(axis=2),
+        'schaltvorgaenge': schaltvorgaenge,
+        'loesungen': loesungen,
+    }
+
+
+if __name__ == '__main__':
+    import time
+
+    from calculation_heat_transfer import berechne_heizlast
+    from wetter_speicher import oeffne_wetter_speicher
+
+    # Außentemperatur und Strahlung 2019 (wie calculation_heat_transfer.py)
+    wetter_temp = oeffne_wetter_speicher('Temperatur Köln.csv', spalten=['TT_TU'])
+    T_a = wetter_temp.jahr(2019, 'TT_TU')
+    wetter_solar = oeffne_wetter_speicher('Solareinstrahlung_Bochum_Bremen.csv', datum_spalte='DateTime')
+    G_solar = wetter_solar.jahr(2019, 'Solar_W_m2')
+    zeitindex = wetter_temp.zeitindex(2019)
+
+    for schritt in [60, 15, 5, 1]:
+        start = time.perf_counter()
+        ergebnis = simuliere(T_a, G_solar, schritt_minuten=schritt)
+        dauer = time.perf_counter() - start
+        Q = ergebnis['Heizlast_kW'][0]
+        print(f"Schritt {schritt:>2d} min: {dauer:.2f} s, {ergebnis['loesungen']} Gleichungslösungen, "
+              f"Heizenergie {Q.sum():,.0f} kWh/a, max. {Q.max():.1f} kW")
+
+    Q_stationaer = berechne_heizlast(T_a, G_solar)
+    print(f"\nStationäres Modell: Heizenergie {Q_stationaer.sum():,.0f} kWh/a, max. {Q_stationaer.max():.1f} kW")
+    print(f"Stunden mit T_Luft > 30 °C: {(ergebnis['T_luft_max_C'][0] > 30).sum()}")
+
+    # Mehrere Entwürfe in einem Aufruf
+    entwuerfe = pd.DataFrame({'U': [2.5, 4.0, 6.0], 'c_boden': [80, 160, 320]})
+    start = time.perf_counter()
+    ergebnis = simuliere(T_a, G_solar, schritt_minuten=5, entwuerfe=entwuerfe)
+    print(f"\n3 Entwürfe (5 min): {time.perf_counter() - start:.2f} s, "
+          f"Heizenergie {np.round(ergebnis['Heizlast_kW'].sum(axis=1)):} kWh/a")
+
+    # Export im Format von heizlast_2019.csv (für Zukunftssystem.py)
+    exportiere_heizlast('heizlast_2019_dynamisch.csv', simuliere(T_a, G_solar)['Heizlast_kW'][0], zeitindex, T_a)
+    print("Exportiert nach: heizlast_2019_dynamisch.csv")
@@ -0,0 +1,273 @@
+"""
+Zeitreihenaggregation mit Typtagen für schnelle Auslegungsrechnungen
+- Die Tage des Jahres werden per k-Means über die Tagesprofile (alle Spalten,
+  je Spalte auf das Maximum normiert) zu Typtagen zusammengefasst; Typtag ist
+  jeweils der Originaltag, der dem Clusterzentrum am nächsten liegt
+- Extremtage (z.B. Tag mit der höchsten Heizlast) bleiben als eigene Typtage erhalten
+- Snapshot-Gewichtung = Anzahl Originaltage je Typtag (Kosten, Erzeugung);
+  innerhalb eines Typtags wird stündlich gerechnet
+- Speicher bleiben über das ganze Jahr gekoppelt (Kotzur et al. 2018):
+  Füllstand zu Beginn jedes Originaltags als eigene Variable, Verlauf
+  innerhalb des Tages aus dem Typtag; die Füllstandsgrenzen werden über
+  Minimum/Maximum des Tagesverlaufs (konservativ) eingehalten
+- vergleiche() rechnet zusätzlich das volle Jahr und gibt die Abweichung der Kennzahlen aus
+
+Verwendung:
+    from typtage import bilde_typtage, TyptagModell, baue_typtage
+    tage = bilde_typtage(zeitreihen, anzahl=12)
+    modell = TyptagModell(baue_typtage(tage), tage, ZukunftParameter())
+    modell.loese()
+    fuellstand = modell.speicherfuellstand()    # stündlich über das ganze Jahr
+"""
+
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import pypsa
+import xarray as xr
+from scipy.cluster.vq import kmeans2
+
+from netzwerk import NetzModell, ZukunftParameter, baue_zukunft, kennzahlen, setze_koeffizient, zeitreihe
+
+
+@dataclass
+class Typtage:
+    '''Ergebnis der Aggregation.'''
+    zeitreihen: pd.DataFrame        # Typtage hintereinander (anzahl · stunden Zeilen, Index der Originaltage)
+    gewichte: np.ndarray            # Anzahl Originaltage je Typtag
+    zuordnung: np.ndarray           # Typtag (0 .. anzahl-1) je Originaltag
+    index: pd.DatetimeIndex         # vollständiger Originalindex
+    stunden: int = 24
+
+    @property
+    def anzahl(self) -> int:
+        return len(self.gewichte)
+
+    def auf_jahr(self, werte: pd.DataFrame) -> pd.DataFrame:
+        '''Werte über die Typtag-Snapshots auf den vollständigen Originalindex abbilden.'''
+        positionen = (self.zuordnung[:, None] * self.stunden + np.arange(self.stunden)).ravel()
+        return pd.DataFrame(np.asarray(werte)[positionen], index=self.index, columns=werte.columns)
+
+
+def bilde_typtage(zeitreihen: pd.DataFrame, anzahl: int = 12, spalten=None,
+                  extremtage=('Heizlast_kW',), stunden: int = 24, seed: int = 0) -> Typtage:
+    '''
+    Fasst die Tage der Zeitreihen zu Typtagen zusammen.
+
+    Parameter
+    ----------
+    zeitreihen : pd.DataFrame
+        Stündliche Zeitreihen (Länge ein Vielfaches von `stunden`)
+    anzahl : int
+        Anzahl Typtage einschließlich Extremtage
+    spalten : list
+        Spalten für das Clustering (Standard: alle)
+    extremtage : tuple
+        Spalten, deren Tag mit der größten Tagessumme als eigener Typtag erhalten bleibt
+    stunden : int
+        Stunden je Periode
+    seed : int
+        Startwert für k-Means
+
+    Returns
+    -------
+    Typtage
+    '''
+    if len(zeitreihen) % stunden:
+        raise ValueError(f"Zeitreihenlänge {len(zeitreihen)} ist kein Vielfaches von {stunden}.")
+    spalten = list(spalten or zeitreihen.columns)
+    tage = len(zeitreihen) // stunden
+    if not 0 < anzahl <= tage:
+        raise ValueError(f"anzahl muss zwischen 1 und {tage} liegen.")
+
+    # Merkmale: Tagesprofile aller Spalten, je Spalte auf das Maximum normiert
+    werte = zeitreihen[spalten].to_numpy(dtype=float)
+    skala = np.abs(werte).max(axis=0)
+    werte = werte / np.where(skala > 0, skala, 1.0)
+    merkmale = werte.reshape(tage, stunden, len(spalten)).transpose(0, 2, 1).reshape(tage, -1)
+
+    # Extremtage vorab als eigene Cluster
+    summen = zeitreihen.to_numpy(dtype=float).reshape(tage, stunden, -1).sum(axis=1)
+    extrem = list(dict.fromkeys(int(summen[:, zeitreihen.columns.get_loc(s)].argmax()) for s in extremtage))
+    extrem = extrem[:anzahl]
+    rest = np.setdiff1d(np.arange(tage), extrem)
+
+    zuordnung = np.empty(tage, dtype=int)
+    vertreter = list(extrem)
+    zuordnung[extrem] = np.arange(len(extrem))
+    if anzahl > len(extrem):
+        zentren, labels = kmeans2(merkmale[rest], anzahl - len(extrem), minit='++', seed=seed)
+        for cluster in np.unique(labels):
+            mitglieder = rest[labels == cluster]
+            abstand = ((merkmale[mitglieder] - zentren[cluster]) ** 2).sum(axis=1)
+            zuordnung[mitglieder] = len(vertreter)
+            vertreter.append(int(mitglieder[abstand.argmin()]))
+    else:
+        # nur Extremtage: übrige Tage dem nächsten Extremtag zuordnen
+        abstand = ((merkmale[rest, None, :] - merkmale[None, extrem, :]) ** 2).sum(axis=2)
+        zuordnung[rest] = abstand.argmin(axis=1)
+
+    # Typtage chronologisch sortieren (monotone Snapshots)
+    reihenfolge = np.argsort(vertreter)
+    neu = np.empty_like(reihenfolge)
+    neu[reihenfolge] = np.arange(len(reihenfolge))
+    zuordnung = neu[zuordnung]
+    vertreter = np.asarray(vertreter)[reihenfolge]
+
+    positionen = (vertreter[:, None] * stunden + np.arange(stunden)).ravel()
+    return Typtage(zeitreihen=zeitreihen.iloc[positionen],
+                   gewichte=np.bincount(zuordnung, minlength=len(vertreter)).astype(float),
+                   zuordnung=zuordnung, index=zeitreihen.index, stunden=stunden)
+
+
+def baue_typtage(typtage: Typtage, parameter=None, baue=baue_zukunft) -> pypsa.Network:
+    '''
+    Netzwerk auf den Typtag-Snapshots (baue: netzwerk.baue_zukunft oder baue_konventionell).
+
+    Kosten und Erzeugung werden mit der Anzahl Originaltage gewichtet. Speicher sind
+    nicht zyklisch und starten jeden Typtag bei 0 (Füllstand relativ zum Tagesbeginn,
+    daher e_min_pu = -1); die Kopplung über das Jahr ergänzt TyptagModell.
+    '''
+    network = baue(typtage.zeitreihen, parameter)
+    gewichtung = np.repeat(typtage.gewichte, typtage.stunden)
+    network.snapshot_weightings['objective'] = gewichtung
+    network.snapshot_weightings['generators'] = gewichtung
+    network.snapshot_weightings['stores'] = 1.0
+    stores = network.stores
+    if len(stores):
+        if not stores['e_nom_extendable'].all():
+            raise ValueError("Typtag-Kopplung nur für erweiterbare Speicher (e_nom_extendable=True).")
+        stores['e_cyclic'] = False
+        stores['e_initial'] = 0.0
+        stores['e_min_pu'] = -1.0
+    return network
+
+
+class TyptagModell(NetzModell):
+    '''
+    NetzModell auf Typtagen mit jahresübergreifender Speicherkopplung.
+
+    Zusätzliche Variablen je Speicher: Typtag-e_start (Füllstand zu Beginn jedes
+    Originaltags) sowie Typtag-e_max / Typtag-e_min (Extremwerte des
+    Tagesverlaufs je Typtag). Parameteränderungen wie bei NetzModell.
+    '''
+
+    def __init__(self, network: pypsa.Network, typtage: Typtage, parameter=None):
+        self.typtage = typtage
+        super().__init__(network, parameter, typtage.zeitreihen)
+        if len(network.stores):
+            self._koppele_speicher()
+
+    def _tagesbeginn(self) -> np.ndarray:
+        return np.arange(1, self.typtage.anzahl) * self.typtage.stunden
+
+    def _trenne_tage(self, namen):
+        # Kopplung an die Vorstunde zu Beginn jedes Typtags entfernen (Start bei 0)
+        m, snapshots = self.model, self.network.snapshots
+        labels = m.variables['Store-e'].labels.sel(name=namen).roll(snapshot=1, roll_coords=False)
+        labels = labels.isel(snapshot=self._tagesbeginn())
+        werte = xr.zeros_like(labels, dtype=float)
+        setze_koeffizient(m.constraints['Store-energy_balance'],
+                          labels.reindex(snapshot=snapshots, fill_value=-1), werte.reindex(snapshot=snapshots))
+
+    def _tagesfaktor(self, namen) -> xr.DataArray:
+        # Speicherverlust über einen ganzen Tag (1 - standing_loss)^stunden
+        verlust = [zeitreihe(self.network, 'Store', name, 'standing_loss').iloc[0] for name in namen]
+        return xr.DataArray((1 - np.asarray(verlust)) ** self.typtage.stunden, coords={'name': namen}, dims='name')
+
+    def _koppele_speicher(self):
+        m, t = self.model, self.typtage
+        namen = list(self.network.stores.index)
+        self._trenne_tage(namen)
+
+        e = m.variables['Store-e'].sel(name=namen)
+        e_nom = m.variables['Store-e_nom'].sel(name=namen)
+        tage = pd.RangeIndex(len(t.zuordnung), name='tag')
+        typ = pd.RangeIndex(t.anzahl, name='typtag')
+        koordinaten = [tage, pd.Index(namen, name='name')]
+
+        e_tag = m.add_variables(lower=0, coords=koordinaten, name='Typtag-e_start')
+        e_max = m.add_variables(coords=[typ, pd.Index(namen, name='name')], name='Typtag-e_max')
+        e_min = m.add_variables(coords=[typ, pd.Index(namen, name='name')], name='Typtag-e_min')
+
+        # Extremwerte des Tagesverlaufs je Typtag
+        typtag_je_stunde = xr.DataArray(np.repeat(np.arange(t.anzahl), t.stunden), dims='snapshot')
+        e_max_stunde = e_max.isel(typtag=typtag_je_stunde).assign_coords(snapshot=e.indexes['snapshot'])
+        e_min_stunde = e_min.isel(typtag=typtag_je_stunde).assign_coords(snapshot=e.indexes['snapshot'])
+        m.add_constraints(e - e_max_stunde <= 0, name='Typtag-e_max_def')
+        m.add_constraints(e - e_min_stunde >= 0, name='Typtag-e_min_def')
+
+        # Füllstand am Ende des Originaltags = Beginn des nächsten (zyklisch über das Jahr)
+        typtag_je_tag = xr.DataArray(t.zuordnung, coords={'tag': tage}, dims='tag')
+        tagesende = xr.DataArray(t.zuordnung * t.stunden + t.stunden - 1, coords={'tag': tage}, dims='tag')
+        e_ende = e.isel(snapshot=tagesende)
+        naechster = e_tag.roll(tag=-1)
+        m.add_constraints(naechster - self._tagesfaktor(namen) * e_tag - e_ende == 0, name='Typtag-kopplung')
+
+        # Füllstandsgrenzen über den ganzen Tag (konservativ: ohne Verlust nach oben, voller Tagesverlust nach unten)
+        m.add_constraints(e_tag + e_max.isel(typtag=typtag_je_tag) - e_nom <= 0,
+                          name='Typtag-e_upper')
+        m.add_constraints(e_tag - e_nom <= 0, name='Typtag-e_start_upper')
+        m.add_constraints(self._tagesfaktor(namen) * e_tag + e_min.isel(typtag=typtag_je_tag) >= 0,
+                          name='Typtag-e_lower')
+
+    def _aktualisiere_standing_loss(self, name):
+        super()._aktualisiere_standing_loss(name)
+        self._trenne_tage([name])
+        m = self.model
+        labels = m.variables['Typtag-e_start'].labels.sel(name=[name])
+        faktor = self._tagesfaktor([name]).broadcast_like(labels)
+        setze_koeffizient(m.constraints['Typtag-kopplung'], labels, -faktor)
+        setze_koeffizient(m.constraints['Typtag-e_lower'], labels, faktor)
+
+    def speicherfuellstand(self) -> pd.DataFrame:
+        '''Absoluter Speicherfüllstand in kWh über den vollständigen Originalindex.'''
+        n, t = self.network, self.typtage
+        namen = list(n.stores.index)
+        start = self.model.variables['Typtag-e_start'].solution.sel(name=namen).to_numpy()
+        verlust = np.array([zeitreihe(n, 'Store', name, 'standing_loss').iloc[0] for name in namen])
+        abklingen = (1 - verlust) ** np.arange(1, t.stunden + 1)[:, None]
+        verlauf = t.auf_jahr(n.stores_t.e[namen]).to_numpy().reshape(len(t.zuordnung), t.stunden, len(namen))
+        absolut = start[:, None, :] * abklingen[None] + verlauf
+        return pd.DataFrame(absolut.reshape(-1, len(namen)), index=t.index, columns=namen)
+
+
+def vergleiche(zeitreihen: pd.DataFrame, anzahl: int = 12, parameter=None, baue=baue_zukunft,
+               solver_name: str = None, **solver_optionen) -> pd.DataFrame:
+    '''
+    Kennzahlen mit Typtagen und in voller Auflösung im Vergleich.
+
+    Returns
+    -------
+    pd.DataFrame
+        Zeilen: Kennzahlen (netzwerk.kennzahlen) und Rechenzeit_s;
+        Spalten: voll, typtage, abweichung_prozent
+    '''
+    parameter = parameter or ZukunftParameter()
+
+    start = time.perf_counter()
+    tage = bilde_typtage(zeitreihen, anzahl)
+    modell = TyptagModell(baue_typtage(tage, parameter, baue), tage, parameter)
+    modell.loese(solver_name, **solver_optionen)
+    aggregiert = {**kennzahlen(modell.network), 'Rechenzeit_s': time.perf_counter() - start}
+
+    start = time.perf_counter()
+    voll_modell = NetzModell(baue(zeitreihen, parameter), parameter, zeitreihen)
+    voll_modell.loese(solver_name, **solver_optionen)
+    voll = {**kennzahlen(voll_modell.network), 'Rechenzeit_s': time.perf_counter() - start}
+
+    tabelle = pd.DataFrame({'voll': voll, 'typtage': aggregiert})
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tabelle['abweichung_prozent'] = (tabelle['typtage'] - tabelle['voll']) / tabelle['voll'].abs() * 100
+    return tabelle
+
+
+if __name__ == '__main__':
+    from daten_cache import lade_zeitreihen
+
+    zeitreihen = lade_zeitreihen()
+    for anzahl in [8, 16, 32]:
+        print(f"\n--- {anzahl} Typtage ---")
+        print(vergleiche(zeitreihen, anzahl).round(2).to_string())
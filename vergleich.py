@@ -2,48 +2,39 @@
 Vergleich: Zukunftssystem vs. Konventionelles Gewächshaus
 - Führt beide Systeme hintereinander aus
 - Erstellt Vergleichs-Plots
+- Konventionelles System ohne LP (direkter_einsatz, Einsatz eindeutig bestimmt)
+- Gelöstes Zukunftssystem kommt aus ergebnis_cache: bei unveränderten
+  Zeitreihen, Parametern und Solvereinstellungen wird nicht neu optimiert
 """
 
-import pypsa
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.dates as mdates
 import matplotlib.ticker as mticker
 import locale
+
+from daten_cache import lade_zeitreihen
+from direkter_einsatz import optimiere_schnell
+from netzwerk import KonventionellParameter, ZukunftParameter, baue_konventionell, baue_zukunft
+from ergebnis_cache import ErgebnisCache
+
 locale.setlocale(locale.LC_TIME, 'de_DE.UTF-8')
 
+cache = ErgebnisCache()
+
 # ============================================================
 # 1. Gemeinsame Daten einlesen
 # ============================================================
 
-df_heizlast = pd.read_csv('Abgabeordner Gruppe 9/heizlast_2019.csv', sep=',', encoding='utf-8')
-df_heizlast['datetime'] = pd.to_datetime(df_heizlast['MESS_DATUM'].astype(str), format='%Y%m%d%H')
-df_heizlast.set_index('datetime', inplace=True)
-
-df_strombedarf = pd.read_csv('Abgabeordner Gruppe 9/hourly_lamp_energy_2019.csv', sep=';', encoding='utf-8')
-df_strombedarf['datetime'] = pd.to_datetime(df_strombedarf['DateTime'].astype(str), format='%Y%m%d%H')
-df_strombedarf.set_index('datetime', inplace=True)
-
-df_cop = pd.read_csv('Abgabeordner Gruppe 9/heatpump_cop_2019.csv', sep=',', encoding='utf-8')
-df_cop['datetime'] = pd.to_datetime(df_cop['MESS_DATUM'].astype(str), format='%Y%m%d%H')
-df_cop.set_index('datetime', inplace=True)
+# Aus dem Cache laden, Zeitindex ist bereits abgeglichen
+zeitreihen = lade_zeitreihen()
+zeitindex = zeitreihen.index
 
-df_wind = pd.read_csv('Abgabeordner Gruppe 9/Windanlage Leistungsdaten.csv', sep=';', encoding='utf-8', skiprows=4)
-df_wind = df_wind[['time', 'electricity']].copy()
-df_wind['datetime'] = pd.to_datetime(df_wind['time'])
-df_wind.set_index('datetime', inplace=True)
-df_wind = df_wind.rename(columns={'electricity': 'Wind_kW'})
-
-# Gemeinsamer Zeitindex
-zeitindex = df_heizlast.index.intersection(df_strombedarf.index)
-zeitindex = zeitindex.intersection(df_cop.index)
-zeitindex = zeitindex.intersection(df_wind.index)
-
-waermebedarf = df_heizlast.loc[zeitindex, 'Heizlast_kW']
-strombedarf = df_strombedarf.loc[zeitindex, 'Energy_kW']
-cop_zeitreihe = df_cop.loc[zeitindex, 'COP']
-windleistung = df_wind.loc[zeitindex, 'Wind_kW']
+waermebedarf = zeitreihen['Heizlast_kW']
+strombedarf = zeitreihen['Energy_kW']
+cop_zeitreihe = zeitreihen['COP']
+windleistung = zeitreihen['Wind_kW']
 
 # ============================================================
 # 2. KONVENTIONELLES SYSTEM
@@ -56,25 +47,10 @@ gas_preis = 0.03
 gaskessel_wirkungsgrad = 0.95
 gas_cost_heat = gas_preis / gaskessel_wirkungsgrad
 
-n_konv = pypsa.Network()
-n_konv.set_snapshots(zeitindex)
-
-n_konv.add('Bus', name='Strom', carrier='strom')
-n_konv.add('Bus', name='Waerme', carrier='waerme')
-n_konv.add('Bus', name='Gas', carrier='gas')
-
-n_konv.add('Load', name='Stromlast', bus='Strom', p_set=strombedarf)
-n_konv.add('Load', name='Waermelast', bus='Waerme', p_set=waermebedarf)
-
-n_konv.add('Generator', name='Stromimport', bus='Strom',
-           p_nom=np.inf, marginal_cost=strom_preis, carrier='grid')
-n_konv.add('Generator', name='Gasimport', bus='Gas',
-           p_nom=np.inf, marginal_cost=gas_preis, carrier='gas')
-n_konv.add('Link', name='Gaskessel', bus0='Gas', bus1='Waerme',
-           p_nom=waermebedarf.max()/gaskessel_wirkungsgrad,
-           efficiency=gaskessel_wirkungsgrad, carrier='gas')
+n_konv = baue_konventionell(zeitreihen, KonventionellParameter(
+    strom_preis=strom_preis, gas_preis=gas_preis, gaskessel_wirkungsgrad=gaskessel_wirkungsgrad))
 
-n_konv.optimize(solver_name='gurobi')
+optimiere_schnell(n_konv)
 
 # Ergebnisse konventionell
 konv_strom_netz = n_konv.generators_t.p['Stromimport'].sum()
@@ -93,37 +69,9 @@ print("ZUKUNFTSSYSTEM - Optimierung läuft...")
 wind_nennleistung_vergleich = 6000
 netz_import_kosten = 0.1361
 
-wind_p_max_pu = (windleistung / wind_nennleistung_vergleich).clip(lower=0, upper=1)
-
-n_zuk = pypsa.Network()
-n_zuk.set_snapshots(zeitindex)
-
-n_zuk.add('Bus', name='Strom', carrier='strom')
-n_zuk.add('Bus', name='Waerme', carrier='waerme')
-
-n_zuk.add('Load', name='Stromlast', bus='Strom', p_set=strombedarf)
-n_zuk.add('Load', name='Waermelast', bus='Waerme', p_set=waermebedarf)
-
-n_zuk.add('Generator', name='Windkraftanlage', bus='Strom',
-          p_nom_extendable=True, p_max_pu=wind_p_max_pu,
-          capital_cost=100, lifetime=20, carrier='wind')
-
-n_zuk.add('Store', name='Stromspeicher', bus='Strom',
-          e_nom_extendable=True, capital_cost=45,
-          lifetime=15, standing_loss=0.0001, e_cyclic=True)
-
-n_zuk.add('Link', name='Waermepumpe', bus0='Strom', bus1='Waerme',
-          efficiency=cop_zeitreihe, p_nom_extendable=True,
-          capital_cost=38, lifetime=20)
-
-n_zuk.add('Store', name='Waermespeicher', bus='Waerme',
-          e_nom_extendable=True, capital_cost=2,
-          standing_loss=0.005, e_cyclic=True, lifetime=25)
-
-n_zuk.add('Generator', name='Netz_Import', bus='Strom',
-          p_nom_extendable=True, marginal_cost=netz_import_kosten, carrier='grid')
-
-n_zuk.optimize(solver_name='gurobi')
+n_zuk = cache.optimiere(baue_zukunft, zeitreihen, ZukunftParameter(
+    wind_nennleistung_vergleichsanlage=wind_nennleistung_vergleich,
+    netz_import_kosten=netz_import_kosten))
 
 # Ergebnisse Zukunft
 zuk_strom_import = n_zuk.generators_t.p['Netz_Import'].sum()
@@ -0,0 +1,235 @@
+"""
+Memory-mapped Wetterdatenspeicher mit Jahresindex
+- Liest eine stündliche DWD-Stationsdatei (z.B. Temperatur Köln.csv,
+  Temperaturdaten 2024.csv) oder die bereinigte Solardatei
+  (Solareinstrahlung_Bochum_Bremen.csv) einmal ein
+- Legt jede Messgröße als float64-Array (.npy) auf einem lückenlosen
+  Stundenraster ab, fehlende Stunden sind NaN; die Werte sind genau die
+  Zahlen aus der CSV (kein Runden beim Lesen nötig)
+- Die Offsets der einzelnen Jahre stehen in index.json
+
+Da das Raster lückenlos ist, ergibt sich die Position jeder Stunde direkt aus
+dem Abstand zum Startzeitpunkt. Ein Jahr oder Zeitraum ist damit ein Slice
+auf dem memory-mapped Array (O(1), ohne Kopie).
+
+Verwendung:
+    from wetter_speicher import oeffne_wetter_speicher
+    wetter = oeffne_wetter_speicher('Temperatur Köln.csv', spalten=['TT_TU'])
+    T_a = wetter.jahr(2019, 'TT_TU')
+"""
+
+import json
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from daten_cache import CACHEORDNER, datei_hash
+
+SPEICHERORDNER = os.path.join(CACHEORDNER, 'wetter')
+
+# Spalten der DWD-Dateien, die keine Messgrößen sind
+_KEINE_MESSGROESSE = {'STATIONS_ID', 'eor'}
+
+STUNDE = pd.Timedelta(hours=1)
+
+# Bei Änderungen am Speicherformat erhöhen -> vorhandene Speicher werden neu erstellt
+# (2: float64 statt float32)
+FORMAT_VERSION = 2
+
+
+# ============================================================
+# Speicher erstellen
+# ============================================================
+
+def _schreibe_atomar(pfad: str, schreibe):
+    # Erst in eine eigene temporäre Datei schreiben, dann umbenennen (keine halben Dateien
+    # bei Abbruch; parallele Prozesse, z.B. Worker der Parameterstudie, stören sich nicht)
+    ordner, datei = os.path.split(pfad)
+    deskriptor, tmp = tempfile.mkstemp(dir=ordner, prefix=f'.{datei}-', suffix='.tmp')
+    try:
+        with os.fdopen(deskriptor, 'wb') as f:
+            schreibe(f)
+        os.replace(tmp, pfad)
+    except BaseException:
+        os.remove(tmp)
+        raise
+
+
+def baue_wetter_speicher(quelle: str, ziel: str, spalten: list = None,
+                         datum_spalte: str = 'MESS_DATUM', sep: str = ';'):
+    '''
+    Wandelt eine stündliche Wetter-CSV in einen memory-mapped Speicher um.
+
+    Parameter
+    ----------
+    quelle : str
+        Pfad zur CSV-Datei
+    ziel : str
+        Zielordner für die .npy-Dateien und index.json
+    spalten : list
+        Messgrößen, die übernommen werden (None = alle numerischen Spalten)
+    datum_spalte : str
+        Spalte mit dem Zeitstempel im Format YYYYMMDDHH(:MM)
+    sep : str
+        Trennzeichen der CSV-Datei
+    '''
+    df = pd.read_csv(quelle, sep=sep, dtype=str, encoding='utf-8')
+    df.columns = df.columns.str.strip()
+
+    zeit = pd.to_datetime(df[datum_spalte].str.strip().str[:10], format='%Y%m%d%H')
+
+    if spalten is None:
+        spalten = [s for s in df.columns
+                   if s != datum_spalte and s not in _KEINE_MESSGROESSE and not s.startswith('QN')]
+
+    # Lückenloses Stundenraster über ganze Kalenderjahre
+    start = pd.Timestamp(year=zeit.min().year, month=1, day=1)
+    ende = pd.Timestamp(year=zeit.max().year + 1, month=1, day=1)
+    n_stunden = int((ende - start) / STUNDE)
+    position = ((zeit - start) / STUNDE).to_numpy().astype(np.int64)
+
+    os.makedirs(ziel, exist_ok=True)
+    for spalte in spalten:
+        werte = pd.to_numeric(df[spalte].str.strip().str.replace(',', '.'), errors='coerce')
+        raster = np.full(n_stunden, np.nan, dtype=np.float64)
+        raster[position] = werte.to_numpy(dtype=np.float64)
+        _schreibe_atomar(os.path.join(ziel, f'{spalte}.npy'), lambda f: np.save(f, raster))
+
+    # Jahresindex: Jahr -> [erste Stunde, letzte Stunde + 1]
+    jahre = {}
+    for jahr in range(start.year, ende.year):
+        von = int((pd.Timestamp(year=jahr, month=1, day=1) - start) / STUNDE)
+        bis = int((pd.Timestamp(year=jahr + 1, month=1, day=1) - start) / STUNDE)
+        jahre[str(jahr)] = [von, bis]
+
+    index = {
+        'quelle': os.path.basename(quelle),
+        'format': FORMAT_VERSION,
+        'start': start.isoformat(),
+        'n_stunden': n_stunden,
+        'spalten': list(spalten),
+        'jahre': jahre,
+    }
+    # index.json zuletzt: erst dann sind alle Arrays vollständig vorhanden
+    _schreibe_atomar(os.path.join(ziel, 'index.json'),
+                     lambda f: f.write(json.dumps(index, indent=2).encode('utf-8')))
+
+
+# ============================================================
+# Speicher lesen
+# ============================================================
+
+class WetterSpeicher:
+    '''
+    Lesezugriff auf einen mit baue_wetter_speicher erstellten Speicher.
+
+    Alle Rückgabewerte sind read-only Views auf die memory-mapped Arrays.
+    Werden die Werte verändert, vorher .copy() aufrufen.
+    '''
+
+    def __init__(self, ordner: str):
+        with open(os.path.join(ordner, 'index.json'), encoding='utf-8') as f:
+            self.index = json.load(f)
+        self.start = pd.Timestamp(self.index['start'])
+        self.spalten = self.index['spalten']
+        self.jahre = {int(j): tuple(v) for j, v in self.index['jahre'].items()}
+        self._daten = {s: np.load(os.path.join(ordner, f'{s}.npy'), mmap_mode='r')
+                       for s in self.spalten}
+
+    def __len__(self):
+        return self.index['n_stunden']
+
+    def position(self, zeitpunkt) -> int:
+        '''Position eines Zeitpunkts im Stundenraster.'''
+        return int((pd.Timestamp(zeitpunkt) - self.start) / STUNDE)
+
+    def _slice(self, von: int, bis: int, spalte):
+        if spalte is None:
+            return {s: d[von:bis] for s, d in self._daten.items()}
+        return self._daten[spalte][von:bis]
+
+    def jahr(self, jahr: int, spalte: str = None):
+        '''
+        Werte eines Kalenderjahres.
+
+        Parameter
+        ----------
+        jahr : int
+            Kalenderjahr, z.B. 2019
+        spalte : str
+            Messgröße (None = dict mit allen Messgrößen)
+
+        Returns
+        -------
+        np.ndarray oder dict
+            float64-View mit 8760 bzw. 8784 Werten
+        '''
+        if jahr not in self.jahre:
+            raise KeyError(f"Jahr {jahr} nicht im Speicher ({min(self.jahre)}-{max(self.jahre)}).")
+        von, bis = self.jahre[jahr]
+        return self._slice(von, bis, spalte)
+
+    def zeitraum(self, start, ende, spalte: str = None):
+        '''Werte von start (inklusive) bis ende (exklusive).'''
+        von, bis = self.position(start), self.position(ende)
+        if von < 0 or bis > len(self):
+            raise KeyError(f"Zeitraum {start} bis {ende} liegt außerhalb des Speichers.")
+        return self._slice(von, bis, spalte)
+
+    def zeitindex(self, jahr: int) -> pd.DatetimeIndex:
+        '''Stündlicher Zeitindex eines Kalenderjahres.'''
+        von, bis = self.jahre[jahr]
+        return pd.date_range(self.start + von * STUNDE, periods=bis - von, freq='h')
+
+    def als_dataframe(self, jahr: int) -> pd.DataFrame:
+        '''Kopie eines Kalenderjahres als DataFrame (für Ausgabe und Plots).'''
+        return pd.DataFrame({s: np.asarray(w) for s, w in self.jahr(jahr).items()},
+                            index=self.zeitindex(jahr))
+
+
+def oeffne_wetter_speicher(quelle: str, spalten: list = None,
+                           datum_spalte: str = 'MESS_DATUM', sep: str = ';') -> WetterSpeicher:
+    '''
+    Öffnet den Speicher zu einer Wetter-CSV und erstellt ihn bei Bedarf.
+
+    Der Speicherordner enthält den Hash der Quelldatei; ändert sich die Datei,
+    wird automatisch ein neuer Speicher angelegt.
+
+    Parameter
+    ----------
+    quelle : str
+        Pfad zur CSV-Datei
+    spalten : list
+        Messgrößen (None = alle numerischen Spalten)
+    datum_spalte : str
+        Spalte mit dem Zeitstempel
+    sep : str
+        Trennzeichen der CSV-Datei
+
+    Returns
+    -------
+    WetterSpeicher
+    '''
+    schluessel = f'{datei_hash(quelle)[:16]}-v{FORMAT_VERSION}'
+    if spalten is not None:
+        schluessel += '-' + '-'.join(spalten)
+    name = os.path.splitext(os.path.basename(quelle))[0].replace(' ', '_')
+    ordner = os.path.join(SPEICHERORDNER, f'{name}-{schluessel}')
+
+    if not os.path.exists(os.path.join(ordner, 'index.json')):
+        baue_wetter_speicher(quelle, ordner, spalten, datum_spalte, sep)
+    return WetterSpeicher(ordner)
+
+
+if __name__ == '__main__':
+    wetter = oeffne_wetter_speicher('Temperaturdaten 2024.csv')
+    print(f"Messgrößen: {wetter.spalten}")
+    print(f"Jahre: {sorted(wetter.jahre)}")
+
+    T_a = wetter.jahr(2024, 'TT_TU')
+    print(f"2024: {len(T_a)} Stunden, mittlere Temperatur {np.nanmean(T_a):.2f} °C")
+
+    juli = wetter.zeitraum('2024-07-01', '2024-08-01', 'TT_TU')
+    print(f"Juli 2024: {len(juli)} Stunden, Maximum {np.nanmax(juli):.1f} °C")
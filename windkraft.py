@@ -0,0 +1,225 @@
+"""
+Leistungskurven von Windkraftanlagen (vektorisiert)
+- Katalog typischer Anlagen (Nennleistung, Rotordurchmesser, Nabenhöhe,
+  Ein-/Nenn-/Abschaltgeschwindigkeit, Leistungsbeiwert)
+- Luftdichte aus der DWD-Lufttemperatur (TT_TU) und dem Luftdruck
+- Umrechnung der Windgeschwindigkeit von Messhöhe auf Nabenhöhe (log. Profil)
+- Leistung für viele Anlagen und Standorte in einem Aufruf (kein Netzwerkzugriff)
+- p_max_pu direkt für den PyPSA-Generator, sobald gemessene Windgeschwindigkeiten
+  vorliegen (z.B. lese_dwd_wind); die Netzwerke in netzwerk.py nutzen bisher die
+  fertige Leistungszeitreihe (Windanlage Leistungsdaten.csv) über p_max_pu_aus_leistung
+
+Verwendung:
+    from windkraft import p_max_pu
+    verfuegbarkeit = p_max_pu(v_wind, 'Enercon E138 3500', T_celsius=T_a, messhoehe=10)
+"""
+
+import numpy as np
+import pandas as pd
+
+# ============================================================
+# Physikalische Konstanten
+# ============================================================
+GASKONSTANTE_LUFT = 287.05      # Spez. Gaskonstante trockene Luft in J/(kg·K)
+LUFTDRUCK_NORMAL = 101325       # Normdruck auf Meereshöhe in Pa
+DICHTE_NORM = 1.225             # Normdichte der Leistungskurven (IEC 61400-12) in kg/m³
+ERDBESCHLEUNIGUNG = 9.81        # in m/s²
+RAUHIGKEIT = 0.1                # Rauhigkeitslänge in m (landwirtschaftliche Fläche)
+
+# DWD-Stundenwerte Wind (produkt_ff_stunde): Windgeschwindigkeit in m/s, Messhöhe 10 m
+WIND_SPALTE = 'F'
+MESSHOEHE_DWD = 10
+
+# ============================================================
+# Anlagenkatalog (Herstellerangaben, gerundet)
+# ============================================================
+TURBINEN = pd.DataFrame([
+    # name,                 P_nenn kW, D m,   Nabe m, v_ein, v_nenn, v_aus, cp
+    ('Enercon E138 3500',       3500, 138.3,  131,    2.0,   11.5,   25.0, 0.45),
+    ('Enercon E82 2300',        2300,  82.0,  108,    2.5,   12.5,   25.0, 0.47),
+    ('Vestas V112 3450',        3450, 112.0,  119,    3.0,   12.5,   25.0, 0.45),
+    ('Vestas V150 4200',        4200, 150.0,  155,    3.0,   11.0,   22.5, 0.44),
+    ('Nordex N131 3600',        3600, 131.0,  134,    3.0,   11.5,   25.0, 0.45),
+    ('Siemens Gamesa SG 6.0-170', 6000, 170.0, 165,   3.0,   11.0,   25.0, 0.44),
+], columns=['name', 'nennleistung_kW', 'rotordurchmesser_m', 'nabenhoehe_m',
+            'v_ein', 'v_nenn', 'v_aus', 'cp']).set_index('name')
+
+
+def luftdichte(T_celsius, luftdruck: float = LUFTDRUCK_NORMAL, hoehe_m: float = 0.0) -> np.ndarray:
+    '''
+    Luftdichte aus Temperatur und Druck (ideales Gas), optional barometrisch auf eine Höhe umgerechnet.
+
+    Parameter
+    ----------
+    T_celsius : float oder array
+        Lufttemperatur in °C (z.B. DWD TT_TU)
+    luftdruck : float oder array
+        Luftdruck auf Meereshöhe in Pa (Standard: 101325 Pa)
+    hoehe_m : float
+        Höhe über Meeresspiegel (Gelände + Nabenhöhe) in m
+
+    Returns
+    -------
+    np.ndarray
+        Dichte in kg/m³
+    '''
+    T_kelvin = np.asarray(T_celsius, dtype=float) + 273.15
+    druck = luftdruck * np.exp(-ERDBESCHLEUNIGUNG * hoehe_m / (GASKONSTANTE_LUFT * T_kelvin))
+    return druck / (GASKONSTANTE_LUFT * T_kelvin)
+
+
+def wind_auf_nabenhoehe(v_wind, messhoehe: float, nabenhoehe, rauhigkeit: float = RAUHIGKEIT) -> np.ndarray:
+    '''
+    Logarithmisches Windprofil: Windgeschwindigkeit von der Mess- auf die Nabenhöhe.
+
+    nabenhoehe darf ein Array sein (eine Höhe je Anlage); das Ergebnis hat dann
+    die Form (Anlagen x Form von v_wind).
+    '''
+    v_wind = np.asarray(v_wind, dtype=float)
+    nabenhoehe = np.asarray(nabenhoehe, dtype=float)
+    faktor = np.log(nabenhoehe / rauhigkeit) / np.log(messhoehe / rauhigkeit)
+    return faktor.reshape(faktor.shape + (1,) * v_wind.ndim) * v_wind
+
+
+def _turbinen(turbinen) -> pd.DataFrame:
+    # Name, Liste von Namen oder eigener Katalog (DataFrame wie TURBINEN)
+    if isinstance(turbinen, pd.DataFrame):
+        return turbinen
+    if isinstance(turbinen, str):
+        turbinen = [turbinen]
+    unbekannt = [name for name in turbinen if name not in TURBINEN.index]
+    if unbekannt:
+        raise KeyError(f"Unbekannte Anlage(n): {unbekannt}. Verfügbar: {list(TURBINEN.index)}")
+    return TURBINEN.loc[list(turbinen)]
+
+
+def leistungskurve(v_wind, turbinen=None, dichte=DICHTE_NORM, je_anlage: bool = False) -> np.ndarray:
+    '''
+    Elektrische Leistung für viele Anlagen in einem Aufruf.
+
+    Zwischen v_ein und v_nenn steigt die Leistung kubisch von 0 auf die
+    Nennleistung, P = P_nenn · (v³ - v_ein³) / (v_nenn³ - v_ein³), höchstens
+    jedoch cp · ½ · ρ · A · v³; ab v_nenn gilt die Nennleistung. Die Dichte
+    geht wie in IEC 61400-12 über die äquivalente Windgeschwindigkeit
+    v · (ρ / 1,225)^(1/3) ein; Ein- und Abschaltung ([v_ein, v_aus)) gelten
+    für die tatsächliche Windgeschwindigkeit.
+
+    Parameter
+    ----------
+    v_wind : array
+        Windgeschwindigkeit auf Nabenhöhe in m/s, beliebige Form (z.B. Stunden
+        oder Standorte x Stunden)
+    turbinen : str, list oder pd.DataFrame
+        Anlagennamen aus TURBINEN oder eigener Katalog (Standard: alle)
+    dichte : float oder array
+        Luftdichte in kg/m³, gegen v_wind broadcastbar
+    je_anlage : bool
+        Die erste Achse von v_wind (und dichte) gehört bereits zu den Anlagen,
+        z.B. nach wind_auf_nabenhoehe mit einer Nabenhöhe je Anlage
+
+    Returns
+    -------
+    np.ndarray
+        Leistung in kW, Form (Anlagen x Form von v_wind)
+    '''
+    kat = _turbinen(TURBINEN if turbinen is None else turbinen)
+    v_wind = np.asarray(v_wind, dtype=float)
+    v_eq = v_wind * np.cbrt(np.asarray(dichte, dtype=float) / DICHTE_NORM)
+
+    # Kennwerte als (Anlagen x 1 x ...) für das Broadcasting
+    form = (len(kat),) + (1,) * (v_eq.ndim - 1 if je_anlage else v_eq.ndim)
+    wert = {spalte: kat[spalte].to_numpy(dtype=float).reshape(form) for spalte in kat.columns}
+
+    rotorflaeche = np.pi * wert['rotordurchmesser_m'] ** 2 / 4
+    P_cp = wert['cp'] * 0.5 * DICHTE_NORM * rotorflaeche * v_eq ** 3 / 1000
+    # Kubischer Anstieg, der genau bei v_nenn die Nennleistung erreicht
+    anteil = (v_eq ** 3 - wert['v_ein'] ** 3) / (wert['v_nenn'] ** 3 - wert['v_ein'] ** 3)
+    P = np.clip(np.minimum(P_cp, wert['nennleistung_kW'] * anteil), 0.0, wert['nennleistung_kW'])
+    in_betrieb = (v_wind >= wert['v_ein']) & (v_wind < wert['v_aus'])
+    return np.where(in_betrieb, P, 0.0)
+
+
+def p_max_pu(v_wind, turbine: str, T_celsius=None, messhoehe: float = None,
+             luftdruck: float = LUFTDRUCK_NORMAL, gelaendehoehe: float = 0.0):
+    '''
+    Zeitliche Verfügbarkeit (0..1) einer Anlage für den PyPSA-Generator.
+
+    Parameter
+    ----------
+    v_wind : pd.Series oder array
+        Stündliche Windgeschwindigkeit in m/s
+    turbine : str
+        Anlagenname aus TURBINEN
+    T_celsius : pd.Series oder array
+        Lufttemperatur in °C für die Dichte (None: Normdichte 1,225 kg/m³)
+    messhoehe : float
+        Messhöhe der Windgeschwindigkeit in m (None: bereits auf Nabenhöhe)
+    luftdruck, gelaendehoehe : float
+        Luftdruck auf Meereshöhe in Pa und Geländehöhe in m
+
+    Returns
+    -------
+    pd.Series oder np.ndarray
+        p_max_pu, bei einer Series mit deren Index
+    '''
+    kat = _turbinen(turbine)
+    nabenhoehe = kat['nabenhoehe_m'].iloc[0]
+    v = np.asarray(v_wind, dtype=float)
+    if messhoehe is not None:
+        v = wind_auf_nabenhoehe(v, messhoehe, nabenhoehe)
+    dichte = DICHTE_NORM if T_celsius is None else luftdichte(T_celsius, luftdruck, gelaendehoehe + nabenhoehe)
+    pu = leistungskurve(v, kat, dichte)[0] / kat['nennleistung_kW'].iloc[0]
+    if isinstance(v_wind, pd.Series):
+        return pd.Series(pu, index=v_wind.index, name='p_max_pu')
+    return pu
+
+
+def p_max_pu_aus_leistung(leistung_kW, nennleistung_kW: float):
+    '''p_max_pu aus einer fertigen Leistungszeitreihe (z.B. renewables.ninja), auf 0..1 begrenzt.'''
+    return (leistung_kW / nennleistung_kW).clip(0, 1)
+
+
+def standortvergleich(v_standorte: pd.DataFrame, T_standorte: pd.DataFrame = None, turbinen=None,
+                      messhoehe: float = MESSHOEHE_DWD, luftdruck: float = LUFTDRUCK_NORMAL) -> pd.DataFrame:
+    '''
+    Jahresertrag und Volllaststunden für alle Kombinationen aus Anlagen und Standorten.
+
+    Parameter
+    ----------
+    v_standorte : pd.DataFrame
+        Stündliche Windgeschwindigkeit in Messhöhe, eine Spalte je Standort
+    T_standorte : pd.DataFrame
+        Lufttemperatur in °C mit denselben Spalten (None: Normdichte)
+    turbinen : str, list oder pd.DataFrame
+        Anlagen (Standard: alle aus TURBINEN)
+
+    Returns
+    -------
+    pd.DataFrame
+        Eine Zeile je (Anlage, Standort): Ertrag_kWh, Volllaststunden, Kapazitaetsfaktor
+    '''
+    kat = _turbinen(TURBINEN if turbinen is None else turbinen)
+    v = v_standorte.to_numpy(dtype=float).T                                    # Standorte x Stunden
+    v_nabe = wind_auf_nabenhoehe(v, messhoehe, kat['nabenhoehe_m'].to_numpy())  # Anlagen x Standorte x Stunden
+    if T_standorte is None:
+        dichte = DICHTE_NORM
+    else:
+        T = T_standorte[v_standorte.columns].to_numpy(dtype=float).T
+        dichte = luftdichte(T, luftdruck, kat['nabenhoehe_m'].to_numpy()[:, None, None])
+    P = leistungskurve(np.nan_to_num(v_nabe), kat, dichte, je_anlage=True)       # Anlagen x Standorte x Stunden
+
+    ertrag = P.sum(axis=2)
+    volllast = ertrag / kat['nennleistung_kW'].to_numpy()[:, None]
+    index = pd.MultiIndex.from_product([kat.index, v_standorte.columns], names=['Anlage', 'Standort'])
+    return pd.DataFrame({
+        'Ertrag_kWh': ertrag.ravel(),
+        'Volllaststunden': volllast.ravel(),
+        'Kapazitaetsfaktor': volllast.ravel() / P.shape[2],
+    }, index=index)
+
+
+def lese_dwd_wind(pfad: str) -> pd.Series:
+    '''Stündliche Windgeschwindigkeit (m/s) aus einer DWD-Datei, Fehlwerte (-999) als NaN.'''
+    from luecken_fuellung import FEHLWERT, lese_dwd_station
+    v = lese_dwd_station(pfad, [WIND_SPALTE])[WIND_SPALTE]
+    return v.where(v != FEHLWERT)
@@ -0,0 +1,355 @@
+"""
+Schneller Pfad für das Zukunftssystem: LP direkt als dünnbesetzte SciPy-Matrizen
+- Gleiches Modell wie netzwerk.baue_zukunft (2 Busse, Windkraft, Netzimport,
+  Wärmepumpe mit zeitabhängigem COP, zwei zyklische Speicher), aber ohne
+  PyPSA/linopy: Aufbau in wenigen Millisekunden statt Sekunden
+- Gelöst mit HiGHS über scipy.optimize.linprog
+- Ergebnisse in derselben Form wie generators_t.p, links_t.p0, stores_t.e und
+  stores_t.p sowie Kennzahlen wie netzwerk.kennzahlen
+- pruefe_gleichwertigkeit() vergleicht mit dem PyPSA-Pfad
+- loese_stochastisch(): zweistufige Auslegung über mehrere Wetterjahre bzw.
+  Szenarien mit Wahrscheinlichkeiten (gemeinsamer Ausbau, Betrieb je Szenario)
+
+Variablen je Snapshot (Blöcke der Länge T) und Ausbaugrößen:
+    Windkraftanlage-p, Netz_Import-p, Waermepumpe-p0, Stromspeicher-p, Stromspeicher-e,
+    Waermespeicher-p, Waermespeicher-e | p_nom Wind, Netz_Import, Waermepumpe, e_nom Strom-/Wärmespeicher
+
+Verwendung:
+    from zukunft_lp import loese_zukunft
+    ergebnis = loese_zukunft(zeitreihen, ZukunftParameter(netz_import_kosten=0.2))
+    ergebnis.generators_t_p, ergebnis.kennzahlen()
+
+    robust = loese_stochastisch({'2019': zeitreihen_2019, '2024': zeitreihen_2024}, {'2019': 0.5, '2024': 0.5})
+    robust.ausbau, robust.kennzahlen()
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.optimize import linprog
+
+from netzwerk import ZukunftParameter, preis_je_snapshot
+from windkraft import p_max_pu_aus_leistung
+
+ZEITVARIABLEN = ['Windkraftanlage', 'Netz_Import', 'Waermepumpe',
+                 'Stromspeicher_p', 'Stromspeicher_e', 'Waermespeicher_p', 'Waermespeicher_e']
+AUSBAU = ['p_nom_opt_Windkraftanlage', 'p_nom_opt_Netz_Import', 'p_nom_opt_Waermepumpe',
+          'e_nom_opt_Stromspeicher', 'e_nom_opt_Waermespeicher']
+
+
+@dataclass
+class ZukunftLP:
+    '''LP in Standardform: min c·x mit A_eq·x = b_eq, A_ub·x <= b_ub, Variablengrenzen bounds.'''
+    c: np.ndarray
+    A_eq: sp.csr_matrix
+    b_eq: np.ndarray
+    A_ub: sp.csr_matrix
+    b_ub: np.ndarray
+    bounds: np.ndarray
+    snapshots: pd.Index
+
+
+@dataclass
+class ZukunftErgebnis:
+    '''Lösung in der Form der PyPSA-Ergebnisse.'''
+    status: str
+    objective: float
+    generators_t_p: pd.DataFrame
+    links_t_p0: pd.DataFrame
+    stores_t_e: pd.DataFrame
+    stores_t_p: pd.DataFrame
+    ausbau: dict
+    parameter: ZukunftParameter
+    strom_last_kWh: float = 0.0
+
+    def kennzahlen(self) -> dict:
+        '''Kennzahlen mit denselben Schlüsseln wie netzwerk.kennzahlen.'''
+        p = self.parameter
+        investition = (p.capital_cost_wind * self.ausbau['p_nom_opt_Windkraftanlage']
+                       + p.capital_cost_wp * self.ausbau['p_nom_opt_Waermepumpe']
+                       + p.capital_cost_stromspeicher * self.ausbau['e_nom_opt_Stromspeicher']
+                       + p.capital_cost_waermespeicher * self.ausbau['e_nom_opt_Waermespeicher'])
+        netzimport = self.generators_t_p['Netz_Import']
+        betrieb = float(netzimport.to_numpy() @ _importpreise(p, netzimport.index))
+        strom_last = self.strom_last_kWh
+        return {**self.ausbau,
+                'Investitionskosten': investition,
+                'Betriebskosten': betrieb,
+                'Gesamtkosten': investition + betrieb,
+                'Netzimport_kWh': float(netzimport.sum()),
+                'Stromautarkie_prozent': float(self.generators_t_p['Windkraftanlage'].sum()) / strom_last * 100
+                if strom_last > 0 else 0.0}
+
+
+def betriebsteil(zeitreihen: pd.DataFrame, p: ZukunftParameter) -> tuple:
+    '''
+    Betriebsteil des LP für ein Jahr/Szenario.
+
+    Returns
+    -------
+    tuple
+        (A_eq, b_eq, zeitteil, ausbauteil, c, untere): Bilanzen, Grenzen
+        zeitteil · x + ausbauteil · Ausbau <= 0, Kosten und untere Grenzen
+        der Betriebsvariablen (Spalten: Wind, Netz, WP, SS-p, SS-e, WS-p, WS-e)
+    '''
+    T = len(zeitreihen)
+    cop = zeitreihen['COP'].to_numpy(dtype=float)
+    p_max_pu = np.asarray(p_max_pu_aus_leistung(zeitreihen['Wind_kW'], p.wind_nennleistung_vergleichsanlage),
+                          dtype=float)
+
+    I = sp.identity(T, format='csr')
+    Z = None
+    eins = sp.csr_matrix(np.ones((T, 1)))
+    # zyklische Vorgänger-Matrix: (V·e)[t] = e[t-1], e[-1] = e[T-1]
+    V = sp.csr_matrix((np.ones(T), (np.arange(T), (np.arange(T) - 1) % T)), shape=(T, T))
+
+    def speicherbilanz(verlust):
+        # e_t - (1 - standing_loss)·e_(t-1) + p_t = 0  (p > 0: Entladung in den Bus)
+        return I - (1 - verlust) * V
+
+    # Spalten: Wind, Netz, WP, SS-p, SS-e, WS-p, WS-e
+    A_eq = sp.bmat([
+        [I, I, -I, I, Z, Z, Z],                                                     # Strombus
+        [Z, Z, sp.diags(cop), Z, Z, I, Z],                                          # Wärmebus
+        [Z, Z, Z, I, speicherbilanz(p.stromspeicher_standing_loss), Z, Z],
+        [Z, Z, Z, Z, Z, I, speicherbilanz(p.waermespeicher_standing_loss)],
+    ], format='csr', dtype=float)
+    b_eq = np.concatenate([zeitreihen['Energy_kW'].to_numpy(dtype=float),
+                           zeitreihen['Heizlast_kW'].to_numpy(dtype=float), np.zeros(2 * T)])
+
+    # Leistungs-/Füllstandsgrenzen: x_t - pu_t · Ausbau <= 0 für Wind, Netz, WP, SS-e, WS-e
+    auswahl = np.concatenate([np.arange(T) + i * T for i in (0, 1, 2, 4, 6)])
+    zeitteil = sp.csr_matrix((np.ones(5 * T), (np.arange(5 * T), auswahl)), shape=(5 * T, 7 * T))
+    ausbauteil = sp.block_diag([-sp.csr_matrix(p_max_pu[:, None]), -eins, -eins, -eins, -eins], format='csr')
+
+    c = np.zeros(7 * T)
+    c[T:2 * T] = _importpreise(p, zeitreihen.index)
+    untere = np.zeros(7 * T)
+    untere[3 * T:4 * T] = -np.inf                  # Speicherleistung in beide Richtungen
+    untere[5 * T:6 * T] = -np.inf
+    return A_eq, b_eq, zeitteil, ausbauteil, c, untere
+
+
+def _importpreise(p: ZukunftParameter, index: pd.Index) -> np.ndarray:
+    # Netzimportpreis je Stunde (fester Preis oder Zeitreihe aus tarife.py)
+    return np.broadcast_to(np.asarray(preis_je_snapshot(p.netz_import_kosten, index), dtype=float), len(index))
+
+
+def ausbaukosten(p: ZukunftParameter) -> np.ndarray:
+    '''capital_cost in der Reihenfolge AUSBAU (Netz_Import ohne Investitionskosten).'''
+    return np.array([p.capital_cost_wind, 0.0, p.capital_cost_wp, p.capital_cost_stromspeicher,
+                     p.capital_cost_waermespeicher])
+
+
+def baue_lp(zeitreihen: pd.DataFrame, parameter: ZukunftParameter = None) -> ZukunftLP:
+    '''
+    Baut das LP des Zukunftssystems (stündliche Snapshots, Gewichtung 1).
+
+    Parameter
+    ----------
+    zeitreihen : pd.DataFrame
+        Heizlast_kW, Energy_kW, COP, Wind_kW
+    parameter : ZukunftParameter
+        Kosten und Verluste
+
+    Returns
+    -------
+    ZukunftLP
+    '''
+    p = parameter or ZukunftParameter()
+    T = len(zeitreihen)
+    A_eq, b_eq, zeitteil, ausbauteil, c, untere = betriebsteil(zeitreihen, p)
+    A_eq = sp.hstack([A_eq, sp.csr_matrix((4 * T, 5))], format='csr')
+    A_ub = sp.hstack([zeitteil, ausbauteil], format='csr')
+    c = np.concatenate([c, ausbaukosten(p)])
+    bounds = np.column_stack([np.concatenate([untere, np.zeros(5)]), np.full(7 * T + 5, np.inf)])
+    return ZukunftLP(c, A_eq, b_eq, A_ub, np.zeros(5 * T), bounds, zeitreihen.index.rename('snapshot'))
+
+
+def _ergebnis(x: np.ndarray, snapshots: pd.Index, ausbau: np.ndarray, parameter: ZukunftParameter,
+              strom_last_kWh: float, objective: float) -> ZukunftErgebnis:
+    # Lösungsvektor des Betriebsteils (7 Blöcke der Länge T) -> PyPSA-förmige Tabellen
+    T = len(snapshots)
+    block = {name: x[i * T:(i + 1) * T] for i, name in enumerate(ZEITVARIABLEN)}
+
+    def rahmen(spalten):
+        # Spaltenname -> Variablenblock, wie PyPSA (Index 'snapshot', Spalten 'name')
+        return pd.DataFrame({s: block[k] for s, k in spalten.items()}, index=snapshots).rename_axis(columns='name')
+
+    return ZukunftErgebnis(
+        status='ok',
+        objective=objective,
+        generators_t_p=rahmen({'Windkraftanlage': 'Windkraftanlage', 'Netz_Import': 'Netz_Import'}),
+        links_t_p0=rahmen({'Waermepumpe': 'Waermepumpe'}),
+        stores_t_e=rahmen({'Stromspeicher': 'Stromspeicher_e', 'Waermespeicher': 'Waermespeicher_e'}),
+        stores_t_p=rahmen({'Stromspeicher': 'Stromspeicher_p', 'Waermespeicher': 'Waermespeicher_p'}),
+        ausbau=dict(zip(AUSBAU, np.asarray(ausbau, dtype=float).tolist())),
+        parameter=parameter,
+        strom_last_kWh=strom_last_kWh,
+    )
+
+
+def loese_lp(lp: ZukunftLP, parameter: ZukunftParameter = None, methode: str = 'highs',
+             **optionen) -> ZukunftErgebnis:
+    '''Löst das LP mit HiGHS (scipy.optimize.linprog, methode 'highs', 'highs-ds' oder 'highs-ipm').'''
+    T = len(lp.snapshots)
+    parameter = parameter or ZukunftParameter()
+    loesung = linprog(lp.c, A_ub=lp.A_ub, b_ub=lp.b_ub, A_eq=lp.A_eq, b_eq=lp.b_eq,
+                      bounds=lp.bounds, method=methode, options=optionen or None)
+    if not loesung.success:
+        return ZukunftErgebnis(loesung.message, np.nan, None, None, None, None, {}, parameter)
+    return _ergebnis(loesung.x[:7 * T], lp.snapshots, loesung.x[7 * T:], parameter,
+                     float(lp.b_eq[:T].sum()), float(loesung.fun))
+
+
+def loese_zukunft(zeitreihen: pd.DataFrame, parameter: ZukunftParameter = None, methode: str = 'highs',
+                  **optionen) -> ZukunftErgebnis:
+    '''Baut und löst das Zukunftssystem ohne PyPSA.'''
+    parameter = parameter or ZukunftParameter()
+    return loese_lp(baue_lp(zeitreihen, parameter), parameter, methode, **optionen)
+
+
+@dataclass
+class StochastischesErgebnis:
+    '''Zweistufige Auslegung: gemeinsamer Ausbau, Betrieb je Szenario.'''
+    status: str
+    objective: float                # Investition + erwarteter Betrieb in €/a
+    ausbau: dict
+    szenarien: dict                 # Name -> ZukunftErgebnis (Betrieb mit dem gemeinsamen Ausbau)
+    wahrscheinlichkeiten: pd.Series
+
+    def kennzahlen(self) -> pd.DataFrame:
+        '''Kennzahlen je Szenario und mit den Wahrscheinlichkeiten gewichteter Erwartungswert.'''
+        tabelle = pd.DataFrame({name: e.kennzahlen() for name, e in self.szenarien.items()}).T
+        tabelle.loc['Erwartungswert'] = tabelle.mul(self.wahrscheinlichkeiten, axis=0).sum()
+        return tabelle
+
+
+def loese_stochastisch(szenarien: dict, wahrscheinlichkeiten: dict = None, parameter: ZukunftParameter = None,
+                       methode: str = 'highs', **optionen) -> StochastischesErgebnis:
+    '''
+    Zweistufige stochastische Auslegung über mehrere Wetterjahre/Szenarien.
+
+    Erste Stufe: Ausbau von Windkraft, Netzanschluss, Wärmepumpe und beiden
+    Speichern, gemeinsam für alle Szenarien. Zweite Stufe: stündlicher Betrieb
+    je Szenario (Speicher zyklisch je Szenario). Zielfunktion: Investition +
+    Summe der mit den Wahrscheinlichkeiten gewichteten Betriebskosten.
+
+    Die Szenarien liegen als Blockdiagonale mit gemeinsamen Ausbauspalten in einer
+    dünnbesetzten Matrix (~25 Nichtnullen je Stunde und Szenario); 10 Jahre x 8760 h
+    ergeben rund 0,6 Mio. Variablen bei etwa 25 MB Matrixspeicher.
+
+    Parameter
+    ----------
+    szenarien : dict
+        Name -> Zeitreihen (Heizlast_kW, Energy_kW, COP, Wind_kW) eines Jahres
+    wahrscheinlichkeiten : dict
+        Name -> Gewicht (wird auf Summe 1 normiert; Standard: gleich gewichtet)
+    parameter : ZukunftParameter
+        Kosten und Verluste
+    methode : str
+        linprog-Methode ('highs', 'highs-ds', 'highs-ipm'); das duale Simplex-Verfahren war hier schneller als
+        das Innere-Punkte-Verfahren (dichte Ausbauspalten)
+
+    Returns
+    -------
+    StochastischesErgebnis
+    '''
+    parameter = parameter or ZukunftParameter()
+    namen = list(szenarien)
+    gewichte = pd.Series(wahrscheinlichkeiten if wahrscheinlichkeiten is not None
+                         else {name: 1.0 for name in namen}, dtype=float).reindex(namen)
+    if gewichte.isna().any() or (gewichte < 0).any() or gewichte.sum() <= 0:
+        raise ValueError("Wahrscheinlichkeiten müssen für alle Szenarien angegeben, >= 0 und nicht alle 0 sein.")
+    gewichte = gewichte / gewichte.sum()
+
+    A_eq, b_eq, zeitteile, ausbauteile, c, untere, laengen = [], [], [], [], [], [], []
+    for name in namen:
+        a, b, zeit, ausbau, kosten, unten = betriebsteil(szenarien[name], parameter)
+        A_eq.append(a)
+        b_eq.append(b)
+        zeitteile.append(zeit)
+        ausbauteile.append(ausbau)
+        c.append(kosten * gewichte[name])
+        untere.append(unten)
+        laengen.append(len(szenarien[name]))
+
+    zeilen_eq = sum(a.shape[0] for a in A_eq)
+    A_eq = sp.hstack([sp.block_diag(A_eq, format='csr'), sp.csr_matrix((zeilen_eq, 5))], format='csr')
+    A_ub = sp.hstack([sp.block_diag(zeitteile, format='csr'), sp.vstack(ausbauteile, format='csr')], format='csr')
+    del zeitteile, ausbauteile
+    c = np.concatenate(c + [ausbaukosten(parameter)])
+    untere = np.concatenate(untere + [np.zeros(5)])
+    bounds = np.column_stack([untere, np.full(len(untere), np.inf)])
+
+    loesung = linprog(c, A_ub=A_ub, b_ub=np.zeros(A_ub.shape[0]), A_eq=A_eq, b_eq=np.concatenate(b_eq),
+                      bounds=bounds, method=methode, options=optionen or None)
+    if not loesung.success:
+        return StochastischesErgebnis(loesung.message, np.nan, {}, {}, gewichte)
+
+    ausbau = loesung.x[-5:]
+    investition = float(ausbaukosten(parameter) @ ausbau)
+    ergebnisse, start = {}, 0
+    for name, T, last in zip(namen, laengen, b_eq):
+        x = loesung.x[start:start + 7 * T]
+        betrieb = float(x[T:2 * T] @ _importpreise(parameter, szenarien[name].index))
+        ergebnisse[name] = _ergebnis(x, szenarien[name].index.rename('snapshot'), ausbau, parameter,
+                                     float(last[:T].sum()), investition + betrieb)
+        start += 7 * T
+    return StochastischesErgebnis('ok', float(loesung.fun), dict(zip(AUSBAU, ausbau.tolist())), ergebnisse, gewichte)
+
+
+def pruefe_gleichwertigkeit(zeitreihen: pd.DataFrame, parameter: ZukunftParameter = None,
+                            toleranz: float = 1e-6, toleranz_kennzahlen: float = 1e-3,
+                            solver_name: str = 'highs') -> pd.DataFrame:
+    '''
+    Vergleicht den schnellen Pfad mit netzwerk.baue_zukunft + PyPSA.
+
+    Zielfunktionswerte müssen bis auf `toleranz` (relativ) übereinstimmen, alle
+    Kennzahlen (Kapazitäten, Kosten, Netzimport_kWh, Stromautarkie) bis auf
+    `toleranz_kennzahlen` (relativ, mindestens absolut), sonst AssertionError.
+    Bei mehreren optimalen Lösungen können Einsatz und Ausbau trotz gleicher
+    Zielfunktion abweichen; dann `toleranz_kennzahlen` erhöhen.
+
+    Returns
+    -------
+    pd.DataFrame
+        Kennzahlen beider Wege und ihre Differenz
+    '''
+    from netzwerk import baue_zukunft, kennzahlen
+    from solver import optimiere
+
+    parameter = parameter or ZukunftParameter()
+    schnell = loese_zukunft(zeitreihen, parameter)
+    network = baue_zukunft(zeitreihen, parameter)
+    optimiere(network, solver_name)
+
+    abweichung = abs(schnell.objective - network.objective) / max(abs(network.objective), 1.0)
+    assert abweichung <= toleranz, f"Zielfunktion weicht um {abweichung:.2e} ab " \
+                                   f"({schnell.objective:.2f} / {network.objective:.2f})"
+    tabelle = pd.DataFrame({'pypsa': kennzahlen(network), 'sparse_lp': schnell.kennzahlen()}).astype(float)
+    tabelle['differenz'] = tabelle['sparse_lp'] - tabelle['pypsa']
+    relativ = tabelle['differenz'].abs() / tabelle['pypsa'].abs().clip(lower=1.0)
+    abweichend = relativ[~(relativ <= toleranz_kennzahlen)]
+    assert abweichend.empty, f"Kennzahlen weichen ab: {abweichend.map('{:.2e}'.format).to_dict()}"
+    return tabelle
+
+
+if __name__ == '__main__':
+    import time
+
+    from daten_cache import lade_zeitreihen
+
+    zeitreihen = lade_zeitreihen()
+
+    start = time.perf_counter()
+    lp = baue_lp(zeitreihen)
+    aufbau = time.perf_counter() - start
+    ergebnis = loese_lp(lp)
+    print(f"Aufbau {aufbau * 1000:.1f} ms, gesamt {time.perf_counter() - start:.2f} s, "
+          f"Gesamtkosten {ergebnis.objective:,.0f} €/a")
+    # Kurzer Zeitraum (zwei Wochen) als schneller Gleichwertigkeitstest, danach das ganze Jahr
+    pruefe_gleichwertigkeit(zeitreihen.iloc[:336])
+    print(pruefe_gleichwertigkeit(zeitreihen).round(3).to_string())